@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from mtr_routing import walking_minutes
+from poi_engine import (
+    CATEGORY_CONFIG, TOTAL_POI_RADIUS, POIIndex, compute_poi_features, feature_column_names, load_poi_table
+)
+
+"""
+Precomputed Accessibility Grid
+
+Evaluates the poi_v2 feature block (total POIs within 1000 m, every
+CATEGORY_CONFIG count at its radius, distance to the nearest MTR station)
+once at the vertices of a regular grid over Hong Kong, in HK1980
+easting/northing, and stores it as one memory-mapped array:
+
+    grid.npy        float32 (rows x cols x layers); all layers of a vertex are adjacent
+    manifest.json   origin, cell size, shape, layer names, config hash, measured error
+
+A new listing's features are then a constant-time lookup (4 vertices for
+bilinear, 1 for nearest) instead of building POIIndex trees from GeoCom or
+calling Google Places, so the scoring service can use it per request.
+
+Error against exact counts (poi_engine.compute_poi_features):
+    nearest     the chosen vertex is at most cell * sqrt(2) / 2 away (35 m at 50 m cells), so
+                the MTR distance is within that much and a count only differs by POIs
+                lying within that distance of the radius boundary
+    bilinear    a weighted mean of the 4 surrounding vertices; smoother, non-integer counts
+The build measures both on random points inside the grid and records MAE,
+95th percentile and maximum absolute error per layer in the manifest
+(`error` key, printed by `info`).
+
+    python accessibility_grid.py build GeoCom.csv accessibility_grid --cell 50
+    python accessibility_grid.py info accessibility_grid
+    grid = AccessibilityGrid('accessibility_grid')
+    features = grid.lookup(df[['easting', 'northing']].to_numpy())
+"""
+
+GRID_DIR = 'accessibility_grid'
+DEFAULT_CELL_M = 50
+FORMAT_VERSION = 1
+# Vertex rows counted per pass when building (bounds the tree query memory)
+BUILD_ROWS_PER_CHUNK = 64
+VALIDATION_POINTS = 20_000
+MTR_DISTANCE_LAYER = 'distance_to_nearest_mtr_km'
+
+
+def config_hash(category_config=CATEGORY_CONFIG, total_radius=TOTAL_POI_RADIUS):
+    config = json.dumps({'categories': category_config, 'total_radius': total_radius}, sort_keys=True)
+    return hashlib.sha256(config.encode()).hexdigest()[:16]
+
+
+def grid_bounds(coords, cell, padding=0.0):
+    """(x0, y0, n_cols, n_rows) of the vertex grid covering coords, snapped to the cell size."""
+    low = np.floor((coords.min(axis=0) - padding) / cell) * cell
+    high = np.ceil((coords.max(axis=0) + padding) / cell) * cell
+    n_cols, n_rows = ((high - low) / cell).astype(int) + 1
+    return float(low[0]), float(low[1]), int(n_cols), int(n_rows)
+
+
+def build_grid(poi_df, out_dir=GRID_DIR, cell=DEFAULT_CELL_M, bounds=None, category_config=CATEGORY_CONFIG,
+               total_radius=TOTAL_POI_RADIUS, validation_points=VALIDATION_POINTS, seed=0, verbose=True):
+    """
+    Builds the grid from a GeoCom POI table (load_poi_table) into out_dir.
+
+    bounds: (x0, y0, n_cols, n_rows); defaults to the extent of the POIs.
+    The array is written through a memmap one band of rows at a time and the
+    directory is swapped in only when complete, so a reader never sees a
+    partial grid.
+    """
+    index = POIIndex(poi_df, category_config)
+    x0, y0, n_cols, n_rows = bounds or grid_bounds(index.coords, cell)
+    layers = feature_column_names(category_config, total_radius)
+    tmp = f'{out_dir}.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    grid = np.lib.format.open_memmap(os.path.join(tmp, 'grid.npy'), mode='w+', dtype=np.float32,
+                                     shape=(n_rows, n_cols, len(layers)))
+    xs = x0 + np.arange(n_cols) * cell
+    start = time.perf_counter()
+    for lo in range(0, n_rows, BUILD_ROWS_PER_CHUNK):
+        hi = min(lo + BUILD_ROWS_PER_CHUNK, n_rows)
+        ys = y0 + np.arange(lo, hi) * cell
+        vertices = np.column_stack([np.tile(xs, hi - lo), np.repeat(ys, n_cols)])
+        features = compute_poi_features(index, vertices, category_config, total_radius)[layers]
+        grid[lo:hi] = features.to_numpy(dtype=np.float32).reshape(hi - lo, n_cols, len(layers))
+        if verbose:
+            print(f"  rows {hi}/{n_rows} ({time.perf_counter() - start:.0f}s)", end='\r')
+    grid.flush()
+    del grid
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'x0': x0, 'y0': y0, 'cell': cell, 'n_cols': n_cols, 'n_rows': n_rows,
+        'layers': layers,
+        'config_hash': config_hash(category_config, total_radius),
+        'poi_rows': len(poi_df),
+        'built_seconds': round(time.perf_counter() - start, 1),
+    }
+    with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Error against exact counts at random points inside the grid
+    if validation_points:
+        rng = np.random.default_rng(seed)
+        points = np.column_stack([rng.uniform(x0, x0 + (n_cols - 1) * cell, validation_points),
+                                  rng.uniform(y0, y0 + (n_rows - 1) * cell, validation_points)])
+        exact = compute_poi_features(index, points, category_config, total_radius)[layers]
+        manifest['error'] = error_report(AccessibilityGrid(tmp), points, exact)
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp, out_dir)
+    if verbose:
+        print(f"\n✅ {n_rows} x {n_cols} grid ({len(layers)} layers) written to '{out_dir}'")
+    return AccessibilityGrid(out_dir)
+
+
+def error_report(grid, points, exact):
+    """{method: {layer: {mae, p95, max}}} absolute error of grid lookups against exact features."""
+    report = {}
+    for method in ['nearest', 'bilinear']:
+        approx = grid.lookup(points, method)
+        report[method] = {}
+        for layer in grid.layers:
+            err = np.abs(approx[layer].to_numpy() - exact[layer].to_numpy(dtype=np.float64))
+            report[method][layer] = {'mae': round(float(err.mean()), 4),
+                                     'p95': round(float(np.percentile(err, 95)), 4),
+                                     'max': round(float(err.max()), 4)}
+    report['points'] = len(points)
+    return report
+
+
+class AccessibilityGrid:
+    """A built grid, opened read-only and memory-mapped."""
+
+    def __init__(self, path=GRID_DIR, category_config=CATEGORY_CONFIG, total_radius=TOTAL_POI_RADIUS):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        if self.manifest['config_hash'] != config_hash(category_config, total_radius):
+            raise ValueError(f"'{path}' was built with a different CATEGORY_CONFIG / radius; rebuild it")
+        self.x0, self.y0 = self.manifest['x0'], self.manifest['y0']
+        self.cell = self.manifest['cell']
+        self.layers = self.manifest['layers']
+        self.grid = np.load(os.path.join(path, 'grid.npy'), mmap_mode='r')
+        self.n_rows, self.n_cols = self.grid.shape[:2]
+
+    def lookup(self, coords, method='bilinear'):
+        """
+        Features for an (n x 2) array of HK1980 easting/northing, as a DataFrame
+        with the compute_poi_features columns. Points outside the grid (or with
+        missing coordinates) get NaN.
+        """
+        coords = np.atleast_2d(np.asarray(coords, dtype=np.float64))
+        fx = (coords[:, 0] - self.x0) / self.cell
+        fy = (coords[:, 1] - self.y0) / self.cell
+        inside = (fx >= 0) & (fx <= self.n_cols - 1) & (fy >= 0) & (fy <= self.n_rows - 1)
+        fx, fy = np.where(inside, fx, 0.0), np.where(inside, fy, 0.0)
+
+        if method == 'nearest':
+            values = self.grid[np.rint(fy).astype(np.intp), np.rint(fx).astype(np.intp)].astype(np.float64)
+        elif method == 'bilinear':
+            # Lower-left vertex, kept one short of the edge so the upper-right one exists
+            ix = np.minimum(np.floor(fx).astype(np.intp), max(self.n_cols - 2, 0))
+            iy = np.minimum(np.floor(fy).astype(np.intp), max(self.n_rows - 2, 0))
+            tx, ty = (fx - ix)[:, None], (fy - iy)[:, None]
+            ix1, iy1 = np.minimum(ix + 1, self.n_cols - 1), np.minimum(iy + 1, self.n_rows - 1)
+            values = ((1 - tx) * (1 - ty) * self.grid[iy, ix] + tx * (1 - ty) * self.grid[iy, ix1] +
+                      (1 - tx) * ty * self.grid[iy1, ix] + tx * ty * self.grid[iy1, ix1])
+        else:
+            raise ValueError(f"Unknown lookup method '{method}' (use 'nearest' or 'bilinear')")
+        values[~inside] = np.nan
+        return pd.DataFrame(values, columns=self.layers)
+
+    def fill_features(self, df, method='bilinear'):
+        """
+        Returns df with missing POI counts and walking_time_to_mtr filled from
+        the grid, for listings that have HK1980 easting/northing. Counts are
+        rounded (the models were trained on integer counts); walking time uses
+        the mtr_routing walking model on the nearest-station distance.
+        """
+        if not {'easting', 'northing'}.issubset(df.columns):
+            return df
+        df = df.copy()
+        coords = df[['easting', 'northing']].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        looked_up = self.lookup(coords, method)
+        looked_up.index = df.index
+        for layer in self.layers:
+            if layer == MTR_DISTANCE_LAYER:
+                continue
+            filled = looked_up[layer].round()
+            df[layer] = filled if layer not in df.columns else pd.to_numeric(df[layer], errors='coerce').fillna(filled)
+        walking = walking_minutes(looked_up[MTR_DISTANCE_LAYER] * 1000).round()
+        if 'walking_time_to_mtr' in df.columns:
+            walking = pd.to_numeric(df['walking_time_to_mtr'], errors='coerce').fillna(walking)
+        df['walking_time_to_mtr'] = walking
+        return df
+
+
+def print_info(grid):
+    m = grid.manifest
+    print(f"{m['n_rows']} x {m['n_cols']} vertices at {m['cell']} m from ({m['x0']:.0f}, {m['y0']:.0f}), "
+          f"{len(m['layers'])} layers, {grid.grid.nbytes / 1e6:.1f} MB, built from {m['poi_rows']:,} POIs")
+    if 'error' in m:
+        print(f"\nAbsolute error against exact counts on {m['error']['points']:,} random points:")
+        for method in ['nearest', 'bilinear']:
+            print(f"\n  {method}")
+            print(pd.DataFrame(m['error'][method]).T.to_string())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precomputed POI / MTR accessibility grid')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build_parser = sub.add_parser('build', help='evaluate the features on a grid from a GeoCom table')
+    build_parser.add_argument('poi_csv', help='GeoCom.csv')
+    build_parser.add_argument('out_dir', nargs='?', default=GRID_DIR)
+    build_parser.add_argument('--cell', type=float, default=DEFAULT_CELL_M, help='grid spacing in metres')
+    build_parser.add_argument('--validation-points', type=int, default=VALIDATION_POINTS)
+    info_parser = sub.add_parser('info', help='grid extent and measured error')
+    info_parser.add_argument('grid_dir', nargs='?', default=GRID_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        grid = build_grid(load_poi_table(args.poi_csv), args.out_dir, args.cell,
+                          validation_points=args.validation_points)
+    else:
+        grid = AccessibilityGrid(args.grid_dir)
+    print_info(grid)
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from accessibility_grid import build_grid, print_info
+from poi_engine import POIIndex, compute_poi_features
+from synthetic import make_poi_table, make_property_coords
+
+"""
+Benchmark for accessibility_grid.py.
+
+Builds the grid from a synthetic GeoCom-sized POI table, prints the error
+against exact poi_engine counts measured during the build, and compares the
+per-listing latency of a grid lookup with computing the features exactly
+(with the POI trees already built, and with building them first, as a
+scoring job without the grid has to).
+
+    python benchmarks/bench_accessibility_grid.py --pois 100000 --cell 50
+"""
+
+
+def per_call_ms(fn, coords):
+    start = time.perf_counter()
+    for i in range(len(coords)):
+        fn(coords[i:i + 1])
+    return (time.perf_counter() - start) / len(coords) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pois', type=int, default=100_000)
+    parser.add_argument('--cell', type=float, default=50)
+    parser.add_argument('--listings', type=int, default=200)
+    args = parser.parse_args()
+
+    poi_df = make_poi_table(args.pois)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        grid = build_grid(poi_df, os.path.join(tmp, 'grid'), args.cell, verbose=False)
+        print(f"Built in {time.perf_counter() - start:.1f}s")
+        print_info(grid)
+
+        coords = make_property_coords(args.listings, seed=1)
+        index = POIIndex(poi_df)
+        compute_poi_features(index, coords[:1])  # build the trees once
+        exact_ms = per_call_ms(lambda c: compute_poi_features(index, c), coords)
+        cold_ms = per_call_ms(lambda c: compute_poi_features(POIIndex(poi_df), c), coords[:10])
+        nearest_ms = per_call_ms(lambda c: grid.lookup(c, 'nearest'), coords)
+        bilinear_ms = per_call_ms(lambda c: grid.lookup(c, 'bilinear'), coords)
+
+        start = time.perf_counter()
+        grid.lookup(make_property_coords(1_000_000, seed=2))
+        batch_rate = 1_000_000 / (time.perf_counter() - start)
+        del grid
+
+    print("\nPer-listing latency:")
+    print(f"  exact, trees built:        {exact_ms:8.3f} ms")
+    print(f"  exact, building trees:     {cold_ms:8.3f} ms")
+    print(f"  grid nearest:              {nearest_ms:8.3f} ms")
+    print(f"  grid bilinear:             {bilinear_ms:8.3f} ms")
+    print(f"  grid bilinear, batched:    {batch_rate:>10,.0f} listings/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import io
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clean_centanet_data import clean_attributes, clean_centanet_frame, clean_centanet_to_parquet
+from streaming_cleaner import read_table
+
+"""
+Benchmark for the Centanet cleaning stage.
+
+Generates a synthetic raw scrape shaped like raw_data/centanet_data_2.csv,
+checks that the vectorized cleaning produces byte-identical CSV output to the
+original row-by-row implementation, and times both. The streamed Parquet run
+(clean_centanet_to_parquet) is read back and must match the in-memory clean
+once both are in the Parquet schema (numeric columns float64, text as strings).
+
+    python benchmarks/bench_clean_centanet.py --rows 1000000 --legacy-rows 100000
+"""
+
+ESTATES = ['TAIKOO SHING', 'LOHAS PARK', 'MEI FOO SUN CHUEN', 'CITY ONE SHATIN', 'SOUTH HORIZONS',
+           'WHAMPOA GARDEN', 'KORNHILL', 'TSUEN KING GARDEN', 'LAKE SILVER', 'BELVEDERE GARDEN']
+DISTRICTS = ['Quarry Bay', 'Tseung Kwan O', 'Mei Foo', 'Sha Tin', 'Ap Lei Chau',
+             'Hung Hom', 'Quarry Bay', 'Tsuen Wan', 'Wu Kai Sha', 'Tsuen Wan']
+ATTRIBUTES = ['Sea View\nSea View\nNear MTR', 'Clubhouse\nSwimming Pool', 'Pet friendly', '', np.nan]
+
+
+def make_raw_scrape(n_rows, seed=0):
+    """Synthetic raw scrape with the quirks the cleaner repairs (rooms in unit/floor, misplaced flats)."""
+    rng = np.random.default_rng(seed)
+    estate = rng.integers(0, len(ESTATES), n_rows)
+    rooms = rng.integers(1, 5, n_rows).astype(str)
+    flat = np.char.add('FLAT ', rng.choice(list('ABCDEFGH'), n_rows))
+    quirk = rng.choice(['ok', 'rooms_in_unit', 'rooms_in_floor', 'flat_in_floor', 'blank'], n_rows,
+                       p=[0.6, 0.15, 0.1, 0.1, 0.05])
+
+    bedroom = np.where(quirk == 'ok', rooms, '')
+    unit = np.where(quirk == 'rooms_in_unit', np.char.add(np.char.add(flat, ' '), np.char.add(rooms, ' Rooms')),
+                    np.where(np.isin(quirk, ['flat_in_floor', 'rooms_in_floor']), '', flat))
+    floor = np.where(quirk == 'rooms_in_floor', np.char.add('Middle Floor ', np.char.add(rooms, ' Rooms')),
+                     np.where(quirk == 'flat_in_floor', flat, rng.choice(['High Floor', 'Low Floor', 's'], n_rows)))
+
+    df = pd.DataFrame({
+        'property_name': np.char.add(np.array(ESTATES)[estate], '・Block ' + pd.Series(rng.integers(1, 30, n_rows)).astype(str).to_numpy()),
+        'district': np.array(DISTRICTS)[estate],
+        'bedroom_count': bedroom,
+        'price': rng.integers(3_000_000, 30_000_000, n_rows).astype(str),
+        'unit': unit,
+        'property_age': rng.integers(1, 50, n_rows),
+        'floor': floor,
+        'saleable_area': rng.integers(80, 1500, n_rows),
+        'distance': rng.choice(['5 mins walk·MTR', '', '12 mins walk·MTR'], n_rows),
+        'attribute': np.array(ATTRIBUTES, dtype=object)[rng.integers(0, len(ATTRIBUTES), n_rows)],
+    })
+    return df
+
+
+def legacy_clean(df):
+    """The original iterrows implementation of clean_centanet_data.py, kept as the reference."""
+    df['property_name'] = df['property_name'].str.replace('・', ' ', regex=False)
+    df['distance'] = df['distance'].str.replace('·', '', regex=False)
+    df['attribute'] = df['attribute'].apply(clean_attributes)
+
+    # Older pandas upcast the column implicitly when a string was assigned
+    df['bedroom_count'] = df['bedroom_count'].astype(object)
+    room_pattern = r'\d+\s*Rooms?'
+    for index, row in df.iterrows():
+        if pd.isna(row['bedroom_count']) or str(row['bedroom_count']).strip() == '':
+            if isinstance(row['unit'], str) and re.search(room_pattern, row['unit']):
+                room_count = re.search(r'(\d+)', row['unit']).group(1)
+                df.at[index, 'bedroom_count'] = room_count
+                df.at[index, 'unit'] = re.sub(room_pattern, '', row['unit'], flags=re.IGNORECASE).strip()
+            elif isinstance(row['floor'], str) and re.search(room_pattern, row['floor']):
+                room_count = re.search(r'(\d+)', row['floor']).group(1)
+                df.at[index, 'bedroom_count'] = room_count
+                df.at[index, 'floor'] = re.sub(room_pattern, '', row['floor'], flags=re.IGNORECASE).strip()
+
+    misplaced_flat_condition = (
+        (df['unit'].isnull()) | (df['unit'].str.strip() == '')
+    ) & (
+        df['floor'].str.contains('FLAT', na=False, case=False)
+    )
+    df.loc[misplaced_flat_condition, 'unit'] = df.loc[misplaced_flat_condition, 'floor']
+    df.loc[misplaced_flat_condition, 'floor'] = ''
+    df['unit'] = df['unit'].replace(r'^\s*s\s*$', '', regex=True)
+    df['floor'] = df['floor'].replace(r'^\s*s\s*$', '', regex=True)
+
+    for col in ['price', 'bedroom_count', 'property_age', 'saleable_area']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['distance'] = df['distance'].replace(r'^\s*$', np.nan, regex=True)
+    df.dropna(subset=['price', 'bedroom_count', 'district', 'property_age', 'saleable_area'], inplace=True)
+    return df[df['saleable_area'] > 100].copy()
+
+
+def _to_csv_bytes(df):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+def _parquet_schema(df):
+    """df with the dtypes the streamed Parquet dataset stores: float64 numerics, everything else as strings."""
+    df = df.reset_index(drop=True)
+    return df.astype({col: 'float64' if pd.api.types.is_numeric_dtype(df[col]) else 'string' for col in df.columns})
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows for the vectorized run')
+    parser.add_argument('--legacy-rows', type=int, default=100_000, help='rows for the (slow) reference run')
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--workdir', default='bench_output')
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    raw_path = os.path.join(args.workdir, 'raw_scrape.csv')
+    make_raw_scrape(args.rows).to_csv(raw_path, index=False)
+    print(f"Synthetic scrape: {args.rows} rows -> {raw_path}")
+
+    # Byte-identical check against the original implementation
+    sample = pd.read_csv(raw_path, encoding='utf-8', nrows=args.legacy_rows)
+    expected, legacy_seconds = _timed(legacy_clean, sample.copy())
+    actual, new_seconds = _timed(lambda d: clean_centanet_frame(d, verbose=False), sample.copy())
+    identical = _to_csv_bytes(expected) == _to_csv_bytes(actual)
+    print(f"\n{args.legacy_rows} rows: legacy {legacy_seconds:.2f}s, vectorized {new_seconds:.2f}s "
+          f"({legacy_seconds / new_seconds:.0f}x), byte-identical: {identical}")
+
+    # Full-size runs: in memory and streamed to Parquet must agree byte for byte once read back
+    full, full_seconds = _timed(lambda: clean_centanet_frame(pd.read_csv(raw_path, encoding='utf-8'), verbose=False))
+    chunked_dir = os.path.join(args.workdir, 'cleaned_chunked.parquet')
+    _, chunked_seconds = _timed(clean_centanet_to_parquet, raw_path, chunked_dir, args.chunksize)
+    chunked_identical = _to_csv_bytes(_parquet_schema(read_table(chunked_dir))) == _to_csv_bytes(_parquet_schema(full))
+    print(f"{args.rows} rows: in-memory {full_seconds:.2f}s, chunked {chunked_seconds:.2f}s, "
+          f"chunked byte-identical: {chunked_identical}")
+
+    if not (identical and chunked_identical):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
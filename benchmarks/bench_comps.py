@@ -0,0 +1,99 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comps_engine import CompsIndex
+from synthetic import make_listings, make_property_coords
+
+"""
+Benchmark for comps_engine.py.
+
+Builds a synthetic transaction history (listings shaped like
+centanet_cleaned_proximity_final.csv, placed on clustered HK1980
+coordinates). It checks the batched query against a brute-force scan
+(distance to every sale, filter, sort) on a sample of subjects, then
+measures subjects per second at several batch sizes. A history with fewer
+sales than k must come back padded to k columns.
+
+    python benchmarks/bench_comps.py --transactions 200000 --subjects 20000
+"""
+
+
+def make_transactions(n, seed=0):
+    df = make_listings(n, seed)
+    coords = make_property_coords(n, seed)
+    df['easting'], df['northing'] = coords[:, 0], coords[:, 1]
+    return df
+
+
+def brute_force(index, subject, k, radius, bedroom_tolerance, area_band, age_band):
+    """Positions of the k nearest passing sales for one subject row, by scanning everything."""
+    distance = np.hypot(index.coords[:, 0] - subject['easting'], index.coords[:, 1] - subject['northing'])
+    ok = distance <= radius
+    ok &= ~(np.abs(index.bedrooms - subject['bedroom_count']) > bedroom_tolerance)
+    ok &= ~((index.area < subject['saleable_area'] * (1 - area_band)) |
+            (index.area > subject['saleable_area'] * (1 + area_band)))
+    ok &= ~(np.abs(index.age - subject['property_age']) > age_band)
+    candidates = np.flatnonzero(ok)
+    return candidates[np.argsort(distance[candidates], kind='stable')][:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, default=200_000)
+    parser.add_argument('--subjects', type=int, default=20_000)
+    parser.add_argument('--check', type=int, default=300, help='subjects checked against brute force')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--radius', type=float, default=1000)
+    args = parser.parse_args()
+    filters = {'bedroom_tolerance': 0, 'area_band': 0.2, 'age_band': 10}
+
+    start = time.perf_counter()
+    index = CompsIndex(make_transactions(args.transactions))
+    print(f"Indexed {len(index):,} transactions in {time.perf_counter() - start:.2f}s")
+    subjects = make_transactions(args.subjects, seed=1)
+
+    # Exactness: same comps (by distance) as a full scan, with and without self-exclusion
+    sample = subjects.head(args.check)
+    comps = index.query(sample, k=args.k, radius=args.radius, **filters)
+    mismatches = 0
+    for i, row in enumerate(sample.to_dict('records')):
+        expected = brute_force(index, row, args.k, args.radius, **filters)
+        got = comps.positions[i][comps.positions[i] >= 0]
+        # Equal distances may tie-break differently; compare the distances
+        distance = np.hypot(index.coords[:, 0] - row['easting'], index.coords[:, 1] - row['northing'])
+        mismatches += len(got) != len(expected) or not np.allclose(distance[got], distance[expected])
+    own = index.transactions.head(args.check)
+    self_comps = index.query(own, k=args.k, radius=args.radius, exclude=np.arange(len(own)), **filters)
+    leaked = int((self_comps.positions == np.arange(len(own))[:, None]).sum())
+    print(f"Brute-force check on {len(sample)} subjects: {mismatches} mismatches; self-excluded leaks: {leaked}")
+    # A history smaller than k (e.g. one district) pads with -1 instead of failing
+    small = CompsIndex(index.transactions.head(args.k // 2))
+    padded = small.query(sample, k=args.k, radius=args.radius, **filters).positions
+    bad_padding = int((padded >= 0).sum(axis=1).max() > len(small) or padded.shape[1] != args.k)
+    bad_padding += small.self_features(k=args.k, radius=args.radius, **filters)['comps_count'].max() >= len(small)
+    print(f"History of {len(small)} sales, k={args.k}: {padded.shape[1]} columns, {int((padded >= 0).sum())} comps")
+
+    for batch in [1, 100, 1_000, args.subjects]:
+        start = time.perf_counter()
+        n_done = 0
+        for lo in range(0, min(args.subjects, max(batch * 50, 1_000)), batch):
+            index.query(subjects.iloc[lo:lo + batch], k=args.k, radius=args.radius, **filters)
+            n_done += len(subjects.iloc[lo:lo + batch])
+        seconds = time.perf_counter() - start
+        print(f"  batch {batch:>6,}: {n_done / seconds:>10,.0f} subjects/s")
+
+    features = index.query(subjects, k=args.k, radius=args.radius, **filters).features()
+    print(f"\nSubjects with no comps: {(features['comps_count'] == 0).mean() * 100:.1f}%")
+    print(features.describe().T[['mean', '50%']].round(1))
+
+    if mismatches or leaked or bad_padding:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from district_index import DistrictIndex
+from synthetic import make_district_column, make_district_dictionary
+
+"""
+Benchmark for district_index.py.
+
+Builds a synthetic district column (areas, main districts, 'Area / Alias'
+forms, padding, unknowns and NaN, as make_district_column does) and adds
+the variants the original exact lookup lost: upper case, '・' separators
+and one-letter typos. Checks that every row the original per-row
+clean_district_name mapped gets the same main_district, reports how many of
+the variants are recovered (typos only with accept_fuzzy=True), and times both.
+
+The synthetic 'X Area k' names are all alike, so fuzzy matching is also
+checked on real Hong Kong area names: misspellings should be accepted with
+accept_fuzzy=True, while near-miss names of other places ('Sai Wan' next to
+'Sai Wan Ho', 'Mid-Levels East' next to 'Mid-Levels West') must never get a
+main_district.
+
+    python benchmarks/bench_district_index.py --rows 2000000 --legacy-rows 200000
+"""
+
+
+# --- Original tidy_sale.py mapping (reference) ---
+def legacy_map_main_districts(districts, hong_kong_districts):
+    district_mapping = {area: district for district, areas in hong_kong_districts.items() for area in areas}
+    district_keys = set(hong_kong_districts.keys())
+
+    def clean_district_name(d):
+        if isinstance(d, str):
+            d_clean = d.split('/')[0].strip() if '/' in d else d.strip()
+            if d_clean in district_keys:
+                return d_clean
+            return district_mapping.get(d_clean, None)
+        return None
+
+    return districts.apply(clean_district_name)
+
+
+# A slice of the real dictionary, without some places that have near-namesakes in it
+REAL_DISTRICTS = {
+    'Central and Western': ['Mid-Levels West', 'Sai Ying Pun', 'Kennedy Town', 'Sheung Wan', 'The Peak'],
+    'Eastern': ['Sai Wan Ho', 'Shau Kei Wan', 'Tai Koo', 'Quarry Bay', 'North Point', 'Chai Wan'],
+    'Wan Chai': ['Happy Valley', 'Causeway Bay', 'Tai Hang'],
+    'Southern': ['Aberdeen', 'Ap Lei Chau', 'Pok Fu Lam', 'Repulse Bay'],
+    'Kowloon City': ['Ho Man Tin', 'Kowloon Tong', 'Hung Hom', 'To Kwa Wan'],
+    'Sha Tin': ['Tai Wai', 'Fo Tan', 'Ma On Shan', 'City One'],
+    'Tai Po': ['Tai Po Market', 'Tai Po Kau'],
+    'Sai Kung': ['Tseung Kwan O', 'Clear Water Bay', 'Hang Hau'],
+    'Tsuen Wan': ['Tsuen Wan West', 'Belvedere Garden'],
+    'Tuen Mun': ['Tuen Mun Town Centre', 'So Kwun Wat'],
+}
+# (raw name, main district) misspellings that should be recovered
+REAL_TYPOS = [('Shau Kei Wann', 'Eastern'), ('Quary Bay', 'Eastern'), ('Tseung Kwan 0', 'Sai Kung'),
+              ('Kenedy Town', 'Central and Western'), ('Happy Valey', 'Wan Chai'), ('Causway Bay', 'Wan Chai'),
+              ('Ap Lei Chua', 'Southern'), ('Kowlon Tong', 'Kowloon City'), ('Ma On Shun', 'Sha Tin')]
+# Other places whose names are close to an alias of a different (or the wrong) district
+REAL_NEAR_MISSES = ['Sai Wan', 'Mid-Levels East', 'Mid-Levels Central', 'Tsuen Wan East', 'North Point East',
+                    'Tai Po Centre', 'Tai Hang Tung', 'Kowloon Bay', 'Hung Hom Bay', 'Tai Koo Shing', 'Wan Chai North']
+
+
+def make_variants(districts, seed=0):
+    """(variant column, true main district) for upper-cased, '・'-separated and misspelt names."""
+    rng = np.random.default_rng(seed)
+    names, truth = [], []
+    for district, areas in districts.items():
+        for area in areas:
+            drop = rng.integers(1, len(area) - 1)
+            names += [area.upper(), area.replace(' ', '・', 1), area[:drop] + area[drop + 1:]]
+            truth += [district] * 3
+    return pd.Series(names, dtype=object), pd.Series(truth, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--legacy-rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    districts = make_district_dictionary()['districts']
+    column = make_district_column(args.rows)
+
+    start = time.perf_counter()
+    index = DistrictIndex(districts)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = index.map_column(column)
+    new_seconds = time.perf_counter() - start
+    print(f"Index: {len(index):,} aliases built in {build * 1000:.1f} ms")
+
+    sample = column.head(args.legacy_rows)
+    start = time.perf_counter()
+    expected = legacy_map_main_districts(sample, districts)
+    legacy_seconds = time.perf_counter() - start
+    legacy_matched = expected.notnull()
+    disagree = int((matches['main_district'].head(args.legacy_rows)[legacy_matched] != expected[legacy_matched]).sum())
+    print(f"Agreement with the original mapping on {int(legacy_matched.sum()):,} matched rows: "
+          f"{disagree} disagreements")
+    print(f"Rows the original left unmatched: {int((~legacy_matched).sum()):,}; "
+          f"of which now matched: {int(matches['main_district'].head(args.legacy_rows)[~legacy_matched].notnull().sum()):,}")
+
+    variants, truth = make_variants(districts)
+    print(f"Variants: {int(legacy_map_main_districts(variants, districts).notnull().sum())}/{len(variants)} "
+          f"matched by the original")
+    wrong = 0
+    for accept_fuzzy in [False, True]:
+        variant_matches = DistrictIndex(districts, accept_fuzzy=accept_fuzzy).map_column(variants)
+        recovered = variant_matches['main_district'] == truth
+        candidates = variant_matches['candidate_district'] == truth
+        wrong += int((variant_matches['main_district'].notnull() & ~recovered).sum())
+        print(f"  accept_fuzzy={accept_fuzzy}: {int(recovered.sum())}/{len(variants)} recovered, "
+              f"{int(candidates.sum())}/{len(variants)} with the right candidate")
+
+    names = pd.Series([name for name, _ in REAL_TYPOS] + REAL_NEAR_MISSES, dtype=object)
+    for accept_fuzzy in [False, True]:
+        real = DistrictIndex(REAL_DISTRICTS, accept_fuzzy=accept_fuzzy).map_column(names)
+        typos, near = real.iloc[:len(REAL_TYPOS)], real.iloc[len(REAL_TYPOS):]
+        fixed = int((typos['main_district'] == pd.Series([d for _, d in REAL_TYPOS], index=typos.index)).sum())
+        wrong += int(near['main_district'].notnull().sum())
+        print(f"Real names, accept_fuzzy={accept_fuzzy}: {fixed}/{len(REAL_TYPOS)} misspellings recovered, "
+              f"{int(near['main_district'].notnull().sum())}/{len(REAL_NEAR_MISSES)} near-miss places "
+              f"given a main_district")
+        if accept_fuzzy:
+            print(pd.concat([names.rename('district'), real], axis=1).to_string(index=False))
+
+    legacy_rate = len(sample) / legacy_seconds
+    new_rate = len(column) / new_seconds
+    print(f"\noriginal .apply: {legacy_rate:>12,.0f} rows/s")
+    print(f"DistrictIndex:   {new_rate:>12,.0f} rows/s  ({new_rate / legacy_rate:.1f}x)")
+
+    if disagree or wrong:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
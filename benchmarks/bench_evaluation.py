@@ -0,0 +1,127 @@
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, mean_squared_error, r2_score
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evaluation import METRIC_COLUMNS, cross_validate, kfold_folds, make_folds, make_model, regression_metrics
+from feature_store import FeatureStore
+from synthetic import make_listings
+from tuning import model_features
+
+"""
+Benchmark for evaluation.py.
+
+1. Metrics: many prediction columns (noisy copies of a synthetic price) are
+   scored one at a time with the notebooks' evaluate_model() body
+   (scikit-learn metrics plus NumPy median and accuracy bands) and in one
+   regression_metrics() call; values are compared and both timed.
+2. Cross-validation: the base model families are scored on K-fold splits of
+   synthetic listings with a serial loop (fit, predict, evaluate per fold, as
+   the notebooks would) and with cross_validate() across worker processes;
+   per-fold metrics are compared and both timed. Expect the parallel speedup
+   to track the number of cores.
+
+    python benchmarks/bench_evaluation.py --rows 20000 --columns 12 --families lgbm xgb rf --workers 4
+"""
+
+
+# --- Original notebook code (reference) ---
+def legacy_evaluate(y_test, y_pred):
+    r2 = r2_score(y_test, y_pred)
+    rmse = math.sqrt(mean_squared_error(y_test, y_pred))
+    mae = mean_absolute_error(y_test, y_pred)
+    mape = mean_absolute_percentage_error(y_test, y_pred) * 100
+    error_pct = np.abs((y_test - y_pred) / y_test)
+    mdape = np.median(error_pct) * 100
+    acc_10 = np.mean(error_pct <= 0.1) * 100
+    acc_20 = np.mean(error_pct <= 0.2) * 100
+    acc_30 = np.mean(error_pct <= 0.3) * 100
+    return [r2, rmse, mae, mape, mdape, acc_10, acc_20, acc_30]
+
+
+def legacy_cross_validate(features, families, folds):
+    X = features.frame('category')
+    X_codes = features.frame('codes')
+    y = np.asarray(features.target)
+    rows = []
+    for family in families:
+        for fold in np.unique(folds):
+            train, test = folds != fold, folds == fold
+            data = X_codes if family in ('rf', 'svr') else X
+            categorical = ['district'] if data is X else []
+            model = make_model(family, categorical=categorical).fit(data[train], y[train])
+            rows.append([family, fold] + legacy_evaluate(y[test], model.predict(data[test])))
+    return pd.DataFrame(rows, columns=['config', 'fold'] + METRIC_COLUMNS)
+
+
+def relative_difference(a, b):
+    return np.max(np.abs(np.asarray(a) - np.asarray(b)) / np.maximum(np.abs(np.asarray(a)), 1e-12))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000, help='listings for the cross-validation part')
+    parser.add_argument('--metric-rows', type=int, default=500_000)
+    parser.add_argument('--columns', type=int, default=12, help='prediction columns for the metrics part')
+    parser.add_argument('--families', nargs='+', default=['lgbm', 'xgb', 'rf'])
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    # 1. Metrics
+    rng = np.random.default_rng(0)
+    y = make_listings(args.metric_rows)['price'].to_numpy(dtype=np.float64)
+    predictions = y[:, None] * rng.normal(1.0, np.linspace(0.05, 0.4, args.columns), (len(y), args.columns))
+
+    start = time.perf_counter()
+    expected = np.array([legacy_evaluate(y, predictions[:, j]) for j in range(args.columns)])
+    legacy_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    metrics = regression_metrics(y, predictions)
+    new_seconds = time.perf_counter() - start
+    metric_diff = relative_difference(expected, metrics[METRIC_COLUMNS].to_numpy())
+    print(f"{args.columns} prediction columns x {len(y):,} rows: max relative difference {metric_diff:.1e}")
+    print(f"  evaluate_model per column: {legacy_seconds:8.2f}s")
+    print(f"  regression_metrics:        {new_seconds:8.2f}s  ({legacy_seconds / new_seconds:.1f}x)")
+
+    # 2. Cross-validation
+    table = model_features(make_listings(args.rows))
+    store = FeatureStore(os.path.join(tempfile.gettempdir(), 'avm_bench_feature_store'))
+    features = store.get(table, {'columns': [col for col in table.columns if col != 'price'],
+                                 'categorical': ['district'], 'target': 'price'})
+    folds = kfold_folds(features.n_rows, args.folds)
+
+    start = time.perf_counter()
+    expected_folds = legacy_cross_validate(features, args.families, folds)
+    legacy_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    configs = {family: {'model': family} for family in args.families}
+    _, fold_metrics, _ = cross_validate(features, configs, folds, workers=args.workers, verbose=False)
+    new_seconds = time.perf_counter() - start
+    merged = expected_folds.merge(fold_metrics, on=['config', 'fold'], suffixes=('_legacy', ''))
+    cv_diff = max(relative_difference(merged[f'{col}_legacy'], merged[col]) for col in METRIC_COLUMNS)
+    print(f"\n{len(args.families)} families x {args.folds} folds over {features.n_rows:,} listings: "
+          f"{len(merged)}/{len(expected_folds)} (config, fold) rows matched, max relative difference {cv_diff:.1e}")
+    print(f"  serial fit / evaluate loop: {legacy_seconds:8.2f}s")
+    print(f"  cross_validate:             {new_seconds:8.2f}s  ({legacy_seconds / new_seconds:.1f}x, "
+          f"{args.workers or os.cpu_count()} workers on {os.cpu_count()} cores)")
+
+    district = cross_validate(features, configs, make_folds(features, 'district', args.folds),
+                              workers=args.workers, verbose=False)[0]
+    kfold = fold_metrics.groupby('config', sort=False)[['r2', 'mdape']].mean()
+    print("\nK-fold vs district-blocked (mean over folds):")
+    print(kfold.join(district.set_index('config')[['r2', 'mdape']], rsuffix='_district').to_string())
+
+    if len(merged) != len(expected_folds) or metric_diff > 1e-9 or cv_diff > 1e-6:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feature_diagnostics import (
+    StreamingCovariance, accumulate, high_correlation_pairs, prepare_numeric, variance_inflation_factors
+)
+from synthetic import make_listings
+
+"""
+Benchmark for feature_diagnostics.py.
+
+Widens synthetic listings the way the VIF notebook would grow: POI counts at
+several radii (strongly correlated with each other) and one-hot districts,
+for a few hundred predictors. Checks the one-pass VIFs against the
+notebook's per-feature loop (statsmodels' variance_inflation_factor, or the
+same through-the-origin OLS with NumPy when statsmodels is not installed)
+and the high-correlation pairs against the notebook's corr().where().stack()
+search, then times both.
+
+    python benchmarks/bench_feature_diagnostics.py --rows 20000 --radii 6 --districts 120
+"""
+
+
+def make_wide(n_rows, radii, districts, seed=0):
+    rng = np.random.default_rng(seed)
+    df = prepare_numeric(make_listings(n_rows, seed)).drop(columns=['latitude', 'longitude'])
+    extra = {}
+    for col in [c for c in df.columns if c.startswith('category_')]:
+        base = df[col].to_numpy(dtype=np.float64)
+        for k in range(1, radii):
+            # A wider radius keeps the inner count and adds more
+            extra[f'{col}_r{k}'] = base * (1 + k) + rng.poisson(2 + k, n_rows)
+    codes = rng.integers(0, districts, n_rows)
+    for d in range(1, districts):
+        extra[f'district_{d}'] = (codes == d).astype(float)
+    df = pd.concat([df, pd.DataFrame(extra, index=df.index)], axis=1)
+    return df
+
+
+# --- Original notebook code (reference) ---
+def legacy_vif(X):
+    try:
+        from statsmodels.stats.outliers_influence import variance_inflation_factor
+    except ImportError:
+        def variance_inflation_factor(exog, i):
+            # OLS of column i on the others without a constant, uncentred R^2, as statsmodels
+            others = np.delete(exog, i, axis=1)
+            residual = exog[:, i] - others @ np.linalg.lstsq(others, exog[:, i], rcond=None)[0]
+            return (exog[:, i] @ exog[:, i]) / (residual @ residual)
+    vif = pd.DataFrame()
+    vif["feature"] = X.columns
+    vif["VIF"] = [variance_inflation_factor(X.values, i) for i in range(X.shape[1])]
+    return vif
+
+
+def legacy_pairs(df_num, threshold):
+    corr = df_num.corr()
+    mask = np.triu(np.ones_like(corr, dtype=bool), k=1)
+    pairs = corr.where(mask).stack().reset_index().rename(columns={"level_0": "var1", "level_1": "var2", 0: "corr"})
+    return pairs.loc[pairs["corr"].abs() >= threshold].sort_values("corr", key=lambda s: s.abs(), ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--radii', type=int, default=6)
+    parser.add_argument('--districts', type=int, default=120)
+    parser.add_argument('--chunksize', type=int, default=5_000)
+    parser.add_argument('--threshold', type=float, default=0.8)
+    args = parser.parse_args()
+
+    df_num = make_wide(args.rows, args.radii, args.districts)
+    X = df_num.drop(columns=['price'])
+    print(f"{len(df_num):,} rows x {X.shape[1]} predictors")
+
+    start = time.perf_counter()
+    expected_vif = legacy_vif(X)
+    expected_pairs = legacy_pairs(df_num, args.threshold)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = (df_num.iloc[lo:lo + args.chunksize] for lo in range(0, len(df_num), args.chunksize))
+    stats = accumulate(chunks)
+    vif = variance_inflation_factors(stats, exclude=['price'])
+    pairs = high_correlation_pairs(stats.correlation(), args.threshold)
+    new_seconds = time.perf_counter() - start
+
+    rel = np.abs(vif['VIF'].to_numpy() / expected_vif['VIF'].to_numpy() - 1)
+    same_pairs = (len(pairs) == len(expected_pairs) and
+                  set(zip(pairs['var1'], pairs['var2'])) == set(zip(expected_pairs['var1'], expected_pairs['var2'])) and
+                  np.allclose(np.sort(pairs['corr'].to_numpy()), np.sort(expected_pairs['corr'].to_numpy())))
+    one_shot = StreamingCovariance(list(df_num.columns)).update(df_num)
+    chunk_drift = np.abs(one_shot.correlation().to_numpy() - stats.correlation().to_numpy()).max()
+    print(f"VIF max relative difference: {rel.max():.2e}  (VIF range {vif['VIF'].min():.1f}-{vif['VIF'].max():.1f})")
+    print(f"High-correlation pairs: {len(pairs)} (same as notebook: {same_pairs})")
+    print(f"Chunked vs single-pass correlation max difference: {chunk_drift:.2e}")
+    print(f"\nnotebook loop:        {legacy_seconds:8.2f}s")
+    print(f"feature_diagnostics:  {new_seconds:8.2f}s  ({legacy_seconds / new_seconds:.0f}x)")
+
+    if rel.max() > 1e-6 or not same_pairs:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from market_inequality import InequalityAnalysis
+from synthetic import make_listings
+
+"""
+Benchmark for market_inequality.py.
+
+Synthetic listings (144 districts rolled up into 18 main districts, with a
+transaction date and some missing walking times) are analysed the
+insight.ipynb way, one groupby and one gini() per grouping x metric with
+pandas quantiles, and with InequalityAnalysis. The tables are compared, then
+the rolling-window computation is timed.
+
+    python benchmarks/bench_market_inequality.py --rows 1000000
+"""
+
+METRICS = ['price', 'walking_time_to_mtr', 'travel_time_to_cbd', 'Price/saleable_area']
+GROUPINGS = ['district', '18_district']
+
+
+def make_sales(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = make_listings(n, seed)
+    df['18_district'] = df['district'].str.rsplit(' Area ', n=1).str[0]
+    df['Price/saleable_area'] = df['price'] / df['saleable_area']
+    df['walking_time_to_mtr'] = df['walking_time_to_mtr'].astype(float)
+    df.loc[rng.random(n) < 0.03, 'walking_time_to_mtr'] = np.nan
+    df['transaction_date'] = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, n), unit='D')
+    return df
+
+
+# --- Original notebook code (reference) ---
+def gini(array):
+    array = np.sort(array)
+    n = array.size
+    cumvals = np.cumsum(array)
+    gini_coeff = (n + 1 - 2 * np.sum(cumvals) / cumvals[-1]) / n
+    return gini_coeff
+
+
+def legacy_within(df):
+    frames = []
+    for g in GROUPINGS:
+        for m in METRICS:
+            grouped = df.dropna(subset=[m]).groupby(g)[m]
+            frame = pd.DataFrame({
+                'count': grouped.count(), 'mean': grouped.mean(), 'std': grouped.std(),
+                'p10': grouped.quantile(0.1), 'median': grouped.median(), 'p90': grouped.quantile(0.9),
+                'gini': grouped.apply(lambda s: gini(s.values)),
+            })
+            frames.append(frame.reset_index(names='group').assign(grouping=g, metric=m))
+    return pd.concat(frames, ignore_index=True)
+
+
+def legacy_between(df):
+    return {(g, m): gini(df.groupby(g)[m].mean().sort_values().values) for g in GROUPINGS for m in METRICS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+    df = make_sales(args.rows)
+
+    start = time.perf_counter()
+    expected = legacy_within(df)
+    expected_between = legacy_between(df)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analysis = InequalityAnalysis(df, METRICS, GROUPINGS)
+    within = analysis.within_groups()
+    between = analysis.between_groups(within)
+    new_seconds = time.perf_counter() - start
+
+    merged = expected.merge(within, on=['grouping', 'group', 'metric'], suffixes=('_legacy', ''))
+    worst = max(np.nanmax(np.abs(merged[f'{col}_legacy'] - merged[col]) / np.abs(merged[f'{col}_legacy']).clip(1e-12))
+                for col in ['count', 'mean', 'std', 'p10', 'median', 'p90', 'gini'])
+    between_diff = max(abs(row.gini_of_means - expected_between[(row.grouping, row.metric)])
+                       for row in between.itertuples())
+    print(f"{len(merged):,}/{len(expected):,} (grouping, group, metric) rows matched; "
+          f"max relative difference {worst:.1e}; between-group Gini max difference {between_diff:.1e}")
+    print(f"\nnotebook groupby per metric x grouping: {legacy_seconds:8.2f}s")
+    print(f"InequalityAnalysis:                     {new_seconds:8.2f}s  ({legacy_seconds / new_seconds:.1f}x)")
+
+    start = time.perf_counter()
+    rolling = analysis.rolling('transaction_date', window='365D', step='QS')
+    print(f"Rolling 365-day windows, quarterly: {rolling['window_end'].nunique()} windows, "
+          f"{len(rolling):,} rows in {time.perf_counter() - start:.2f}s")
+    print(between.to_string(index=False))
+
+    if len(merged) != len(expected) or worst > 1e-9 or between_diff > 1e-12:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
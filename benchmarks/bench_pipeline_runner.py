@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_clean_centanet import make_raw_scrape
+from pipeline_runner import LISTING_KEY_COLS, IncrementalPipeline, default_stages, fingerprint_rows
+
+"""
+Benchmark and consistency check for pipeline_runner.py.
+
+Runs the clean stage over a synthetic raw scrape in which --shared-fraction
+of the listings copy another listing's key columns (same estate, floor band,
+flat letter, area and price; the rest of the row differs), then again after
+editing a share of the rows: half of the edits only change the attribute
+text, the other half blank the bedroom count of listings whose unit and floor
+carry no room count, so the cleaning filters drop them. Checks that
+
+    - every row a run writes comes back from read_final(), even when several
+      rows of the run share a listing key
+    - no listing key shows rows from two runs (newer versions supersede)
+    - no dropped listing shows its old version (tombstones)
+    - the second run only processes the edited rows
+
+and times the full first run against the incremental second one.
+
+    python benchmarks/bench_pipeline_runner.py --rows 200000 --edit-fraction 0.05
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--shared-fraction', type=float, default=0.1)
+    parser.add_argument('--edit-fraction', type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = os.path.join(tmp, 'raw.csv')
+        raw = make_raw_scrape(args.rows)
+        rng = np.random.default_rng(1)
+        copies = rng.choice(len(raw), int(len(raw) * args.shared_fraction), replace=False)
+        raw.loc[copies, LISTING_KEY_COLS] = raw.loc[rng.choice(len(raw), len(copies)), LISTING_KEY_COLS].to_numpy()
+        raw.to_csv(raw_path, index=False)
+        pipeline = IncrementalPipeline(default_stages(names=['clean']), state_dir=os.path.join(tmp, 'state'))
+
+        start = time.perf_counter()
+        first = pipeline.run(raw_path)
+        first_seconds = time.perf_counter() - start
+        final = pipeline.read_final()
+        shared = int(final['_listing_key'].duplicated(keep=False).sum())
+        print(f"Run 1: {first['output_rows']:,} rows written, {len(final):,} read back "
+              f"({shared:,} share a listing key with another row)")
+        failures = len(final) != first['output_rows']
+
+        n_edits = int(len(raw) * args.edit_fraction) // 2
+        retitled = rng.choice(len(raw), n_edits, replace=False)
+        no_rooms = ~(raw['unit'].str.contains('Room') | raw['floor'].str.contains('Room'))
+        candidates = np.setdiff1d(np.flatnonzero(no_rooms & (raw['bedroom_count'] != '')), retitled)
+        blanked = rng.choice(candidates, min(n_edits, len(candidates)), replace=False)
+        # Keys as the runner computes them: from the raw text
+        blanked_keys = fingerprint_rows(pd.read_csv(raw_path, dtype=str).iloc[blanked], LISTING_KEY_COLS)
+        raw.loc[retitled, 'attribute'] = 'Renovated'
+        raw.loc[blanked, 'bedroom_count'] = ''
+        raw.to_csv(raw_path, index=False)
+
+        start = time.perf_counter()
+        second = pipeline.run(raw_path)
+        second_seconds = time.perf_counter() - start
+        final = pipeline.read_final()
+        from_second = int((final['_run_id'] == second['run_id']).sum())
+        mixed = int((final.groupby('_listing_key')['_run_id'].nunique() > 1).sum())
+        stale = int((final['_listing_key'].isin(blanked_keys) & (final['_run_id'] == first['run_id'])).sum())
+        print(f"Run 2: {second['delta_rows']:,} of {second['raw_rows']:,} rows reprocessed, "
+              f"{second['output_rows']:,} written, {from_second:,} read back; "
+              f"{second['dropped_listings']:,} listings withdrawn; keys with rows from two runs: {mixed}; "
+              f"dropped listings still showing: {stale}")
+        failures += (from_second != second['output_rows'] or mixed or stale or
+                     second['delta_rows'] > len(retitled) + len(blanked))
+
+    print(f"  full run:        {first_seconds:8.2f}s")
+    print(f"  incremental run: {second_seconds:8.2f}s  ({first_seconds / second_seconds:.1f}x)")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
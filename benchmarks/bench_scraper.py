@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import functools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from centanet_scraper import DuplicatePageError, scrape_pages
+
+"""
+Benchmark for centanet_scraper.py against locally served HTML fixtures.
+
+Writes result pages that use the same markup as the Centanet listing page,
+serves them from a local HTTP server and scrapes them with 1 and N browser
+contexts. A template that serves page 1 for every index must be rejected. No
+network access is needed.
+
+    python benchmarks/bench_scraper.py --pages 40 --workers 4
+"""
+
+CARD = """
+<a class="property-text" href="/findproperty/en/detail/{page}-{n}">
+  <div class="title"><span class="title-lg">TAIKOO SHING Block {n}</span>
+  <span class="title-sm">High Floor・FLAT {flat}・{rooms} Rooms</span></div>
+  <div class="area"><span class="adress tag-adress">Quarry Bay</span></div>
+  <span class="price-info">{price}M</span>
+  <div class="floor-info">{age} years · 78% Efficiency(%)</div>
+  <div class="area-block usable-area"><div class="num"><span class="hidden-xs-only">{area} ft²</span></div></div>
+  <div class="area-block construction-area"><div class="num"><span class="hidden-xs-only">{gross} ft²</span></div></div>
+  <div class="tag hidden-sm-and-down"><span>Sea View</span><span>Near MTR</span></div>
+  <span>South East</span>
+</a>
+"""
+
+
+def write_fixtures(directory, n_pages, cards_per_page=24):
+    for page in range(1, n_pages + 1):
+        cards = "".join(
+            CARD.format(page=page, n=i, flat="ABCDEFGH"[i % 8], rooms=1 + i % 4, price=5 + i % 20,
+                        age=1 + (page + i) % 50, area=300 + 10 * i, gross=400 + 10 * i)
+            for i in range(cards_per_page)
+        )
+        with open(os.path.join(directory, f"page-{page}.html"), "w", encoding="utf-8") as f:
+            f.write(f"<html><body><div class='list'>{cards}</div></body></html>")
+
+
+def serve(directory):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="scraper_bench_")
+    try:
+        write_fixtures(workdir, args.pages)
+        server = serve(workdir)
+        template = f"http://127.0.0.1:{server.server_address[1]}/page-{{page}}.html"
+
+        for workers in sorted({1, args.workers}):
+            output = os.path.join(workdir, f"out_{workers}.csv")
+            start = time.perf_counter()
+            rows = asyncio.run(scrape_pages(args.pages, workers, output, template))
+            seconds = time.perf_counter() - start
+            print(f"workers={workers}: {rows} rows from {args.pages} pages in {seconds:.1f}s "
+                  f"({args.pages / seconds:.1f} pages/s)")
+
+            # A second run must find nothing left to do
+            assert asyncio.run(scrape_pages(args.pages, workers, output, template)) == 0
+
+        # A site that ignores the page index must stop the run, not mark pages complete
+        output = os.path.join(workdir, "out_ignored.csv")
+        try:
+            asyncio.run(scrape_pages(args.pages, args.workers, output, template.replace("{page}", "1") + "?p={page}"))
+            raise AssertionError("identical pages were not detected")
+        except DuplicatePageError as e:
+            print(f"ignored page index rejected: {e}")
+        assert not os.path.exists(output + ".pages.jsonl")
+        server.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
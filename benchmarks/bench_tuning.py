@@ -0,0 +1,72 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import optuna
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feature_store import FeatureStore
+from synthetic import make_listings
+from tuning import DISTRICT_ENCODING, OBJECTIVES, load_splits, make_pruner
+
+"""
+Benchmark and pruning check for tuning.py.
+
+Writes synthetic listings to a temporary CSV, then runs one family's study
+twice in memory: once with the median pruner and once without. The first
+--startup trials are enqueued with a strong configuration and the rest with a
+weak one, so the pruned run must stop every weak trial at an intermediate
+report; the script fails if none is pruned. Both runs are timed.
+
+    python benchmarks/bench_tuning.py --family svr --rows 5000 --trials 10
+"""
+
+# (strong, weak) fixed parameters per family, as Optuna would suggest them
+ENQUEUED = {
+    'svr': ({'C': 1000.0, 'epsilon': 0.1, 'gamma': 'scale', 'kernel': 'linear'},
+            {'C': 0.1, 'epsilon': 0.1, 'gamma': 'scale', 'kernel': 'rbf'}),
+}
+
+
+def run_study(family, data, pruner, n_startup, n_trials):
+    strong, weak = ENQUEUED[family]
+    study = optuna.create_study(direction='minimize', pruner=make_pruner(pruner))
+    for i in range(n_trials):
+        study.enqueue_trial(strong if i < n_startup else weak)
+    start = time.perf_counter()
+    study.optimize(lambda trial: OBJECTIVES[family](trial, data, 1), n_trials=n_trials)
+    return study, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--family', default='svr', choices=sorted(ENQUEUED))
+    parser.add_argument('--rows', type=int, default=5_000)
+    parser.add_argument('--trials', type=int, default=10)
+    parser.add_argument('--startup', type=int, default=5, help="the median pruner's n_startup_trials")
+    args = parser.parse_args()
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'listings.csv')
+        make_listings(args.rows).to_csv(path, index=False)
+        data = load_splits(path, DISTRICT_ENCODING.get(args.family, 'category'),
+                           store=FeatureStore(os.path.join(tmp, 'feature_store')))
+
+    pruned_study, pruned_seconds = run_study(args.family, data, 'median', args.startup, args.trials)
+    _, full_seconds = run_study(args.family, data, 'none', args.startup, args.trials)
+    weak = pruned_study.trials[args.startup:]
+    n_pruned = sum(t.state == optuna.trial.TrialState.PRUNED for t in weak)
+    steps = sorted({step for t in weak for step in t.intermediate_values})
+    print(f"{args.family}: {n_pruned}/{len(weak)} weak trials pruned (reported steps {steps})")
+    print(f"  median pruner: {pruned_seconds:8.2f}s")
+    print(f"  no pruner:     {full_seconds:8.2f}s  ({full_seconds / pruned_seconds:.1f}x)")
+
+    if n_pruned == 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
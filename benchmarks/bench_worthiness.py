@@ -0,0 +1,180 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from worthiness import (
+    UNIFIED_THRESHOLDS, WorthinessScorer, calculate_all_multipliers, generate_age_assessment
+)
+
+"""
+Benchmark for the age-group worthiness scoring.
+
+Generates synthetic listings shaped like combined_df in model_v2.ipynb (with
+missing prices, walking times and POI counts, unknown districts and 5+
+bedrooms mixed in). Checks that the columnar scorer writes a byte-identical
+assessment CSV and multiplier table to the original row-by-row code, and
+times both.
+
+    python benchmarks/bench_worthiness.py --rows 200000 --legacy-rows 20000
+"""
+
+DISTRICTS = list(WorthinessScorer().district_scores['age_2']) + ['Unknown District', None]
+
+
+def make_combined(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    ensemble = rng.uniform(2e6, 2e7, n_rows)
+    ensemble[rng.random(n_rows) < 0.01] = np.nan
+    walking = rng.uniform(0, 30, n_rows)
+    walking[rng.random(n_rows) < 0.05] = np.nan
+    markets = rng.integers(0, 9, n_rows).astype(float)
+    markets[rng.random(n_rows) < 0.02] = np.nan
+    return pd.DataFrame({
+        'district': np.array(DISTRICTS, dtype=object)[rng.integers(0, len(DISTRICTS), n_rows)],
+        'bedroom_count': rng.integers(0, 7, n_rows),
+        'saleable_area': rng.integers(150, 2500, n_rows),
+        'walking_time_to_mtr': walking,
+        'category_Public_Market_within_1000m': markets,
+        'category_Education_within_2000m': rng.integers(0, 150, n_rows),
+        'category_Medical_within_2000m': rng.integers(0, 40, n_rows),
+        'actual_price': rng.uniform(2e6, 2e7, n_rows).round(-3),
+        'ensemble_predicted': ensemble,
+    })
+
+
+# --- Original row-by-row implementation (model_v2.ipynb), kept as the reference ---
+
+def legacy_multiplier(scorer, row, age_group):
+    if 'ensemble_predicted' not in row.index or pd.isna(row['ensemble_predicted']):
+        raise ValueError("ensemble_predicted column missing or null")
+
+    bedrooms = scorer.bedroom_scores[age_group]
+    count = row['bedroom_count']
+    key = 'range_1_2' if count <= 2 else 'range_3' if count == 3 else 'range_4' if count == 4 else 'range_5_plus'
+    bedroom_mult = bedrooms[key] / np.mean(list(bedrooms.values()))
+
+    area_ratio = row['saleable_area'] / scorer.benchmarks['saleable_area']['median']
+    area_mult = max(0.5, min(1.5, 0.8 + (area_ratio * 0.4)))
+
+    poi = scorer.poi_scores[age_group]
+    poi_score = (
+        poi['MUF'] * min(row.get('category_Public_Market_within_1000m', 0) / 5, 1.0) +
+        poi['SCH'] * min(row.get('category_Education_within_2000m', 0) / 10, 1.0) +
+        poi['HNC'] * min(row.get('category_Medical_within_2000m', 0) / 5, 1.0)
+    )
+    max_possible_score = max(poi['MUF'], poi['SCH'], poi['HNC'])
+    poi_mult = 0.7 + ((poi_score / max_possible_score if max_possible_score > 0 else 0) * 0.6)
+
+    location_mult = 0.8 + (scorer.district_scores[age_group].get(row['district'], 0.0) * 0.4)
+
+    walking_time = int(row['walking_time_to_mtr']) if not pd.isna(row['walking_time_to_mtr']) else 20
+    walking_score = 0.0 if walking_time >= 20 else scorer.walking_time_scores[age_group].get(walking_time, 0.0)
+    walking_mult = 0.8 + (walking_score * 0.4)
+
+    w = scorer.component_weights
+    combined = (
+        w['bedroom'] * bedroom_mult +
+        w['area'] * area_mult +
+        w['poi'] * poi_mult +
+        w['location'] * location_mult +
+        w['walking_to_mtr'] * walking_mult
+    )
+    return combined, row['ensemble_predicted'] * combined
+
+
+def legacy_score(multiplier, thresholds):
+    if multiplier <= thresholds[0]:
+        return 1
+    if multiplier >= thresholds[100]:
+        return 100
+    points = sorted(thresholds.keys())
+    for lower, upper in zip(points, points[1:]):
+        if thresholds[lower] <= multiplier < thresholds[upper]:
+            ratio = (multiplier - thresholds[lower]) / (thresholds[upper] - thresholds[lower])
+            return max(1, min(100, int(round(lower + ratio * (upper - lower)))))
+    return 100
+
+
+def legacy_multipliers(df, scorer):
+    results = []
+    for idx, row in df.iterrows():
+        try:
+            m2, p2 = legacy_multiplier(scorer, row, 'age_2')
+            m4, p4 = legacy_multiplier(scorer, row, 'age_4')
+        except Exception:
+            continue
+        base = row['ensemble_predicted']
+        results.append({
+            'index': idx,
+            'age_2_multiplier': m2, 'age_2_worthiness_price': p2, 'age_2_premium_pct': ((p2 / base) - 1) * 100,
+            'age_4_multiplier': m4, 'age_4_worthiness_price': p4, 'age_4_premium_pct': ((p4 / base) - 1) * 100,
+            'better_for': 'age_2' if p2 > p4 else 'age_4',
+            'worthiness_gap': abs(p2 - p4),
+        })
+    return pd.DataFrame(results)
+
+
+def legacy_assessment(df, scorer, thresholds):
+    results = []
+    for _, row in df.iterrows():
+        try:
+            m2, p2 = legacy_multiplier(scorer, row, 'age_2')
+            m4, p4 = legacy_multiplier(scorer, row, 'age_4')
+        except Exception:
+            continue
+        result = row.to_dict()
+        result.update({
+            'age_2_worthiness_price': p2, 'age_2_worthiness_score': legacy_score(m2, thresholds),
+            'age_2_worthiness_multiplier': m2,
+            'age_4_worthiness_price': p4, 'age_4_worthiness_score': legacy_score(m4, thresholds),
+            'age_4_worthiness_multiplier': m4,
+            'better_for': 'age_2' if p2 > p4 else 'age_4' if p4 > p2 else 'equal',
+        })
+        results.append(result)
+    return pd.DataFrame(results)
+
+
+def _to_csv_bytes(df):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000, help='rows for the columnar run')
+    parser.add_argument('--legacy-rows', type=int, default=20_000, help='rows for the (slow) reference run')
+    args = parser.parse_args()
+    scorer = WorthinessScorer()
+
+    sample = make_combined(args.legacy_rows)
+    expected, legacy_seconds = _timed(
+        lambda: (legacy_multipliers(sample, scorer), legacy_assessment(sample, scorer, UNIFIED_THRESHOLDS)))
+    actual, new_seconds = _timed(
+        lambda: (calculate_all_multipliers(sample, scorer), generate_age_assessment(sample, scorer)))
+    identical = all(_to_csv_bytes(e) == _to_csv_bytes(a) for e, a in zip(expected, actual))
+    print(f"\n{args.legacy_rows} rows: legacy {legacy_seconds:.2f}s, columnar {new_seconds:.3f}s "
+          f"({legacy_seconds / new_seconds:.0f}x), byte-identical: {identical}")
+
+    full = make_combined(args.rows, seed=1)
+    _, full_seconds = _timed(lambda: generate_age_assessment(full, scorer).to_csv(io.StringIO(), index=False))
+    print(f"{args.rows} rows: assessment + CSV {full_seconds:.2f}s")
+
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
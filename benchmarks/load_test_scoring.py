@@ -0,0 +1,178 @@
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scoring_service import (
+    BASE_FEATURE_COLS, BASE_MODEL_SPECS, META_FEATURE_COLS, META_MODEL_SPECS,
+    export_artifacts, load_bundle, model_inputs, prepare_listings, serve
+)
+
+"""
+Load test for scoring_service.py.
+
+Open-loop load generator: each connection fires requests on a fixed schedule
+(rate / connections per second) regardless of how fast responses come back,
+and latency is measured from the scheduled send time, so a slow server shows
+up as queueing delay instead of silently lowering the offered load.
+
+Without --url it exports a synthetic artifact version (scikit-learn stand-ins
+for the LGBM/XGB/CatBoost/RF models, trained on random listings) to a temp
+directory and serves it in-process.
+
+    python benchmarks/load_test_scoring.py --rate 1000 --duration 15
+    python benchmarks/load_test_scoring.py --url http://127.0.0.1:8000 --rate 1000
+"""
+
+DISTRICTS = ['Quarry Bay', 'Tseung Kwan O', 'Mei Foo', 'Sha Tin', 'Ap Lei Chau',
+             'Hung Hom', 'Tsuen Wan', 'Wu Kai Sha', 'Kowloon Station', 'Tai Koo']
+
+
+def make_listings(n, seed=0):
+    """Random listings with every column the models read."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'district': rng.choice(DISTRICTS, n),
+        'bedroom_count': rng.integers(1, 5, n),
+        'property_age': rng.integers(1, 50, n),
+        'saleable_area': rng.integers(250, 1500, n),
+        'travel_time_to_cbd': rng.integers(5, 70, n),
+        'walking_time_to_mtr': rng.integers(1, 25, n),
+        'total_poi_within_1000m': rng.integers(20, 500, n),
+        'category_Education_within_2000m': rng.integers(0, 150, n),
+        'category_Medical_within_2000m': rng.integers(0, 40, n),
+        'category_Public_Market_within_1000m': rng.integers(0, 5, n),
+        'pet_policy': rng.choice(['TRUE', None], n),
+    })
+
+
+def export_synthetic_artifacts(root, n_train=5000):
+    """Trains small scikit-learn stand-ins with the same input encodings and exports them."""
+    from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+    from sklearn.preprocessing import LabelEncoder
+
+    listings = make_listings(n_train)
+    price = (listings['saleable_area'] * 14_000 - listings['property_age'] * 40_000
+             + np.random.default_rng(1).normal(0, 5e5, n_train))
+    # The service's own encodings, so the stand-ins see exactly what it sends
+    prepared = prepare_listings(listings, sorted(DISTRICTS))
+    base_inputs = model_inputs(prepared, BASE_FEATURE_COLS)
+    meta_inputs = model_inputs(prepared, META_FEATURE_COLS)
+
+    base_models = {}
+    for i, (name, spec) in enumerate(BASE_MODEL_SPECS.items()):
+        model = HistGradientBoostingRegressor(max_iter=50 + 25 * i, categorical_features='from_dtype')
+        base_models[name] = model.fit(base_inputs[spec['district']], price)
+
+    label_encoder = LabelEncoder().fit(list(BASE_MODEL_SPECS))
+    best_model = label_encoder.transform(np.random.default_rng(2).choice(list(BASE_MODEL_SPECS), n_train))
+    meta_models = {}
+    for name, spec in META_MODEL_SPECS.items():
+        model = HistGradientBoostingClassifier(max_iter=30, categorical_features='from_dtype')
+        meta_models[name] = model.fit(meta_inputs[spec['district']], best_model)
+
+    return export_artifacts(base_models, meta_models, label_encoder, DISTRICTS, root=root,
+                            version='synthetic', metadata={'note': 'load-test stand-in models'})
+
+
+def run_connection(host, port, bodies, interval, start_at, end_at, results):
+    """One keep-alive connection sending on a fixed schedule; appends (latency_s, ok) tuples."""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    i = 0
+    while True:
+        scheduled = start_at + i * interval
+        if scheduled >= end_at:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            conn.request('POST', '/score', body=bodies[i % len(bodies)], headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            ok = False
+        results.append((time.perf_counter() - scheduled, ok))
+        i += 1
+    conn.close()
+
+
+def load_test(host, port, rate, duration, connections, listings_per_request=1):
+    listings = make_listings(2000, seed=7).astype(object).where(lambda df: df.notna(), None)
+    records = listings.to_dict(orient='records')
+    bodies = [json.dumps(records[i:i + listings_per_request]).encode()
+              for i in range(0, len(records), listings_per_request)]
+
+    results = []
+    interval = connections / rate
+    start_at = time.perf_counter() + 0.2
+    threads = [
+        threading.Thread(target=run_connection,
+                         args=(host, port, bodies, interval, start_at + c * interval / connections,
+                               start_at + duration, results))
+        for c in range(connections)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start_at
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    ok = np.array([r[1] for r in results])
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {
+        'offered_rps': rate,
+        'achieved_rps': round(ok.sum() / elapsed, 1),
+        'requests': len(results),
+        'errors': int((~ok).sum()),
+        'client_p50_ms': round(float(p50), 2),
+        'client_p99_ms': round(float(p99), 2),
+    }
+
+
+def fetch_metrics(host, port):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request('GET', '/metrics')
+    return json.loads(conn.getresponse().read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='running server to test (default: in-process synthetic)')
+    parser.add_argument('--rate', type=float, default=1000, help='offered requests per second')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load')
+    parser.add_argument('--connections', type=int, default=128,
+                        help='keep-alive connections; bounds the requests in flight and so the batch size')
+    parser.add_argument('--listings-per-request', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        root = tempfile.mkdtemp(prefix='scoring_artifacts_')
+        export_synthetic_artifacts(root)
+        server, _ = serve(load_bundle(root), port=0)
+        host, port = server.server_address[:2]
+        print(f"Serving synthetic artifacts from {root} on port {port}")
+
+    report = load_test(host, port, args.rate, args.duration, args.connections, args.listings_per_request)
+    print(json.dumps({'client': report, 'server': fetch_metrics(host, port)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
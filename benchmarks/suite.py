@@ -0,0 +1,441 @@
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clean_730_dataset import clean_sale_frame
+from clean_centanet_data import clean_centanet_frame
+from comps_engine import CompsIndex
+from ensemble import add_ensemble_prediction
+from feature_store import build_vocabulary
+from poi_engine import CATEGORY_CONFIG, TOTAL_POI_RADIUS, POIIndex, compute_poi_features
+from property_schema import read_dataset, write_dataset
+from scoring_service import BASE_FEATURE_COLS, BASE_MODEL_SPECS, model_inputs, prepare_listings
+from synthetic import (
+    MAIN_DISTRICTS, make_district_column, make_district_dictionary, make_ensemble_frame,
+    make_listings, make_poi_table, make_property_coords, make_raw_sale, make_raw_scrape
+)
+from tidy_sale import map_main_districts
+from worthiness import WorthinessScorer, generate_age_assessment
+
+"""
+Benchmark suite and regression gate for the AVM pipeline stages.
+
+Every case times one stage on synthetic data (benchmarks/synthetic.py) at
+three scales and records wall time and peak memory:
+
+    clean_centanet      clean_centanet_frame on a raw Centanet scrape
+    clean_730           clean_sale_frame on raw 730-dataset listings
+    poi_counts          POIIndex build + compute_poi_features (poi_v2.py) against a GeoCom-sized table
+    comps               comparable-sales queries against a transaction history
+    district_mapping    tidy_sale.py main_district mapping
+    load_<format>       reading the enriched dataset from CSV / Feather with the property_schema types
+    train_<model>       fitting the LGBM / XGB / CatBoost / RF base regressors
+    predict_<model>     predicting with them
+    ensemble            majority-weighted ensemble over the meta-classifier votes
+    worthiness          age-group worthiness assessment
+
+Each (case, scale) runs in a fresh spawned process so imports, caches and
+memory from one case never leak into the next. Setup (data generation, and
+training for predict_*) is not timed. Time is the best of --repeat runs.
+peak_traced_mb is the tracemalloc high-water mark of one extra run, which
+covers Python and NumPy/pandas buffers but not the native heaps of
+LightGBM/XGBoost/CatBoost; max_rss_mb (process high-water mark, setup
+included) is recorded for those. Cases whose library is not installed are
+recorded as skipped.
+
+    python benchmarks/suite.py run --scales small,medium --output bench_output/current.json
+    python benchmarks/suite.py run --output benchmarks/baseline.json          # refresh the baseline
+    python benchmarks/suite.py compare bench_output/current.json --baseline benchmarks/baseline.json
+    python benchmarks/suite.py run --cases 'train_*' --baseline benchmarks/baseline.json  # run + gate
+
+compare exits 1 when a case got slower (or used more memory) than the
+baseline by more than the tolerance and by more than the absolute noise floor.
+
+No baseline is committed: timings only compare on the machine that recorded
+them. benchmarks/baseline.json is git-ignored; CI records it on each runner
+from the base branch (run --output benchmarks/baseline.json) before gating a
+change against it, and re-records it when the runner hardware changes.
+"""
+
+SCALE_FACTORS = {'small': 1, 'medium': 10, 'large': 100}
+DEFAULT_OUTPUT = 'bench_output/benchmarks.json'
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+POI_TABLE_ROWS = 100_000
+COMPS_HISTORY_ROWS = 100_000
+PREDICT_TRAIN_ROWS = 20_000
+
+# Ratio above baseline that counts as a regression, and the absolute floors
+# below which differences are treated as noise
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.25
+MIN_SECONDS = 0.02
+MIN_MB = 1.0
+
+
+# --- Cases ---
+
+def _setup_clean_centanet(n):
+    # Through CSV text, so dtypes are what read_csv gives the cleaner
+    return pd.read_csv(io.StringIO(make_raw_scrape(n).to_csv(index=False)), encoding='utf-8')
+
+
+def _run_clean_centanet(raw):
+    return clean_centanet_frame(raw.copy(), verbose=False)
+
+
+def _run_clean_730(raw):
+    return clean_sale_frame(raw)
+
+
+def _setup_poi_counts(n):
+    return make_poi_table(POI_TABLE_ROWS), make_property_coords(n)
+
+
+def _run_poi_counts(data):
+    poi_df, coords = data
+    return compute_poi_features(POIIndex(poi_df, CATEGORY_CONFIG), coords, CATEGORY_CONFIG, TOTAL_POI_RADIUS)
+
+
+def _with_coords(listings, seed):
+    coords = make_property_coords(len(listings), seed)
+    return listings.assign(easting=coords[:, 0], northing=coords[:, 1])
+
+
+def _setup_comps(n):
+    return CompsIndex(_with_coords(make_listings(COMPS_HISTORY_ROWS), 0)), _with_coords(make_listings(n, 1), 1)
+
+
+def _run_comps(data):
+    index, subjects = data
+    return index.query(subjects).features()
+
+
+def _setup_district_mapping(n):
+    return make_district_dictionary()['districts'], make_district_column(n)
+
+
+def _run_district_mapping(data):
+    hong_kong_districts, districts = data
+    return map_main_districts(districts, hong_kong_districts)
+
+
+# Base regressors with fixed, moderate settings; input is the district encoding
+# scoring_service.py feeds each model
+def _make_model(family):
+    if family == 'LGBM':
+        import lightgbm as lgb
+        return lgb.LGBMRegressor(n_estimators=200, learning_rate=0.05, num_leaves=31, random_state=42, verbose=-1)
+    if family == 'XGB':
+        import xgboost as xgb
+        return xgb.XGBRegressor(n_estimators=200, learning_rate=0.05, max_depth=6, tree_method='hist',
+                                enable_categorical=True, random_state=42)
+    if family == 'CatBoost':
+        import catboost as cb
+        return cb.CatBoostRegressor(iterations=200, learning_rate=0.05, depth=6, cat_features=['district'],
+                                    random_seed=42, verbose=False, allow_writing_files=False)
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(n_estimators=100, n_jobs=-1, random_state=42)
+
+
+def _model_data(family, n, seed=0):
+    listings = make_listings(n, seed)
+    prepared = prepare_listings(listings, build_vocabulary(listings['district']))
+    X = model_inputs(prepared, BASE_FEATURE_COLS)[BASE_MODEL_SPECS[family]['district']]
+    return X, listings['price'].to_numpy(dtype=np.float64)
+
+
+def _train_case(family):
+    def setup(n):
+        _make_model(family)  # fails here (-> skipped) when the library is missing
+        return _model_data(family, n)
+
+    def run(data):
+        return _make_model(family).fit(*data)
+    return setup, run
+
+
+def _predict_case(family):
+    def setup(n):
+        model = _make_model(family).fit(*_model_data(family, min(n, PREDICT_TRAIN_ROWS), seed=1))
+        return model, _model_data(family, n)[0]
+
+    def run(data):
+        model, X = data
+        return model.predict(X)
+    return setup, run
+
+
+def _run_ensemble(frame):
+    return add_ensemble_prediction(frame.copy())
+
+
+def _setup_worthiness(n):
+    listings = make_listings(n)
+    rng = np.random.default_rng(1)
+    # Worthiness tables are keyed by the 18 main districts
+    area_index = listings['district'].str.rsplit(' Area ', n=1).str[0]
+    listings['district'] = area_index.where(area_index.isin(MAIN_DISTRICTS))
+    listings['actual_price'] = listings['price']
+    listings['ensemble_predicted'] = listings['price'] * rng.normal(1, 0.1, n)
+    return listings
+
+
+def _run_worthiness(listings):
+    return generate_age_assessment(listings, WorthinessScorer())
+
+
+def _load_case(extension):
+    def setup(n):
+        # Fixed name per (format, size): re-runs overwrite it instead of filling the temp dir
+        path = os.path.join(tempfile.gettempdir(), f'avm_bench_listings_{n}.{extension}')
+        listings = make_listings(n)
+        if extension == 'csv':
+            listings.to_csv(path, index=False)
+        else:
+            write_dataset(listings, path)
+        return path
+
+    return setup, read_dataset
+
+
+CASES = {
+    'clean_centanet': {'setup': _setup_clean_centanet, 'run': _run_clean_centanet, 'rows': 2_000},
+    'clean_730': {'setup': make_raw_sale, 'run': _run_clean_730, 'rows': 2_000},
+    'poi_counts': {'setup': _setup_poi_counts, 'run': _run_poi_counts, 'rows': 1_000},
+    'comps': {'setup': _setup_comps, 'run': _run_comps, 'rows': 1_000},
+    'district_mapping': {'setup': _setup_district_mapping, 'run': _run_district_mapping, 'rows': 10_000},
+    **{f'load_{extension}': dict(zip(('setup', 'run'), _load_case(extension)), rows=6_000)
+       for extension in ['csv', 'feather']},
+    **{f'train_{family.lower()}': dict(zip(('setup', 'run'), _train_case(family)), rows=600)
+       for family in ['LGBM', 'XGB', 'CatBoost', 'RF']},
+    **{f'predict_{family.lower()}': dict(zip(('setup', 'run'), _predict_case(family)), rows=1_000)
+       for family in ['LGBM', 'XGB', 'CatBoost', 'RF']},
+    'ensemble': {'setup': make_ensemble_frame, 'run': _run_ensemble, 'rows': 10_000},
+    'worthiness': {'setup': _setup_worthiness, 'run': _run_worthiness, 'rows': 2_000},
+}
+
+
+# --- Measurement ---
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+
+
+def measure(case_name, scale, repeat):
+    """Runs one (case, scale) in the current process; called in a fresh worker process."""
+    case = CASES[case_name]
+    rows = case['rows'] * SCALE_FACTORS[scale]
+    result = {'case': case_name, 'scale': scale, 'rows': rows}
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    try:
+        with quiet:
+            data = case['setup'](rows)
+    except ImportError as e:
+        return {**result, 'skipped': str(e)}
+
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            case['run'](data)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+        case['run'](data)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        **result,
+        'repeat': repeat,
+        'seconds_min': round(min(timings), 6),
+        'seconds_median': round(statistics.median(timings), 6),
+        'peak_traced_mb': round((peak_bytes - baseline_bytes) / 1024 ** 2, 2),
+        'max_rss_mb': _max_rss_mb(),
+    }
+
+
+def environment():
+    versions = {}
+    for module in ['numpy', 'pandas', 'scipy', 'sklearn', 'lightgbm', 'xgboost', 'catboost']:
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions,
+    }
+
+
+def select_cases(patterns):
+    """Case names matching any of the glob patterns, in suite order."""
+    selected = [name for name in CASES if any(fnmatch.fnmatch(name, p) for p in patterns)]
+    if not selected:
+        raise SystemExit(f"No cases match {patterns}; see 'suite.py list'")
+    return selected
+
+
+def run_suite(case_names, scales, repeat=3):
+    results = {}
+    ctx = multiprocessing.get_context('spawn')
+    for scale in scales:
+        for name in case_names:
+            # One process per measurement (max_tasks_per_child=1)
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+                record = pool.submit(measure, name, scale, repeat).result()
+            results[f'{name}/{scale}'] = record
+            if 'skipped' in record:
+                print(f"  ⏭️  {name:<18} {scale:<7} skipped ({record['skipped']})")
+            else:
+                print(f"  ⏱️  {name:<18} {scale:<7} {record['rows']:>9,} rows  {record['seconds_min']:>9.3f}s  "
+                      f"{record['peak_traced_mb']:>8.1f} MB traced  {record['max_rss_mb']} MB rss")
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'results': results,
+    }
+
+
+# --- Regression gate ---
+
+def _change(current, baseline):
+    return (current / baseline - 1) * 100 if baseline else float('inf') if current else 0.0
+
+
+def compare(current, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE,
+            min_seconds=MIN_SECONDS, min_mb=MIN_MB):
+    """
+    Compares two suite results. Returns the list of regressions, each
+    (key, metric, baseline_value, current_value).
+    """
+    if current['environment'].get('cpu_count') != baseline['environment'].get('cpu_count') or \
+            current['environment'].get('platform') != baseline['environment'].get('platform'):
+        print("⚠️  Baseline was recorded on a different machine; timings may not be comparable")
+
+    regressions = []
+    print(f"\n{'case/scale':<28} {'base s':>9} {'now s':>9} {'Δ time':>8} {'base MB':>9} {'now MB':>9} {'Δ mem':>8}  status")
+    print('-' * 100)
+    for key, now in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            print(f"{key:<28} (new case, not in baseline)")
+            continue
+        if 'skipped' in now or 'skipped' in base:
+            print(f"{key:<28} {'':>9} {'':>9} {'':>8} {'':>9} {'':>9} {'':>8}  skipped")
+            continue
+
+        flags = []
+        if now['seconds_min'] > base['seconds_min'] * (1 + time_tolerance) and \
+                now['seconds_min'] - base['seconds_min'] > min_seconds:
+            flags.append('time')
+            regressions.append((key, 'seconds_min', base['seconds_min'], now['seconds_min']))
+        if now['peak_traced_mb'] > base['peak_traced_mb'] * (1 + memory_tolerance) and \
+                now['peak_traced_mb'] - base['peak_traced_mb'] > min_mb:
+            flags.append('memory')
+            regressions.append((key, 'peak_traced_mb', base['peak_traced_mb'], now['peak_traced_mb']))
+
+        status = f"❌ REGRESSION ({', '.join(flags)})" if flags else '✅'
+        print(f"{key:<28} {base['seconds_min']:>9.3f} {now['seconds_min']:>9.3f} "
+              f"{_change(now['seconds_min'], base['seconds_min']):>+7.1f}% "
+              f"{base['peak_traced_mb']:>9.1f} {now['peak_traced_mb']:>9.1f} "
+              f"{_change(now['peak_traced_mb'], base['peak_traced_mb']):>+7.1f}%  {status}")
+
+    not_run = len(baseline['results'].keys() - current['results'].keys())
+    if not_run:
+        print(f"({not_run} baseline case(s) not in these results)")
+    print(f"\n{len(regressions)} regression(s)")
+    return regressions
+
+
+def _load(path):
+    if not os.path.exists(path):
+        raise SystemExit(f"{path} not found; record one on this machine with 'suite.py run --output {path}'")
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save(report, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('list', help='list the cases and their row counts per scale')
+
+    run_parser = sub.add_parser('run', help='run the suite and write results JSON')
+    run_parser.add_argument('--cases', default='*', help="comma-separated glob patterns, e.g. 'train_*,ensemble'")
+    run_parser.add_argument('--scales', default='small,medium,large', help=f'comma-separated: {", ".join(SCALE_FACTORS)}')
+    run_parser.add_argument('--repeat', type=int, default=3, help='timed runs per case (best is kept)')
+    run_parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    run_parser.add_argument('--baseline', default=None, help='compare against this baseline after running')
+
+    compare_parser = sub.add_parser('compare', help='flag regressions of a results file against a baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+
+    for p in (run_parser, compare_parser):
+        p.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE)
+        p.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE)
+        p.add_argument('--min-seconds', type=float, default=MIN_SECONDS)
+        p.add_argument('--min-mb', type=float, default=MIN_MB)
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        print(f"{'case':<18} " + ' '.join(f'{scale:>10}' for scale in SCALE_FACTORS))
+        for name, case in CASES.items():
+            print(f"{name:<18} " + ' '.join(f"{case['rows'] * factor:>10,}" for factor in SCALE_FACTORS.values()))
+        return
+
+    if args.command == 'run':
+        scales = args.scales.split(',')
+        unknown = set(scales) - set(SCALE_FACTORS)
+        if unknown:
+            parser.error(f"unknown scales: {', '.join(sorted(unknown))}")
+        report = run_suite(select_cases(args.cases.split(',')), scales, args.repeat)
+        _save(report, args.output)
+        if not args.baseline:
+            return
+        current, baseline = report, _load(args.baseline)
+    else:
+        current, baseline = _load(args.results), _load(args.baseline)
+
+    regressions = compare(current, baseline, args.time_tolerance, args.memory_tolerance,
+                          args.min_seconds, args.min_mb)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
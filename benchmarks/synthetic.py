@@ -0,0 +1,151 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ensemble import MODEL_TO_PRED, MODELS, VOTE_COLS
+from poi_engine import CATEGORY_CONFIG
+
+"""
+Synthetic data generators for the benchmark suite.
+
+Each generator is seeded and returns a frame with the columns, dtypes and
+rough value ranges of the real table it stands in for:
+
+    make_listings           centanet_cleaned_proximity_final.csv (~6k rows, 144 districts, ~4k buildings)
+    make_raw_scrape         raw_data/centanet_data_2.csv (see bench_clean_centanet.py)
+    make_raw_sale           raw_data/sale_df_v2.csv (730-dataset listings, all text)
+    make_poi_table          GeoCom.csv after load_poi_table (HK1980 grid EASTING/NORTHING, CLASS, TYPE)
+    make_property_coords    housing EASTING/NORTHING (txn_df_easting_northing.csv)
+    make_district_dictionary / make_district_column   dictionary.txt and the raw district column of tidy_sale.py
+    make_ensemble_frame     combined_df with base predictions and meta-classifier votes
+"""
+
+MAIN_DISTRICTS = ['Central and Western', 'Wan Chai', 'Eastern', 'Southern', 'Yau Tsim Mong', 'Sham Shui Po',
+                  'Kowloon City', 'Wong Tai Sin', 'Kwun Tong', 'Kwai Tsing', 'Tsuen Wan', 'Tuen Mun',
+                  'Yuen Long', 'North', 'Tai Po', 'Sha Tin', 'Sai Kung', 'Islands']
+AREAS_PER_DISTRICT = 8  # 18 x 8 = 144 listing districts, as in the cleaned data
+# HK1980 grid bounds of the urban area
+EASTING_RANGE = (800_000, 870_000)
+NORTHING_RANGE = (805_000, 848_000)
+# GeoCom classes outside CATEGORY_CONFIG still count towards total_poi
+OTHER_POI_CODES = [('GOV', 'OFF'), ('CPO', 'PST'), ('HNC', 'ELD'), ('RSF', 'SWP'), ('TRS', 'PTI')]
+
+
+def area_names():
+    return {district: [f'{district} Area {k + 1}' for k in range(AREAS_PER_DISTRICT)] for district in MAIN_DISTRICTS}
+
+
+def make_listings(n, seed=0):
+    """Rows shaped like centanet_cleaned_proximity_final.csv."""
+    rng = np.random.default_rng(seed)
+    areas = [area for names in area_names().values() for area in names]
+    n_buildings = max(1, int(n * 0.7))
+    building = rng.integers(0, n_buildings, n)
+    saleable_area = np.clip(rng.normal(558, 182, n), 198, 999).round()
+    return pd.DataFrame({
+        'property_name': np.char.add('ESTATE ', building.astype(str)),
+        'district': np.array(areas)[building % len(areas)],
+        'bedroom_count': np.clip(rng.poisson(2.2, n), 1, 5),
+        'price': (saleable_area * rng.normal(15_900, 3_000, n)).clip(1.43e6, 5.8e7).round(-4),
+        'property_age': rng.integers(1, 68, n),
+        'saleable_area': saleable_area.astype(int),
+        'pet_policy': rng.random(n) < 0.34,
+        'latitude': rng.uniform(22.2, 22.5, n),
+        'longitude': rng.uniform(113.9, 114.3, n),
+        'travel_time_to_cbd': rng.integers(4, 88, n),
+        'walking_time_to_mtr': np.minimum(rng.exponential(12.5, n).round(), 91).astype(int),
+        'total_poi_within_1000m': rng.poisson(506, n),
+        'category_Community_Facilities_within_1000m': rng.poisson(6, n),
+        'category_Education_within_2000m': rng.poisson(177, n),
+        'category_Recreation_within_1000m': rng.poisson(54, n),
+        'category_Medical_within_2000m': rng.poisson(20, n),
+        'category_Public_Market_within_1000m': rng.poisson(4.5, n),
+        'category_Religion_within_2000m': rng.poisson(82, n),
+        'category_Transportation_within_1000m': rng.poisson(33, n),
+        'category_Tourism_within_2000m': rng.poisson(3, n),
+    })
+
+
+def make_raw_scrape(n, seed=0):
+    """Raw Centanet scrape, with the quirks clean_centanet_data.py repairs."""
+    from bench_clean_centanet import make_raw_scrape as _make_raw_scrape
+    return _make_raw_scrape(n, seed)
+
+
+def make_raw_sale(n, seed=0):
+    """Raw 730-dataset listings as clean_730_dataset.py reads them (every column text)."""
+    rng = np.random.default_rng(seed)
+    area = rng.integers(200, 1500, n)
+    price_m = (area * rng.normal(0.0159, 0.003, n)).round(2)
+    dates = pd.Timestamp('1975-01-01') + pd.to_timedelta(rng.integers(0, 17_000, n), unit='D')
+    frame = pd.DataFrame({
+        'Property ID': np.char.add('P', rng.integers(0, 10 * n, n).astype(str)),
+        'District': np.array(MAIN_DISTRICTS)[rng.integers(0, len(MAIN_DISTRICTS), n)],
+        'property_name': np.char.add('ESTATE ', rng.integers(0, max(1, n // 3), n).astype(str)),
+        'Price': np.char.add(np.char.add('Sale $', price_m.astype(str)), 'M'),
+        'Saleable Area': np.char.add(np.char.add('SA ', area.astype(str)), ' sq.ft.'),
+        'Gross Floor Area': np.char.add((area * 1.3).astype(int).astype(str), ' sq.ft.'),
+        'Gross Floor Area Price per sq.ft.': (price_m * 1e6 / (area * 1.3)).round().astype(str),
+        'Saleable Area Price per sq.ft.': (price_m * 1e6 / area).round().astype(str),
+        'Room Count': np.char.add(rng.integers(1, 5, n).astype(str), ' Room(s)'),
+        'Bathroom Count': np.char.add(rng.integers(1, 3, n).astype(str), ' Bathroom(s)'),
+        'matched_NSEARCH3_E': dates.strftime('%Y-%m-%d'),
+    })
+    # Missing key fields, dropped by the cleaner
+    frame.loc[rng.random(n) < 0.03, 'Price'] = np.nan
+    frame.loc[rng.random(n) < 0.02, 'Room Count'] = np.nan
+    return frame
+
+
+def make_poi_table(n, seed=0):
+    """GeoCom-shaped POIs (the columns load_poi_table keeps), every configured class/type represented."""
+    rng = np.random.default_rng(seed)
+    codes = list(OTHER_POI_CODES)
+    for details in CATEGORY_CONFIG.values():
+        for f in details['filters']:
+            codes += [(f['class'], t) for t in (f['types'] or ['STP', 'TER'])]
+    pick = rng.integers(0, len(codes), n)
+    return pd.DataFrame({
+        'EASTING': rng.uniform(*EASTING_RANGE, n),
+        'NORTHING': rng.uniform(*NORTHING_RANGE, n),
+        'CLASS': np.array([c for c, _ in codes])[pick],
+        'TYPE': np.array([t for _, t in codes])[pick],
+    })
+
+
+def make_property_coords(n, seed=0):
+    """(n x 2) housing EASTING/NORTHING, clustered into estates like real listings."""
+    rng = np.random.default_rng(seed)
+    centres = np.column_stack([rng.uniform(*EASTING_RANGE, max(1, n // 20)),
+                               rng.uniform(*NORTHING_RANGE, max(1, n // 20))])
+    return centres[rng.integers(0, len(centres), n)] + rng.normal(0, 150, (n, 2))
+
+
+def make_district_dictionary():
+    """The {'districts': {district: [areas]}} structure of dictionary.txt."""
+    return {'districts': area_names()}
+
+
+def make_district_column(n, seed=0):
+    """Raw district values: areas, main districts, 'Area / Alias' forms, padding, unknowns and NaN."""
+    rng = np.random.default_rng(seed)
+    areas = [area for names in area_names().values() for area in names]
+    pool = np.array(areas + MAIN_DISTRICTS + [f'{a} / Alias' for a in areas[:20]] +
+                    [f'  {d} ' for d in MAIN_DISTRICTS[:5]] + ['Unknown Estate Area'], dtype=object)
+    values = pool[rng.integers(0, len(pool), n)]
+    values[rng.random(n) < 0.02] = None
+    return pd.Series(values, name='district')
+
+
+def make_ensemble_frame(n, seed=0):
+    """combined_df-shaped base predictions and meta-classifier votes (2% missing votes)."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({pred: rng.uniform(2e6, 2e7, n) for pred in MODEL_TO_PRED.values()})
+    for col in VOTE_COLS:
+        votes = np.array(MODELS, dtype=object)[rng.integers(0, len(MODELS), n)]
+        votes[rng.random(n) < 0.02] = None
+        frame[col] = votes
+    return frame
@@ -0,0 +1,417 @@
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+
+from playwright.async_api import async_playwright
+
+"""
+Parallel Centanet Scraper
+
+Module version of the scraper in webscrape.ipynb. Instead of one page clicking
+"next" and sleeping 3 s after every click, N browser contexts each take a
+shard of the result-page indices and wait for the listing cards to render
+instead of sleeping. Rows are appended to the output CSV in batches and every
+finished page index is logged with a hash of its listing links, so an
+interrupted run resumes with only the missing pages.
+
+Pages are reached in one of two ways:
+
+    url     open each page directly through PAGE_URL_TEMPLATE (fast; the
+            pageindex parameter is not documented by the site)
+    click   what the notebook does: click button.btn-next, each shard
+            clicking through to the start of its contiguous range first
+
+A page whose listings are identical to another page's means navigation is not
+working (e.g. the site ignoring pageindex and serving page 1 every time). The
+run stops with DuplicatePageError before that page is logged as complete, and
+the url mode checks pages 1 and 2 before starting the workers.
+
+    python centanet_scraper.py --pages 416 --workers 6
+    python centanet_scraper.py --pages 416 --workers 6 --navigate click
+"""
+
+BASE_URL = "https://hk.centanet.com/findproperty/en/list/buy"
+# Result pages addressed directly; "{page}" is the 1-based page index
+PAGE_URL_TEMPLATE = BASE_URL + "?pageindex={page}"
+OUTPUT_CSV = "raw_data/property_data.csv"
+
+LISTING_SELECTOR = "div.list a.property-text"
+NEXT_BUTTON_SELECTOR = "button.btn-next"
+NAVIGATION_MODES = ["url", "click"]
+PAGE_TIMEOUT_MS = 30_000
+BATCH_SIZE = 10  # pages buffered per worker before appending to the CSV
+
+FIELDNAMES = [
+    "property_name",
+    "district",
+    "bedroom_count",
+    "price",
+    "unit",
+    "property_age",
+    "floor",
+    "efficiency",
+    "gross_floor_area",
+    "saleable_area",
+    "orientation",
+    "pet_policy",
+    "attribute",
+    "floor_level",
+]
+
+
+def parse_title_sm(title_sm_text: str):
+    """
+    Example: "High Floor・FLAT E・2 Rooms"
+    Returns floor (e.g. "High Floor"), floor_level ("High"),
+    unit ("FLAT E"), bedroom_count ("2").
+    """
+    floor = ""
+    floor_level = ""
+    unit = ""
+    bedroom_count = ""
+
+    if not title_sm_text:
+        return floor, floor_level, unit, bedroom_count
+
+    parts = [p.strip() for p in title_sm_text.split("・") if p.strip()]
+
+    if parts:
+        floor = parts[0]                 # "High Floor"
+        floor_level = floor.split()[0]   # "High"
+
+    for p in parts:
+        if "FLAT" in p.upper():
+            unit = p
+        if "Room" in p or "Rooms" in p:
+            m = re.search(r"(\d+)", p)
+            if m:
+                bedroom_count = m.group(1)
+
+    return floor, floor_level, unit, bedroom_count
+
+
+def extract_number(text: str):
+    """Extract first integer-like number (ignore commas)."""
+    if not text:
+        return ""
+    m = re.search(r"(\d[\d,]*)", text)
+    return m.group(1).replace(",", "") if m else ""
+
+
+async def safe_text(locator):
+    """Return stripped inner_text of first match or empty string."""
+    try:
+        if await locator.count() == 0:
+            return ""
+        return (await locator.first.inner_text()).strip()
+    except Exception:
+        return ""
+
+
+async def extract_floor_info(card):
+    """
+    From div.floor-info:
+    e.g. "44 years · 81% Efficiency(%)"
+    Returns (property_age, efficiency_text)
+    """
+    text = await safe_text(card.locator("div.floor-info"))
+    if not text:
+        return "", ""
+    parts = [p.strip() for p in text.split("·") if p.strip()]
+    property_age = ""
+    efficiency = ""
+    for p in parts:
+        if "year" in p:
+            property_age = p
+        if "Efficiency" in p:
+            efficiency = p
+    return property_age, efficiency
+
+
+async def extract_orientation(card):
+    """
+    Orientation: look for a small span whose text looks like
+    'South East', 'South West', 'North', etc.
+    """
+    for txt in await card.locator("span").all_inner_texts():
+        txt = txt.strip()
+        if 0 < len(txt) <= 20 and re.search(r"\b(North|South|East|West)\b", txt):
+            return txt
+    return ""
+
+
+async def scrape_current_page(page, page_index):
+    """
+    Scrape all listings on the current result page.
+    """
+    listings = page.locator(LISTING_SELECTOR)
+    n = await listings.count()
+    print(f"[Page {page_index}] Found {n} listings")
+
+    results = []
+
+    for i in range(n):
+        card = listings.nth(i)
+
+        property_name = await safe_text(card.locator("span.title-lg"))
+        title_sm = await safe_text(card.locator("span.title-sm"))
+        floor, floor_level, unit, bedroom_count = parse_title_sm(title_sm)
+
+        # district
+        district = await safe_text(card.locator("span.adress.tag-adress"))
+        if not district:
+            district = await safe_text(card.locator("div.title + div.area"))
+
+        price = await safe_text(card.locator("span.price-info"))
+        property_age, efficiency = await extract_floor_info(card)
+
+        # saleable_area
+        sa_text = await safe_text(
+            card.locator("div.area-block.usable-area div.num span.hidden-xs-only")
+        )
+        saleable_area = extract_number(sa_text)
+
+        # gross_floor_area
+        gfa_text = await safe_text(
+            card.locator("div.area-block.construction-area div.num span.hidden-xs-only")
+        )
+        gross_floor_area = extract_number(gfa_text)
+
+        # pet_policy
+        pet_policy = "yes" if await card.locator("text=Pet friendly").count() > 0 else "no"
+
+        # attribute tags
+        texts = await card.locator("div.tag.hidden-sm-and-down span").all_inner_texts()
+        attribute = " | ".join(t.strip() for t in texts if t.strip())
+
+        # orientation
+        orientation = await extract_orientation(card)
+
+        results.append({
+            "property_name": property_name,
+            "district": district,
+            "bedroom_count": bedroom_count,
+            "price": price,
+            "unit": unit,
+            "property_age": property_age,
+            "floor": floor,
+            "efficiency": efficiency,
+            "gross_floor_area": gross_floor_area,
+            "saleable_area": saleable_area,
+            "orientation": orientation,
+            "pet_policy": pet_policy,
+            "attribute": attribute,
+            "floor_level": floor_level,
+        })
+
+    return results
+
+
+async def listing_fingerprint(page):
+    """Hash of the listing links (or card text, for cards without one) on the current page, in page order."""
+    links = await page.locator(LISTING_SELECTOR).evaluate_all(
+        "els => els.map(e => e.getAttribute('href') || e.innerText)")
+    return hashlib.sha256("\n".join(link or "" for link in links).encode()).hexdigest()[:16]
+
+
+class DuplicatePageError(RuntimeError):
+    """Two page indices served the same listings: navigation is not reaching the requested page."""
+
+
+# --- Output and resume ---
+
+class ScrapeWriter:
+    """Appends rows to the output CSV and records finished pages in a sidecar log."""
+
+    def __init__(self, output_csv):
+        self.output_csv = output_csv
+        self.progress_path = output_csv + ".pages.jsonl"
+        self._lock = asyncio.Lock()
+        # listing fingerprint -> page index, for every page scraped in this run or logged before
+        self.fingerprints = {}
+        if os.path.dirname(output_csv):
+            os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+
+    def completed_pages(self):
+        """Page indices whose rows are already in the CSV."""
+        done = set()
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        done.add(entry["page"])
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # A torn final line from a crashed run
+                    if entry.get("fingerprint"):
+                        self.fingerprints[entry["fingerprint"]] = entry["page"]
+        return done
+
+    def claim(self, page_index, fingerprint):
+        """Registers a page's listings; raises DuplicatePageError if another page already had them."""
+        other = self.fingerprints.setdefault(fingerprint, page_index)
+        if other != page_index:
+            raise DuplicatePageError(
+                f"Page {page_index} has the same listings as page {other}; navigation is not reaching "
+                f"the requested pages (try --navigate click). Nothing from page {page_index} was saved.")
+
+    async def write_batch(self, pages):
+        """pages: list of (page_index, fingerprint, rows). Rows are written before their pages are logged."""
+        async with self._lock:
+            new_file = not os.path.exists(self.output_csv) or os.path.getsize(self.output_csv) == 0
+            with open(self.output_csv, "a", newline="", encoding="utf-8-sig" if new_file else "utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                if new_file:
+                    writer.writeheader()
+                for _, _, rows in pages:
+                    writer.writerows(rows)
+            with open(self.progress_path, "a", encoding="utf-8") as f:
+                for page_index, fingerprint, rows in pages:
+                    f.write(json.dumps({"page": page_index, "rows": len(rows), "fingerprint": fingerprint}) + "\n")
+
+
+# --- Workers ---
+
+async def open_url(page, url):
+    await page.goto(url, wait_until="domcontentloaded", timeout=PAGE_TIMEOUT_MS)
+    # Wait for the cards to render instead of a fixed sleep
+    await page.wait_for_selector(LISTING_SELECTOR, timeout=PAGE_TIMEOUT_MS)
+
+
+async def click_next(page):
+    """Clicks "next" and waits until the listings have changed (instead of the notebook's 3 s sleep)."""
+    before = await listing_fingerprint(page)
+    await page.locator(NEXT_BUTTON_SELECTOR).click(timeout=PAGE_TIMEOUT_MS)
+    deadline = time.monotonic() + PAGE_TIMEOUT_MS / 1000
+    while await listing_fingerprint(page) == before:
+        if time.monotonic() > deadline:
+            raise TimeoutError("the listings did not change after clicking next")
+        await asyncio.sleep(0.1)
+    await page.wait_for_selector(LISTING_SELECTOR, timeout=PAGE_TIMEOUT_MS)
+
+
+async def check_url_pagination(context, page_url_template):
+    """Raises DuplicatePageError when pages 1 and 2 opened by URL show the same listings."""
+    page = await context.new_page()
+    fingerprints = []
+    for page_index in (1, 2):
+        await open_url(page, page_url_template.format(page=page_index))
+        fingerprints.append(await listing_fingerprint(page))
+    await page.close()
+    if fingerprints[0] == fingerprints[1]:
+        raise DuplicatePageError(f"'{page_url_template}' serves the same listings for pages 1 and 2; "
+                                 f"the site is ignoring the page parameter (use --navigate click)")
+
+
+async def scrape_shard(context, page_indices, writer, page_url_template, batch_size, navigate="url"):
+    """
+    One browser context working through its share of page indices. In click
+    mode page_indices must be contiguous; the shard clicks from page 1 to its first.
+    """
+    page = await context.new_page()
+    batch, scraped = [], 0
+    if navigate == "click":
+        await open_url(page, BASE_URL)
+        for _ in range(page_indices[0] - 1):
+            await click_next(page)
+    for position, page_index in enumerate(page_indices):
+        try:
+            if navigate == "url":
+                await open_url(page, page_url_template.format(page=page_index))
+            elif position > 0:
+                await click_next(page)
+            fingerprint = await listing_fingerprint(page)
+            rows = await scrape_current_page(page, page_index)
+        except Exception as e:
+            if navigate == "click":
+                # Can't reach the later pages without this one; they stay unlogged for the next run
+                print(f"[Page {page_index}] ERROR: {e}; stopping this shard")
+                break
+            # Not logged as complete, so the next run retries this page
+            print(f"[Page {page_index}] ERROR: {e}")
+            continue
+        # Outside the try: a repeated page must stop the run, not be skipped
+        writer.claim(page_index, fingerprint)
+        batch.append((page_index, fingerprint, rows))
+        scraped += len(rows)
+        if len(batch) >= batch_size:
+            await writer.write_batch(batch)
+            batch = []
+    if batch:
+        await writer.write_batch(batch)
+    await page.close()
+    return scraped
+
+
+async def scrape_pages(n_pages, workers=4, output_csv=OUTPUT_CSV, page_url_template=PAGE_URL_TEMPLATE,
+                       batch_size=BATCH_SIZE, headless=True, navigate="url"):
+    """
+    Scrapes result pages 1..n_pages with `workers` concurrent browser contexts.
+    Pages already logged as complete are skipped. Returns the number of rows
+    written; raises DuplicatePageError if navigation serves a page twice.
+    """
+    writer = ScrapeWriter(output_csv)
+    done = writer.completed_pages()
+    todo = [i for i in range(1, n_pages + 1) if i not in done]
+    if done:
+        print(f"Resuming: {len(done)} pages already scraped, {len(todo)} to go.")
+    if not todo:
+        return 0
+
+    if navigate == "url":
+        # Round-robin shards so every worker gets a similar mix of pages
+        shards = [todo[w::workers] for w in range(workers) if todo[w::workers]]
+    else:
+        # Contiguous runs of pages: clicking "next" only moves forward one page at a time
+        runs = [[todo[0]]]
+        for page_index in todo[1:]:
+            if page_index == runs[-1][-1] + 1:
+                runs[-1].append(page_index)
+            else:
+                runs.append([page_index])
+        size = max(1, -(-len(todo) // workers))
+        shards = [run[i:i + size] for run in runs for i in range(0, len(run), size)]
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            if navigate == "url":
+                check = await browser.new_context()
+                await check_url_pagination(check, page_url_template)
+                await check.close()
+            contexts = [await browser.new_context() for _ in shards]
+            tasks = [asyncio.create_task(scrape_shard(context, shard, writer, page_url_template, batch_size,
+                                                      navigate))
+                     for context, shard in zip(contexts, shards)]
+            try:
+                counts = await asyncio.gather(*tasks)
+            except DuplicatePageError:
+                # Stop the other shards too; whatever they had logged stays valid
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        finally:
+            await browser.close()
+    return sum(counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel Centanet listing scraper")
+    parser.add_argument("--pages", type=int, default=416, help="number of result pages")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent browser contexts")
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument("--url-template", default=PAGE_URL_TEMPLATE)
+    parser.add_argument("--navigate", default="url", choices=NAVIGATION_MODES,
+                        help="open pages by URL, or click 'next' as the notebook does")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = asyncio.run(scrape_pages(args.pages, args.workers, args.output, args.url_template,
+                                       navigate=args.navigate))
+    print(f"Saved {written} rows to {args.output} in {time.perf_counter() - start:.1f}s")
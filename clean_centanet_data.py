@@ -1,6 +1,16 @@
 import pandas as pd
-import re
 import numpy as np
+from instrumentation import configure, span
+from streaming_cleaner import DEFAULT_CHUNKSIZE, stream_clean
+
+RAW_PATH = 'raw_data/centanet_data_2.csv'
+PARQUET_OUTPUT_DIR = 'cleaned_data/cleaned_centanet_data.parquet'
+
+ROOM_PATTERN = r'\d+\s*Rooms?'
+NUMERIC_COLS_TO_FILTER = ['price', 'bedroom_count', 'property_age', 'saleable_area']
+# Define the columns that cannot be empty
+REQUIRED_DATA_COLS = ['price', 'bedroom_count', 'district', 'property_age', 'saleable_area']
+
 
 # --- Helper Function for Attribute Cleaning ---
 def clean_attributes(attribute_str):
@@ -13,94 +23,161 @@ def clean_attributes(attribute_str):
 
     # Split the string by newline, strip whitespace from each part
     attributes = [attr.strip() for attr in attribute_str.split('\n')]
-    
+
     # Get unique attributes while preserving order
     unique_attributes = list(dict.fromkeys(attributes))
-    
+
     # Join them back with a comma and space
     return ', '.join(unique_attributes)
 
 
-# --- Main Script ---
+def clean_attribute_column(attribute):
+    """
+    Applies clean_attributes to a whole column. Scraped listings repeat the same
+    attribute strings many times, so each distinct value is cleaned only once.
+    """
+    codes, uniques = pd.factorize(attribute, use_na_sentinel=True)
+    cleaned = np.array([clean_attributes(value) for value in uniques] + [''], dtype=object)
+    # NaN rows get code -1, which indexes the trailing '' (the non-string result)
+    return pd.Series(cleaned[codes], index=attribute.index, dtype=object)
+
+
+def _contains(series, pattern):
+    """Case-sensitive regex match that is False for non-string values."""
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        return series.str.contains(pattern, regex=True, na=False).astype(bool)
+    return pd.Series(False, index=series.index)
 
-# 1. Load the original dataset
-try:
-    # Use encoding='utf-8' to prevent character issues
-    df = pd.read_csv('raw_data/centanet_data_2.csv', encoding='utf-8')
-    print("✅ Successfully loaded centanet_data_2.csv")
-except FileNotFoundError:
-    print("❌ Error: 'centanet_data_2.csv' not found. Please make sure the script is in the same folder as your data file.")
-    exit()
-
-# 2. Clean 'property_name' and 'distance' columns
-df['property_name'] = df['property_name'].str.replace('・', ' ', regex=False)
-df['distance'] = df['distance'].str.replace('·', '', regex=False)
-print("✅ Cleaned text columns.")
-
-
-# 3. Clean the 'attribute' column for Excel compatibility
-print("🔧 Cleaning the 'attribute' column for better display...")
-df['attribute'] = df['attribute'].apply(clean_attributes)
-
-
-# 4. Correct and clean bedroom count information
-room_pattern = r'\d+\s*Rooms?'
-cleaned_count = 0
-for index, row in df.iterrows():
-    if pd.isna(row['bedroom_count']) or str(row['bedroom_count']).strip() == '':
-        if isinstance(row['unit'], str) and re.search(room_pattern, row['unit']):
-            room_count = re.search(r'(\d+)', row['unit']).group(1)
-            df.at[index, 'bedroom_count'] = room_count
-            df.at[index, 'unit'] = re.sub(room_pattern, '', row['unit'], flags=re.IGNORECASE).strip()
-            cleaned_count += 1
-        elif isinstance(row['floor'], str) and re.search(room_pattern, row['floor']):
-            room_count = re.search(r'(\d+)', row['floor']).group(1)
-            df.at[index, 'bedroom_count'] = room_count
-            df.at[index, 'floor'] = re.sub(room_pattern, '', row['floor'], flags=re.IGNORECASE).strip()
-            cleaned_count += 1
-print(f"✅ Corrected and cleaned {cleaned_count} bedroom records.")
-
-# 5. Correct misplaced flat information
-misplaced_flat_condition = (
-    (df['unit'].isnull()) | (df['unit'].str.strip() == '')
-) & (
-    df['floor'].str.contains('FLAT', na=False, case=False)
-)
-fix_count = misplaced_flat_condition.sum()
-df.loc[misplaced_flat_condition, 'unit'] = df.loc[misplaced_flat_condition, 'floor']
-df.loc[misplaced_flat_condition, 'floor'] = ''
-print(f"✅ Moved misplaced flat info for {fix_count} records.")
-
-# 6. Final clean-up for leftover 's' characters
-df['unit'] = df['unit'].replace(r'^\s*s\s*$', '', regex=True)
-df['floor'] = df['floor'].replace(r'^\s*s\s*$', '', regex=True)
-print("✅ Performed final clean-up of leftover characters.")
-
-# 7. Convert columns to numeric types before filtering
-print("🔧 Converting data types for filtering...")
-numeric_cols_to_filter = ['price', 'bedroom_count', 'property_age', 'saleable_area']
-for col in numeric_cols_to_filter:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
-
-# 8. Filter out rows with incomplete data or small area
-print("🧹 Filtering data based on your criteria...")
-initial_rows = len(df)
-
-# Define the columns that cannot be empty (ADDED 'distance' HERE)
-required_data_cols = ['price', 'bedroom_count', 'district', 'property_age', 'saleable_area']
-
-# Replace empty strings in 'distance' with NaN so dropna() catches them
-df['distance'] = df['distance'].replace(r'^\s*$', np.nan, regex=True)
-
-# Drop rows missing essential data
-df.dropna(subset=required_data_cols, inplace=True)
-
-# Filter for properties with a saleable area greater than 100
-df = df[df['saleable_area'] > 100].copy()
-final_rows = len(df)
-print(f"✅ Removed {initial_rows - final_rows} rows that did not meet the criteria.")
-
-# 9. Save the final cleaned and filtered data
-df.to_csv('cleaned_data/cleaned_centanet_data.csv', index=False)
-print("\n✨ Data cleaning, formatting, and filtering complete!")
-print("The final dataset has been saved to 'cleaned_data/cleaned_and_filtered_centanet_data.csv'")
\ No newline at end of file
+
+def repair_bedroom_counts(df):
+    """
+    Fills missing bedroom_count from "N Rooms" text that the scraper left in the
+    unit (or, failing that, the floor) column and removes it from there.
+
+    Operates on masked columns with vectorized string methods and returns the
+    number of repaired rows. Each row is repaired independently, so the
+    function can be applied chunk by chunk.
+    """
+    bedroom = df['bedroom_count']
+    missing = bedroom.isna() | (bedroom.astype(str).str.strip() == '')
+    from_unit = missing & _contains(df['unit'], ROOM_PATTERN)
+    from_floor = missing & ~from_unit & _contains(df['floor'], ROOM_PATTERN)
+
+    repaired = 0
+    for col, mask in (('unit', from_unit), ('floor', from_floor)):
+        if not mask.any():
+            continue
+        source = df.loc[mask, col]
+        if bedroom.dtype != object:
+            # Room counts are written back as strings, as the scraper stores them
+            df['bedroom_count'] = df['bedroom_count'].astype(object)
+            bedroom = df['bedroom_count']
+        df.loc[mask, 'bedroom_count'] = source.str.extract(r'(\d+)', expand=False)
+        df.loc[mask, col] = source.str.replace(ROOM_PATTERN, '', case=False, regex=True).str.strip()
+        repaired += int(mask.sum())
+    return repaired
+
+
+def fix_misplaced_flats(df):
+    """Moves 'FLAT ...' text from floor to an empty unit; returns the number of rows fixed."""
+    misplaced_flat_condition = (
+        (df['unit'].isnull()) | (df['unit'].str.strip() == '')
+    ) & (
+        df['floor'].str.contains('FLAT', na=False, case=False)
+    )
+    fix_count = misplaced_flat_condition.sum()
+    df.loc[misplaced_flat_condition, 'unit'] = df.loc[misplaced_flat_condition, 'floor']
+    df.loc[misplaced_flat_condition, 'floor'] = ''
+    return fix_count
+
+
+def clean_centanet_frame(df, verbose=True):
+    """Runs cleaning steps 2-8 on a raw scrape (or one chunk of it) and returns the result."""
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    with span('clean_frame', rows_in=len(df)) as frame_span:
+        # 2. Clean 'property_name' and 'distance' columns
+        with span('text_columns', rows_in=len(df)):
+            df['property_name'] = df['property_name'].str.replace('・', ' ', regex=False)
+            df['distance'] = df['distance'].str.replace('·', '', regex=False)
+        log("✅ Cleaned text columns.")
+
+        # 3. Clean the 'attribute' column for Excel compatibility
+        log("🔧 Cleaning the 'attribute' column for better display...")
+        with span('attributes', rows_in=len(df)):
+            df['attribute'] = clean_attribute_column(df['attribute'])
+
+        # 4. Correct and clean bedroom count information
+        with span('bedroom_counts', rows_in=len(df)) as s:
+            cleaned_count = repair_bedroom_counts(df)
+            s.set(repaired=int(cleaned_count))
+        log(f"✅ Corrected and cleaned {cleaned_count} bedroom records.")
+
+        # 5. Correct misplaced flat information
+        with span('misplaced_flats', rows_in=len(df)) as s:
+            fix_count = fix_misplaced_flats(df)
+            s.set(repaired=int(fix_count))
+        log(f"✅ Moved misplaced flat info for {fix_count} records.")
+
+        # 6. Final clean-up for leftover 's' characters
+        with span('leftover_characters', rows_in=len(df)):
+            df['unit'] = df['unit'].replace(r'^\s*s\s*$', '', regex=True)
+            df['floor'] = df['floor'].replace(r'^\s*s\s*$', '', regex=True)
+        log("✅ Performed final clean-up of leftover characters.")
+
+        # 7. Convert columns to numeric types before filtering
+        log("🔧 Converting data types for filtering...")
+        with span('numeric_types', rows_in=len(df)):
+            for col in NUMERIC_COLS_TO_FILTER:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        # 8. Filter out rows with incomplete data or small area
+        log("🧹 Filtering data based on your criteria...")
+        initial_rows = len(df)
+        with span('filter', rows_in=initial_rows) as s:
+            # Replace empty strings in 'distance' with NaN so dropna() catches them
+            df['distance'] = df['distance'].replace(r'^\s*$', np.nan, regex=True)
+
+            # Drop rows missing essential data
+            df.dropna(subset=REQUIRED_DATA_COLS, inplace=True)
+
+            # Filter for properties with a saleable area greater than 100
+            df = df[df['saleable_area'] > 100].copy()
+            s.rows_out = frame_span.rows_out = final_rows = len(df)
+        log(f"✅ Removed {initial_rows - final_rows} rows that did not meet the criteria.")
+    return df
+
+
+def clean_centanet_to_parquet(raw_path=RAW_PATH, out_dir=PARQUET_OUTPUT_DIR, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Streams the raw scrape into a Parquet dataset with categorical district and
+    property_name. Every raw column is read as text and the numeric columns
+    are always stored as float64, so all part files share one schema.
+    """
+    return stream_clean(
+        raw_path, out_dir,
+        transform=lambda chunk: clean_centanet_frame(chunk, verbose=False),
+        read_dtypes=str,
+        output_dtypes=dict.fromkeys(NUMERIC_COLS_TO_FILTER, 'float64'),
+        chunksize=chunksize,
+        encoding='utf-8',
+    )
+
+
+# --- Main Script ---
+if __name__ == '__main__':
+    # 1-8. Stream the original dataset through the cleaning steps chunk by chunk
+    configure('clean_centanet')
+    try:
+        print(f"🔧 Cleaning {RAW_PATH} in chunks of {DEFAULT_CHUNKSIZE} rows...")
+        with span('clean_to_parquet', source=RAW_PATH, output=PARQUET_OUTPUT_DIR) as s:
+            rows_in, rows_out = clean_centanet_to_parquet()
+            s.rows_in, s.rows_out = rows_in, rows_out
+    except FileNotFoundError:
+        print("❌ Error: 'centanet_data_2.csv' not found. Please make sure the script is in the same folder as your data file.")
+        exit()
+    print(f"✅ Removed {rows_in - rows_out} rows that did not meet the criteria.")
+
+    # 9. The final cleaned and filtered data is a Parquet dataset (one part file per chunk)
+    print("\n✨ Data cleaning, formatting, and filtering complete!")
+    print(f"The final dataset has been saved to '{PARQUET_OUTPUT_DIR}'")
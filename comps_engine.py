@@ -0,0 +1,285 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from mtr_routing import project_latlng
+
+"""
+Comparable-Sales (Comps) Engine
+
+Indexes historical transactions by location once (one cKDTree over
+easting/northing, as poi_engine.py does for POIs) and answers, for a batch of
+subject properties at a time, "the k nearest comparable sales within r metres".
+
+A comparable must match the subject on:
+    bedroom_count   within +/- bedroom_tolerance rooms (0 = same count)
+    saleable_area   within +/- area_band of the subject's area (0.2 = 80%-120%)
+    property_age    within +/- age_band years
+Any filter can be disabled with None; a subject missing an attribute is not
+filtered on it.
+
+Each batch is one tree query for the nearest `candidates` sales per subject
+within the radius. The filters are applied to all (subjects x candidates)
+pairs at once, and the first k passing sales per row are kept. Only subjects
+whose candidate list ran out before k comps passed are re-queried with a
+larger pool, so the result is exactly the k nearest passing sales.
+
+Each comp's price is adjusted to the subject through price per square foot:
+    adjusted_ppsf  = comp_ppsf * (subject_area / comp_area) ** -size_elasticity
+    adjusted_price = adjusted_ppsf * subject_area
+With size_elasticity=0 this is plain ppsf scaling; a positive value lets
+larger flats trade at a lower ppsf.
+
+    index = CompsIndex(transactions)                          # easting/northing or latitude/longitude
+    comps = index.query(subjects, k=10, radius=1000)
+    features = comps.features()                               # per-subject model features
+    review = comps.to_frame(index, subject_ids=subjects['property_name'])  # one row per comp
+
+    python comps_engine.py txn_df_easting_northing.csv subjects.csv comps_features.csv --k 10 --radius 1000
+"""
+
+ATTRIBUTE_COLS = ['bedroom_count', 'saleable_area', 'property_age']
+DEFAULT_K = 10
+DEFAULT_RADIUS_M = 1000
+BEDROOM_TOLERANCE = 0
+AREA_BAND = 0.2
+AGE_BAND = 10
+# Nearest sales fetched per subject before filtering; grown x4 for subjects that run short
+INITIAL_CANDIDATES = 64
+CANDIDATE_GROWTH = 4
+
+
+def coordinate_system(df):
+    return 'easting_northing' if {'easting', 'northing'}.issubset(df.columns) else 'latlng'
+
+
+def coordinates(df, system=None):
+    """
+    HK1980 easting/northing, or planar metres projected from latitude/longitude.
+    The two grids differ, so subjects must use the system the index was built with.
+    """
+    system = system or coordinate_system(df)
+    if system == 'easting_northing':
+        if not {'easting', 'northing'}.issubset(df.columns):
+            raise ValueError("The comps index uses easting/northing; subjects need those columns too")
+        return df[['easting', 'northing']].to_numpy(dtype=np.float64)
+    return project_latlng(df['latitude'], df['longitude'])
+
+
+def _numeric(df, col):
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+
+
+class CompsResult:
+    """
+    Comps for a batch of subjects as (subjects x k) arrays, nearest first.
+    Empty slots have position -1 and NaN values.
+    """
+
+    def __init__(self, positions, distance_m, price, ppsf, adjusted_ppsf, adjusted_price):
+        self.positions = positions
+        self.distance_m = distance_m
+        self.price = price
+        self.ppsf = ppsf
+        self.adjusted_ppsf = adjusted_ppsf
+        self.adjusted_price = adjusted_price
+        self.count = (positions >= 0).sum(axis=1)
+
+    def features(self, prefix='comps_'):
+        """Per-subject summary features (NaN where a subject has no comps)."""
+        has_comps = self.count > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Inverse-distance weights; the 1 m floor keeps same-building comps finite
+            weights = np.where(self.positions >= 0, 1.0 / np.maximum(self.distance_m, 1.0), 0.0)
+            weighted_ppsf = np.nansum(weights * np.nan_to_num(self.adjusted_ppsf), axis=1) / weights.sum(axis=1)
+        empty = np.full(len(self.count), np.nan)
+
+        def reduce(fn, values):
+            out = empty.copy()
+            if has_comps.any():
+                out[has_comps] = fn(values[has_comps], axis=1)
+            return out
+
+        return pd.DataFrame({
+            f'{prefix}count': self.count,
+            f'{prefix}median_ppsf': reduce(np.nanmedian, self.ppsf),
+            f'{prefix}median_adjusted_ppsf': reduce(np.nanmedian, self.adjusted_ppsf),
+            f'{prefix}idw_adjusted_ppsf': np.where(has_comps, weighted_ppsf, np.nan),
+            f'{prefix}median_adjusted_price': reduce(np.nanmedian, self.adjusted_price),
+            f'{prefix}median_distance_m': reduce(np.nanmedian, self.distance_m),
+        })
+
+    def to_frame(self, index, subject_ids=None, columns=None):
+        """
+        Long format for appraiser review: one row per (subject, comp) with the
+        comp's transaction columns, its distance and adjusted price.
+        """
+        rows, ranks = np.nonzero(self.positions >= 0)
+        positions = self.positions[rows, ranks]
+        subject = np.arange(len(self.positions))[rows] if subject_ids is None else np.asarray(subject_ids)[rows]
+        transactions = index.transactions if columns is None else index.transactions[columns]
+        comps = transactions.iloc[positions].reset_index(drop=True)
+        comps.insert(0, 'subject', subject)
+        comps.insert(1, 'rank', ranks + 1)
+        comps.insert(2, 'distance_m', self.distance_m[rows, ranks].round(1))
+        comps['ppsf'] = self.ppsf[rows, ranks]
+        comps['adjusted_ppsf'] = self.adjusted_ppsf[rows, ranks]
+        comps['adjusted_price'] = self.adjusted_price[rows, ranks]
+        return comps
+
+
+class CompsIndex:
+    """Spatial index over historical transactions."""
+
+    def __init__(self, transactions, workers=-1):
+        self.coordinate_system = coordinate_system(transactions)
+        coords = coordinates(transactions, self.coordinate_system)
+        price = _numeric(transactions, 'price')
+        area = _numeric(transactions, 'saleable_area')
+        # Only sales with a location, a price and an area can serve as comps
+        usable = np.isfinite(coords).all(axis=1) & (price > 0) & (area > 0)
+        self.transactions = transactions[usable].reset_index(drop=True)
+        self.coords = coords[usable]
+        self.price = price[usable]
+        self.area = area[usable]
+        self.ppsf = self.price / self.area
+        self.bedrooms = _numeric(self.transactions, 'bedroom_count')
+        self.age = _numeric(self.transactions, 'property_age')
+        self.workers = workers
+        self.tree = cKDTree(self.coords)
+
+    def __len__(self):
+        return len(self.coords)
+
+    def _candidates(self, coords, n_candidates, radius):
+        n_candidates = min(n_candidates, len(self))
+        distance, position = self.tree.query(coords, k=n_candidates, distance_upper_bound=radius, workers=self.workers)
+        if n_candidates == 1:
+            distance, position = distance[:, None], position[:, None]
+        return distance, position
+
+    def _select(self, distance, position, subject, k, bedroom_tolerance, area_band, age_band, exclude):
+        """First k candidates per row passing every filter -> (positions, distances), -1 / inf padded."""
+        found = position < len(self)
+        pos = np.where(found, position, 0)
+        passes = found
+        if bedroom_tolerance is not None:
+            passes = passes & ~(np.abs(self.bedrooms[pos] - subject['bedrooms'][:, None]) > bedroom_tolerance)
+        if area_band is not None:
+            area = subject['area'][:, None]
+            passes = passes & ~((self.area[pos] < area * (1 - area_band)) | (self.area[pos] > area * (1 + area_band)))
+        if age_band is not None:
+            passes = passes & ~(np.abs(self.age[pos] - subject['age'][:, None]) > age_band)
+        if exclude is not None:
+            passes = passes & (pos != exclude[:, None])
+
+        # Stable sort keeps distance order among the passing candidates
+        order = np.argsort(~passes, axis=1, kind='stable')[:, :k]
+        chosen = np.take_along_axis(passes, order, axis=1)
+        positions = np.where(chosen, np.take_along_axis(pos, order, axis=1), -1)
+        distances = np.where(chosen, np.take_along_axis(distance, order, axis=1), np.inf)
+        # The pool is capped at the index size, so a small index yields fewer than k columns
+        short = k - positions.shape[1]
+        if short > 0:
+            positions = np.pad(positions, ((0, 0), (0, short)), constant_values=-1)
+            distances = np.pad(distances, ((0, 0), (0, short)), constant_values=np.inf)
+        # More comps may exist beyond the candidate pool if it was full out to the radius
+        exhausted = ~found[:, -1] | (position.shape[1] >= len(self))
+        return positions, distances, exhausted
+
+    def query(self, subjects, k=DEFAULT_K, radius=DEFAULT_RADIUS_M, bedroom_tolerance=BEDROOM_TOLERANCE,
+              area_band=AREA_BAND, age_band=AGE_BAND, size_elasticity=0.0, exclude=None,
+              candidates=INITIAL_CANDIDATES):
+        """
+        k nearest comparable sales within radius metres for every subject.
+
+        exclude: optional index position per subject (-1 for none) that may not
+        be returned, e.g. the subject's own sale when building model features
+        on the transactions themselves.
+        """
+        coords = coordinates(subjects, self.coordinate_system)
+        n = len(coords)
+        subject = {
+            'bedrooms': _numeric(subjects, 'bedroom_count'),
+            'area': _numeric(subjects, 'saleable_area'),
+            'age': _numeric(subjects, 'property_age'),
+        }
+        exclude = None if exclude is None else np.asarray(exclude, dtype=np.int64)
+        positions = np.full((n, k), -1, dtype=np.int64)
+        distances = np.full((n, k), np.inf)
+
+        # Subjects without coordinates get no comps
+        pending = np.flatnonzero(np.isfinite(coords).all(axis=1))
+        n_candidates = max(candidates, k + (exclude is not None))
+        while len(pending) and len(self):
+            distance, position = self._candidates(coords[pending], n_candidates, radius)
+            sub = {name: values[pending] for name, values in subject.items()}
+            p, d, exhausted = self._select(distance, position, sub, k, bedroom_tolerance, area_band, age_band,
+                                           None if exclude is None else exclude[pending])
+            done = exhausted | (p[:, -1] >= 0)
+            positions[pending[done]], distances[pending[done]] = p[done], d[done]
+            pending = pending[~done]
+            n_candidates *= CANDIDATE_GROWTH
+
+        found = positions >= 0
+        take = np.where(found, positions, 0)
+        ppsf = np.where(found, self.ppsf[take], np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            size_ratio = subject['area'][:, None] / self.area[take]
+            adjusted_ppsf = np.where(found, ppsf * size_ratio ** -size_elasticity, np.nan)
+        return CompsResult(
+            positions=positions,
+            distance_m=np.where(found, distances, np.nan),
+            price=np.where(found, self.price[take], np.nan),
+            ppsf=ppsf,
+            adjusted_ppsf=adjusted_ppsf,
+            adjusted_price=adjusted_ppsf * subject['area'][:, None],
+        )
+
+    def self_features(self, prefix='comps_', **query_kwargs):
+        """Comps features for every indexed transaction, never using the sale itself (leave-one-out)."""
+        comps = self.query(self.transactions, exclude=np.arange(len(self)), **query_kwargs)
+        return comps.features(prefix)
+
+
+def _band(value):
+    return None if value is None or value < 0 else value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Comparable-sales lookup for a file of subject properties')
+    parser.add_argument('transactions_csv', help='historical sales with easting/northing (or latitude/longitude)')
+    parser.add_argument('subjects_csv')
+    parser.add_argument('output_csv')
+    parser.add_argument('--k', type=int, default=DEFAULT_K)
+    parser.add_argument('--radius', type=float, default=DEFAULT_RADIUS_M, help='metres')
+    parser.add_argument('--bedroom-tolerance', type=int, default=BEDROOM_TOLERANCE, help='-1 disables')
+    parser.add_argument('--area-band', type=float, default=AREA_BAND, help='fraction; -1 disables')
+    parser.add_argument('--age-band', type=float, default=AGE_BAND, help='years; -1 disables')
+    parser.add_argument('--size-elasticity', type=float, default=0.0)
+    parser.add_argument('--review', action='store_true', help='write one row per comp instead of features')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = CompsIndex(pd.read_csv(args.transactions_csv))
+    subjects = pd.read_csv(args.subjects_csv)
+    print(f"Indexed {len(index)} transactions in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    comps = index.query(subjects, k=args.k, radius=args.radius, bedroom_tolerance=_band(args.bedroom_tolerance),
+                        area_band=_band(args.area_band), age_band=_band(args.age_band),
+                        size_elasticity=args.size_elasticity)
+    seconds = time.perf_counter() - start
+    print(f"✅ Found comps for {len(subjects)} subjects in {seconds:.2f}s ({len(subjects) / seconds:,.0f} subjects/s); "
+          f"{(comps.count == 0).sum()} without any comp")
+
+    if args.review:
+        comps.to_frame(index).to_csv(args.output_csv, index=False)
+    else:
+        pd.concat([subjects.reset_index(drop=True), comps.features()], axis=1).to_csv(args.output_csv, index=False)
+    print(f"Saved to '{args.output_csv}'")
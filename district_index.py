@@ -0,0 +1,174 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+"""
+District Name Normalization Index
+
+Maps raw district / housing-market-area names to their main district
+(dictionary.txt's {district: [areas]} structure, as used by tidy_sale.py).
+The index is built once:
+
+    aliases     normalized name -> main district, for every district and area
+                name and each '/'-separated part of an area name
+    trigrams    trigram -> alias ids, for the fuzzy fallback
+
+Normalization (NFKC, '・' and punctuation to spaces, lowercase, collapsed
+whitespace) makes 'Tsim Sha Tsui', 'TSIM SHA TSUI ' and 'Tsim・Sha Tsui'
+the same key. A raw value is looked up by its part before '/' first (as
+tidy_sale.py always did), then by its other parts, then by the whole
+value; only if all of those miss is it scored against the trigram index.
+
+A fuzzy hit is only a candidate: near-identical names can be different
+places ('Sai Wan' is not 'Sai Wan Ho', 'Mid-Levels East' is not
+'Mid-Levels West'). By default it fills candidate_district (for the review
+file) and leaves main_district empty, as the exact lookup did. With
+accept_fuzzy=True it is written to main_district only when it looks like a
+misspelling rather than another place: Dice similarity of at least
+accept_confidence, a min_margin lead over the best alias of any other
+district, the same number of words, and no differing word that is a
+qualifier such as 'East' or 'Upper'.
+
+Columns are mapped by factorizing to unique values first, so a
+multi-million-row transaction file costs one lookup per distinct name:
+
+    index = DistrictIndex(load_district_dictionary())
+    matches = index.map_column(sale_df['district'])   # MATCH_COLUMNS
+"""
+
+# Similarity for a fuzzy candidate to be reported at all
+MIN_CONFIDENCE = 0.75
+# ... and, with accept_fuzzy=True, to be used as the main district
+ACCEPT_CONFIDENCE = 0.85
+MIN_MARGIN = 0.1
+# Words that name a different place when they differ, not a typo
+QUALIFIER_WORDS = {'east', 'west', 'north', 'south', 'central', 'upper', 'lower', 'new', 'old', 'mid', 'levels'}
+# Characters treated as word separators before matching
+SEPARATOR_PATTERN = re.compile(r"[・·\-_,.()'’&]+")
+WHITESPACE_PATTERN = re.compile(r'\s+')
+MATCH_COLUMNS = ['main_district', 'matched_alias', 'confidence', 'method', 'candidate_district']
+
+
+def normalize_name(name):
+    """Matching key for a district / area name ('' for non-strings)."""
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKC', name)
+    name = SEPARATOR_PATTERN.sub(' ', name).lower()
+    return WHITESPACE_PATTERN.sub(' ', name).strip()
+
+
+def same_shape(key, alias_key):
+    """True when two normalized names differ only inside words, not by a missing, extra or qualifier word."""
+    words, alias_words = key.split(' '), alias_key.split(' ')
+    if len(words) != len(alias_words):
+        return False
+    return not any(a != b and (a in QUALIFIER_WORDS or b in QUALIFIER_WORDS) for a, b in zip(words, alias_words))
+
+
+def trigrams(key):
+    """Set of character trigrams of a normalized key, padded so short names still have some."""
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DistrictIndex:
+    """Exact alias lookup plus trigram fuzzy fallback over one district dictionary."""
+
+    def __init__(self, hong_kong_districts, min_confidence=MIN_CONFIDENCE, accept_fuzzy=False,
+                 accept_confidence=ACCEPT_CONFIDENCE, min_margin=MIN_MARGIN):
+        self.min_confidence = min_confidence
+        self.accept_fuzzy = accept_fuzzy
+        self.accept_confidence = accept_confidence
+        self.min_margin = min_margin
+        self.aliases = {}
+        # Same precedence as tidy_sale.clean_district_name: full area names (a later
+        # area wins a clash), then district names over areas, then the parts of
+        # 'Area / Alias' names where they don't clash with either
+        for district, areas in hong_kong_districts.items():
+            for area in areas:
+                self.aliases[normalize_name(area)] = (district, area)
+        for district in hong_kong_districts:
+            self.aliases[normalize_name(district)] = (district, district)
+        for district, areas in hong_kong_districts.items():
+            for area in areas:
+                if '/' in area:
+                    for part in area.split('/'):
+                        self.aliases.setdefault(normalize_name(part), (district, area))
+        self.aliases.pop('', None)
+
+        self.alias_keys = list(self.aliases)
+        self.alias_districts = np.array([self.aliases[key][0] for key in self.alias_keys], dtype=object)
+        self.alias_sizes = np.empty(len(self.alias_keys), dtype=np.int64)
+        postings = defaultdict(list)
+        for alias_id, key in enumerate(self.alias_keys):
+            grams = trigrams(key)
+            self.alias_sizes[alias_id] = len(grams)
+            for gram in grams:
+                postings[gram].append(alias_id)
+        self.postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def _fuzzy(self, key):
+        """
+        (alias key, Dice similarity, margin) of the closest alias by shared
+        trigrams, where margin is how far it beats the closest alias of any
+        other district; (None, 0.0, 0.0) if no trigram is shared.
+        """
+        grams = trigrams(key)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return None, 0.0, 0.0
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.alias_keys))
+        dice = 2.0 * shared / (len(grams) + self.alias_sizes)
+        best = int(np.argmax(dice))
+        others = dice[self.alias_districts != self.alias_districts[best]]
+        runner_up = float(others.max()) if others.size else 0.0
+        return self.alias_keys[best], float(dice[best]), float(dice[best]) - runner_up
+
+    def match(self, name):
+        """MATCH_COLUMNS for one raw value."""
+        if name in self._cache:
+            return self._cache[name]
+        result = (None, None, 0.0, None, None)
+        if isinstance(name, str):
+            parts = [normalize_name(part) for part in name.split('/')] + [normalize_name(name)]
+            for key in parts:
+                if key in self.aliases:
+                    district, alias = self.aliases[key]
+                    result = (district, alias, 1.0, 'exact', district)
+                    break
+            else:
+                key = normalize_name(name.split('/')[0]) or normalize_name(name)
+                if key:
+                    alias_key, confidence, margin = self._fuzzy(key)
+                    if alias_key is not None and confidence >= self.min_confidence:
+                        district, alias = self.aliases[alias_key]
+                        accepted = (self.accept_fuzzy and confidence >= self.accept_confidence
+                                    and margin >= self.min_margin and same_shape(key, alias_key))
+                        result = (district if accepted else None, alias, round(confidence, 3), 'fuzzy', district)
+        self._cache[name] = result
+        return result
+
+    def map_column(self, values):
+        """
+        Match a whole column: one lookup per distinct value, broadcast back to
+        every row. Returns a frame aligned with `values` with MATCH_COLUMNS;
+        rows without a main district have main_district None (fuzzy candidates
+        keep their candidate_district and confidence, others confidence 0).
+        """
+        values = pd.Series(values)
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        matched = [self.match(name) for name in uniques]
+        matched.append((None, None, 0.0, None, None))  # code -1 (missing) picks this row
+        table = pd.DataFrame(matched, columns=MATCH_COLUMNS)
+        out = table.iloc[codes].reset_index(drop=True)
+        out.index = values.index
+        out['confidence'] = out['confidence'].astype(np.float64)
+        return out
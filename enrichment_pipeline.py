@@ -0,0 +1,290 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+try:
+    from googlemaps import exceptions as gmaps_errors
+except ImportError:  # only the fake client (fake_gmaps.py) is available
+    gmaps_errors = None
+
+"""
+Concurrent Google Maps Enrichment Pipeline
+
+Replaces the row-by-row loop of google_maps_feature_eng.py. Rows are first
+collapsed to unique buildings; each building is geocoded once, then the CBD-transit, nearest-MTR walking and amenity-count
+stages run as independent concurrent tasks. Every outgoing API request goes
+through a shared token bucket, transient failures (timeouts, 5xx, quota) are
+retried with exponential backoff, and finished rows are appended to a
+JSON-lines checkpoint so an interrupted run resumes where it stopped. A row
+with a stage that still failed is not checkpointed, so the next run retries it.
+"""
+
+CENTRAL_LOCATION = "Central, Hong Kong"
+# Maps API statuses that a later attempt can succeed on
+RETRYABLE_API_STATUSES = {'OVER_QUERY_LIMIT', 'UNKNOWN_ERROR'}
+
+# Define categories with their specific search radius
+POI_CONFIG = {
+    'school_count': {'types': ['primary_school', 'secondary_school', 'university'], 'radius': 2000},
+    'hospital_count': {'types': ['hospital'], 'radius': 2000},
+    'park_count': {'types': ['park'], 'radius': 1000},
+    'shopping_mall_count': {'types': ['shopping_mall'], 'radius': 1000}
+}
+
+
+def feature_columns(poi_config=POI_CONFIG):
+    """Columns produced for every enriched row, in output order."""
+    return (['latitude', 'longitude', 'travel_time_to_cbd', 'walking_time_to_mtr'] +
+            [f'{k}_{v["radius"]}m' for k, v in poi_config.items()])
+
+
+def calls_per_key(poi_config=POI_CONFIG):
+    """API requests needed to enrich one building (geocode, CBD, MTR search + walk, amenities)."""
+    return 4 + sum(len(config['types']) for config in poi_config.values())
+
+
+# --- Deduplication ---
+
+def dedupe_keys(df, key_cols):
+    """
+    Collapses rows to their unique key combinations.
+
+    Returns (codes, uniques): `codes[i]` is the position of row i's key in the
+    `uniques` DataFrame, so per-key results can be fanned back out to rows with
+    a single take().
+    """
+    codes = df.groupby(key_cols, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    first_rows = pd.Series(np.arange(len(df))).groupby(codes).first().to_numpy()
+    uniques = df[key_cols].iloc[first_rows].reset_index(drop=True)
+    return codes, uniques
+
+
+def fan_out(unique_results, codes):
+    """Expands a per-key result frame (one row per key, in key order) to per-row."""
+    return unique_results.take(codes).reset_index(drop=True)
+
+
+def report_dedup(n_rows, n_keys, requests_per_key=None):
+    """Prints how much work collapsing rows to unique keys saved."""
+    saved = n_rows - n_keys
+    pct = saved / n_rows * 100 if n_rows else 0.0
+    print(f"Deduplicated {n_rows} rows to {n_keys} unique keys; {saved} rows ({pct:.1f}%) reuse another row's result.")
+    if requests_per_key:
+        print(f"  - API requests avoided: up to {saved * requests_per_key}")
+
+
+# --- Rate limiting and retries ---
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` requests/s with bursts of `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable(error):
+    """True for transient failures: timeouts, lost connections, HTTP 5xx / 429 and quota errors."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if gmaps_errors is None:
+        return False
+    if isinstance(error, gmaps_errors.HTTPError):
+        return error.status_code >= 500 or error.status_code == 429
+    if isinstance(error, (gmaps_errors.Timeout, gmaps_errors.TransportError)):
+        return True
+    return isinstance(error, gmaps_errors.ApiError) and error.status in RETRYABLE_API_STATUSES
+
+
+def call_with_retry(fn, *args, retries=4, base_delay=0.5, **kwargs):
+    """Calls fn, retrying transient failures (is_retryable) with exponential backoff and jitter."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            time.sleep(base_delay * (2 ** attempt) * (1 + random.random()))
+
+
+class RateLimitedClient:
+    """Wraps a Maps client so every request waits for a token and is retried."""
+
+    def __init__(self, client, requests_per_second=40, retries=4, base_delay=0.5):
+        self.client = client
+        self.bucket = TokenBucket(requests_per_second)
+        self.retries = retries
+        self.base_delay = base_delay
+
+    def _call(self, method, *args, **kwargs):
+        def attempt():
+            self.bucket.acquire()
+            return getattr(self.client, method)(*args, **kwargs)
+        return call_with_retry(attempt, retries=self.retries, base_delay=self.base_delay)
+
+    def geocode(self, address, **kwargs):
+        return self._call('geocode', address, **kwargs)
+
+    def directions(self, origin, destination, **kwargs):
+        return self._call('directions', origin, destination, **kwargs)
+
+    def places_nearby(self, **kwargs):
+        return self._call('places_nearby', **kwargs)
+
+
+# --- Checkpointing ---
+
+class Checkpoint:
+    """Append-only JSON-lines file of finished results keyed by a string key."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def load(self):
+        """Returns {key: result} for every complete line already on disk."""
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A torn final line from a crashed run
+                done[record['key']] = record['result']
+        return done
+
+    def append(self, key, result):
+        line = json.dumps({'key': key, 'result': result}, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+# --- Enrichment stages ---
+
+def _minutes(directions):
+    if directions:
+        return round(directions[0]['legs'][0]['duration']['value'] / 60)
+    return np.nan
+
+
+def stage_travel_time_to_cbd(client, origin_coords, departure_time):
+    directions = client.directions(origin_coords, CENTRAL_LOCATION, mode="transit", departure_time=departure_time)
+    return {'travel_time_to_cbd': _minutes(directions)}
+
+
+def stage_walking_time_to_mtr(client, origin_coords):
+    nearby_mtr = client.places_nearby(location=origin_coords, rank_by='distance', type='subway_station')
+    if not (nearby_mtr and nearby_mtr.get('results')):
+        return {'walking_time_to_mtr': np.nan}
+    station_coords = nearby_mtr['results'][0]['geometry']['location']
+    directions = client.directions(origin_coords, (station_coords['lat'], station_coords['lng']), mode="walking")
+    return {'walking_time_to_mtr': _minutes(directions)}
+
+
+def stage_amenity_count(client, origin_coords, category_name, config):
+    total_places = 0
+    for place_type in config['types']:
+        response = client.places_nearby(location=origin_coords, radius=config['radius'], type=place_type)
+        total_places += len(response.get('results', []))
+    return {f'{category_name}_{config["radius"]}m': total_places}
+
+
+def enrich_one(client, query, departure_time, stage_pool, poi_config=POI_CONFIG):
+    """
+    Geocodes one query, then runs the remaining stages concurrently. Returns
+    (row_data, failed): the names of stages that raised, whose columns are NaN.
+    """
+    row_data = {col: np.nan for col in feature_columns(poi_config)}
+    geocode_result = client.geocode(query)
+    if not geocode_result:
+        return row_data, []
+
+    lat = geocode_result[0]['geometry']['location']['lat']
+    lng = geocode_result[0]['geometry']['location']['lng']
+    row_data['latitude'], row_data['longitude'] = lat, lng
+    origin_coords = (lat, lng)
+
+    futures = {
+        'travel_time_to_cbd': stage_pool.submit(stage_travel_time_to_cbd, client, origin_coords, departure_time),
+        'walking_time_to_mtr': stage_pool.submit(stage_walking_time_to_mtr, client, origin_coords),
+    }
+    for name, config in poi_config.items():
+        futures[name] = stage_pool.submit(stage_amenity_count, client, origin_coords, name, config)
+    failed = []
+    for stage, future in futures.items():
+        try:
+            row_data.update(future.result())
+        except Exception as e:
+            # A failed stage leaves its columns as NaN instead of losing the row
+            print(f"  - ERROR: stage {stage} failed for '{query}': {e}")
+            failed.append(stage)
+    return row_data, failed
+
+
+def run_enrichment(queries, client, departure_time, checkpoint_path=None, max_concurrency=8,
+                   poi_config=POI_CONFIG, progress_every=100):
+    """
+    Enriches {key: query} concurrently and returns {key: row_data}.
+
+    Keys already present in the checkpoint are not requested again. A row with
+    a failed stage is returned with NaN there but not checkpointed, so the next
+    run requests it again. Rows are processed by `max_concurrency` workers; their stages share a second pool
+    so a row never waits on a worker it is itself occupying.
+    """
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+    incomplete = 0
+    results = checkpoint.load() if checkpoint else {}
+    pending = {key: query for key, query in queries.items() if key not in results}
+    if results:
+        print(f"Resuming from checkpoint: {len(results)} done, {len(pending)} remaining.")
+
+    stage_workers = max_concurrency * (2 + len(poi_config))
+    with ThreadPoolExecutor(max_workers=stage_workers) as stage_pool, \
+            ThreadPoolExecutor(max_workers=max_concurrency) as row_pool:
+        futures = {
+            row_pool.submit(enrich_one, client, query, departure_time, stage_pool, poi_config): key
+            for key, query in pending.items()
+        }
+        for n, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            try:
+                row_data, failed = future.result()
+            except Exception as e:
+                print(f"  - ERROR: An unexpected error occurred for '{pending[key]}': {e}")
+                continue  # Not checkpointed, so the next run retries it
+            results[key] = row_data
+            if failed:
+                incomplete += 1  # Not checkpointed either
+            elif checkpoint:
+                checkpoint.append(key, row_data)
+            if progress_every and n % progress_every == 0:
+                print(f"  - Processed {n}/{len(pending)}")
+    if incomplete:
+        print(f"{incomplete} rows have failed stages (NaN); they are not checkpointed and are retried on the next run.")
+    return results
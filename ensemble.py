@@ -0,0 +1,80 @@
+import numpy as np
+
+"""
+Majority-Weighted Ensemble
+
+Vectorized version of calculate_ensemble_predicted from model_v2.ipynb. Four
+meta-classifiers (LGBM/XGB/CatBoost/RF) each vote for the base model they
+expect to be most accurate on a row. The most-voted model gets weight 0.5 and
+the other voted-for models share the remaining 0.5 equally; if every vote
+agrees, that model's prediction is used alone.
+
+Ties are broken the way pandas value_counts() breaks them: among models with
+the same number of votes, the one voted for first (LGBM, XGB, CB, RF column
+order) ranks higher. Weighted terms are summed in that same rank order, so the
+result is bit-for-bit identical to the row-wise apply.
+"""
+
+# Base models, in the order of the prediction matrix columns
+MODELS = ['LGBM', 'XGB', 'CatBoost', 'RF']
+MODEL_TO_PRED = {
+    'LGBM': 'lgbm_predicted',
+    'XGB': 'xgb_predicted',
+    'CatBoost': 'catboost_predicted',
+    'RF': 'rf_predicted'
+}
+# Meta-classifier vote columns, in the order they are counted
+VOTE_COLS = ['LGBM_predict', 'XGB_predict', 'CB_predict', 'RF_predict']
+
+
+def encode_votes(votes, models=MODELS):
+    """Maps an (n x k) array of model labels to integer codes; missing or unknown labels become -1."""
+    votes = np.asarray(votes, dtype=object)
+    codes = np.full(votes.shape, -1, dtype=np.int8)
+    for code, model in enumerate(models):
+        codes[votes == model] = code
+    return codes
+
+
+def majority_weighted_ensemble(votes, predictions, models=MODELS):
+    """
+    votes: (n x k) model labels (or integer codes into `models`) from the meta-classifiers.
+    predictions: (n x len(models)) base-model predictions, columns in `models` order.
+    Returns the ensemble prediction per row (NaN where no vote is present).
+    """
+    votes = np.asarray(votes)
+    codes = votes.astype(np.int64) if np.issubdtype(votes.dtype, np.integer) else encode_votes(votes, models)
+    predictions = np.asarray(predictions, dtype=np.float64)
+    n, k = codes.shape
+    m = len(models)
+
+    # counts[i, j]: votes for model j; first[i, j]: position of its first vote (k if none)
+    hits = codes[:, :, None] == np.arange(m)[None, None, :]
+    counts = hits.sum(axis=1)
+    first = np.where(hits.any(axis=1), hits.argmax(axis=1), k)
+
+    # Rank models by votes (desc) then first appearance (asc), as value_counts() does
+    order = np.argsort(first - counts * (k + 1), axis=1, kind='stable')
+    voted = np.take_along_axis(counts, order, axis=1) > 0
+    ranked_preds = np.take_along_axis(predictions, order, axis=1)
+    n_voted = voted.sum(axis=1)
+
+    ensemble = 0.5 * ranked_preds[:, 0]
+    remaining_weight = np.divide(0.5, n_voted - 1, out=np.zeros(n), where=n_voted > 1)
+    for r in range(1, m):
+        ensemble = np.where(voted[:, r], ensemble + remaining_weight * ranked_preds[:, r], ensemble)
+
+    # Unanimous rows use the single chosen model's prediction as-is
+    ensemble = np.where(n_voted == 1, ranked_preds[:, 0], ensemble)
+    return np.where(n_voted == 0, np.nan, ensemble)
+
+
+def add_ensemble_prediction(df, vote_cols=VOTE_COLS, model_to_pred=MODEL_TO_PRED, column='ensemble_predicted'):
+    """Adds the ensemble column to a combined_df-shaped frame, replacing the row-wise apply."""
+    models = list(model_to_pred)
+    df[column] = majority_weighted_ensemble(
+        df[vote_cols].to_numpy(dtype=object),
+        df[[model_to_pred[model] for model in models]].to_numpy(dtype=np.float64),
+        models,
+    )
+    return df
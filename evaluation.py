@@ -0,0 +1,324 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import GroupKFold, KFold
+
+from feature_store import FeatureSet, FeatureStore
+from property_schema import read_dataset
+from tuning import DATA_PATH, DISTRICT_ENCODING, FAMILIES, best_params, model_features, split_cores
+
+"""
+Cross-Validated Model Evaluation
+
+Shared replacement for evaluate_model() in model_v2.ipynb and
+pca_vs_not_eval.ipynb, which scored one train_test_split(random_state=42)
+per model. Here every configuration (model family or scikit-learn estimator,
+feature columns, district encoding) is scored on every fold of
+
+    kfold       shuffled K-fold over rows
+    district    whole districts held out together (GroupKFold), so a model is
+                scored on areas it never saw in training
+
+Each (configuration, fold) fit is one task for a pool of spawned worker
+processes. The features come from the feature store and the fold numbers
+from a .npy file, both opened memory-mapped, so every worker reads one shared
+copy through the page cache; only the test-fold predictions travel back.
+
+Metrics of all configurations come out of one regression_metrics() call per
+fold on the (rows x configurations) prediction matrix: R², RMSE, MAE, MAPE,
+MdAPE and the share of predictions within 10 / 20 / 30% of the price. The
+absolute percentage errors are sorted once per column, which gives the
+median directly and each accuracy band by binary search.
+
+    features = load_features()
+    folds = district_folds(features.codes('district'))
+    summary, fold_metrics, predictions = cross_validate(features, {'lgbm': {'model': 'lgbm'}}, folds)
+    python evaluation.py --families lgbm xgb rf --schemes kfold district --folds 5 --workers 4
+"""
+
+ACCURACY_BANDS = (0.1, 0.2, 0.3)
+DEFAULT_FOLDS = 5
+SCHEMES = ['kfold', 'district']
+BLOCK_COLUMN = 'district'
+OUTPUT_PATH = 'cv_results/cv_summary.csv'
+# Fixed, moderate settings per family; a config's 'params' (e.g. tuning.best_params) override them
+DEFAULT_PARAMS = {
+    'lgbm': {'n_estimators': 200, 'learning_rate': 0.05, 'num_leaves': 31},
+    'xgb': {'n_estimators': 200, 'learning_rate': 0.05, 'max_depth': 6},
+    'catboost': {'iterations': 200, 'learning_rate': 0.05, 'depth': 6},
+    'rf': {'n_estimators': 100},
+    'svr': {'C': 100.0, 'epsilon': 0.1},
+}
+
+
+def band_column(band):
+    return f'accuracy_{round(band * 100)}'
+
+
+METRIC_COLUMNS = ['r2', 'rmse', 'mae', 'mape', 'mdape'] + [band_column(b) for b in ACCURACY_BANDS]
+
+
+# --- Metrics ---
+
+def regression_metrics(y_true, y_pred, bands=ACCURACY_BANDS, inclusive=True):
+    """
+    R², RMSE, MAE, MAPE, MdAPE (both in %) and accuracy bands (% of rows whose
+    absolute percentage error is <= each band, or < with inclusive=False) of
+    one or many prediction columns against one target. Returns a DataFrame
+    with one row per column of y_pred (indexed by its column names for a
+    DataFrame). Percentage errors divide by |y| floored at machine epsilon,
+    as scikit-learn's MAPE does.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    names = list(y_pred.columns) if isinstance(y_pred, pd.DataFrame) else None
+    pred = np.asarray(y_pred, dtype=np.float64)
+    if pred.ndim == 1:
+        pred = pred[:, None]
+    n = len(y_true)
+
+    error = pred - y_true[:, None]
+    abs_error = np.abs(error)
+    sse = np.einsum('ij,ij->j', error, error)
+    sst = np.sum((y_true - y_true.mean()) ** 2)
+    ape = abs_error / np.maximum(np.abs(y_true), np.finfo(np.float64).eps)[:, None]
+    # Sorted once: the median is the middle row and each band a binary search
+    ape.sort(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        metrics = {
+            'r2': 1 - sse / sst,
+            'rmse': np.sqrt(sse / n),
+            'mae': abs_error.mean(axis=0),
+            'mape': ape.mean(axis=0) * 100,
+            'mdape': (ape[(n - 1) // 2] + ape[n // 2]) / 2 * 100,
+        }
+    side = 'right' if inclusive else 'left'
+    for band in bands:
+        within = [np.searchsorted(ape[:, j], band, side=side) for j in range(ape.shape[1])]
+        metrics[band_column(band)] = np.asarray(within) / n * 100
+    return pd.DataFrame(metrics, index=names)
+
+
+def evaluate_model(model, X_test, y_test, model_name, inclusive=False, verbose=True):
+    """
+    The notebooks' evaluate_model(): predicts X_test and returns model_name,
+    the regression_metrics and y_pred as one dict. inclusive=False counts
+    'error < 10%' as model_v2.ipynb did; pca_vs_not_eval.ipynb used <=.
+    """
+    y_pred = model.predict(X_test)
+    metrics = regression_metrics(y_test, y_pred, inclusive=inclusive).iloc[0].to_dict()
+    if verbose:
+        bound = '<=' if inclusive else '<'
+        print(f"\n--- {model_name} Performance ---")
+        print(f"R-squared: {metrics['r2']:.4f}")
+        print(f"RMSE: {metrics['rmse']:,.2f}")
+        print(f"MAE: {metrics['mae']:,.2f}")
+        print(f"MAPE: {metrics['mape']:.2f}%  MdAPE: {metrics['mdape']:.2f}%")
+        for band in ACCURACY_BANDS:
+            print(f"Accuracy (error {bound} {band:.0%}): {metrics[band_column(band)]:.2f}%")
+    return {'model_name': model_name, **metrics, 'y_pred': y_pred}
+
+
+# --- Folds ---
+
+def kfold_folds(n_rows, n_splits=DEFAULT_FOLDS, seed=42):
+    """Fold number of every row under shuffled K-fold."""
+    folds = np.empty(n_rows, dtype=np.int16)
+    for fold, (_, test) in enumerate(KFold(n_splits, shuffle=True, random_state=seed).split(np.empty(n_rows))):
+        folds[test] = fold
+    return folds
+
+
+def district_folds(groups, n_splits=DEFAULT_FOLDS):
+    """
+    Fold number of every row with each group (district code) held out as a
+    whole. Rows with a missing group (code -1) get fold -1: always trained
+    on, never scored.
+    """
+    groups = np.asarray(groups)
+    folds = np.full(len(groups), -1, dtype=np.int16)
+    known = np.flatnonzero(groups >= 0)
+    for fold, (_, test) in enumerate(GroupKFold(n_splits).split(known, groups=groups[known])):
+        folds[known[test]] = fold
+    return folds
+
+
+# --- Models ---
+
+def make_model(family, params=None, categorical=(), n_threads=1):
+    """An unfitted base regressor of one tuning.py family, DEFAULT_PARAMS overridden by params."""
+    params = {**DEFAULT_PARAMS[family], **(params or {})}
+    if family == 'lgbm':
+        import lightgbm as lgb
+        return lgb.LGBMRegressor(**params, random_state=42, verbose=-1, n_jobs=n_threads)
+    if family == 'xgb':
+        import xgboost as xgb
+        return xgb.XGBRegressor(**params, tree_method='hist', enable_categorical=True, random_state=42,
+                                verbosity=0, n_jobs=n_threads)
+    if family == 'catboost':
+        import catboost as cb
+        return cb.CatBoostRegressor(**params, cat_features=list(categorical) or None, random_seed=42,
+                                    verbose=False, allow_writing_files=False, thread_count=n_threads)
+    if family == 'rf':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(**params, random_state=42, n_jobs=n_threads)
+    if family == 'svr':
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.svm import SVR
+        return Pipeline([('scaler', StandardScaler()), ('svr', SVR(**params))])
+    raise ValueError(f"Unknown model family '{family}' (use one of {FAMILIES})")
+
+
+def _resolve_config(config, features):
+    """Config with every key filled in: model, params, features, categorical, fit_params."""
+    model = config['model']
+    family = model if isinstance(model, str) else None
+    return {
+        'model': model,
+        'params': config.get('params') or {},
+        'features': list(config.get('features') or features.columns),
+        'categorical': config.get('categorical', DISTRICT_ENCODING.get(family, 'category')),
+        'fit_params': config.get('fit_params') or {},
+    }
+
+
+# Each worker opens a FeatureSet once and reuses it for all of its tasks
+_open_features = {}
+
+
+def _fit_fold(features_path, folds_path, config, fold, n_threads):
+    """One task: fits a config on every row outside `fold` and returns its predictions for the fold's rows."""
+    if features_path not in _open_features:
+        _open_features[features_path] = FeatureSet(features_path)
+    features = _open_features[features_path]
+    folds = np.load(folds_path, mmap_mode='r')
+    train, test = np.flatnonzero(folds != fold), np.flatnonzero(folds == fold)
+
+    columns = config['features']
+    if isinstance(config['model'], str):
+        categorical = [col for col in columns if col in features.vocabularies and config['categorical'] == 'category']
+        model = make_model(config['model'], config['params'], categorical, n_threads)
+    else:
+        model = clone(config['model'])
+    X = features.frame(config['categorical'])[columns]
+    model.fit(X.iloc[train], features.target[train], **config['fit_params'])
+    return model.predict(X.iloc[test])
+
+
+def cross_validate(features, configs, folds, workers=None, inclusive=True, verbose=True):
+    """
+    Scores every config on every fold of a FeatureSet.
+
+    configs: {name: {'model': family name or scikit-learn estimator,
+                     'params': family parameters, 'features': column subset (default all),
+                     'categorical': 'category' or 'codes', 'fit_params': extra fit() arguments}}
+    folds: fold number per row (kfold_folds / district_folds); -1 rows are only trained on.
+
+    Returns (summary, fold_metrics, predictions): the mean and standard
+    deviation over folds of each metric per config, the metrics of every
+    (config, fold), and the out-of-fold predictions (rows x configs, NaN where
+    never scored).
+    """
+    names = list(configs)
+    resolved = {name: _resolve_config(configs[name], features) for name in names}
+    folds = np.asarray(folds, dtype=np.int16)
+    fold_ids = [int(f) for f in np.unique(folds) if f >= 0]
+    tasks = [(name, fold) for name in names for fold in fold_ids]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    n_threads = split_cores(workers)
+    predictions = np.full((len(folds), len(names)), np.nan)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        folds_path = os.path.join(tmp, 'folds.npy')
+        np.save(folds_path, folds)
+        if workers == 1:
+            results = ((task, _fit_fold(features.path, folds_path, resolved[task[0]], task[1], n_threads))
+                       for task in tasks)
+        else:
+            # spawn, as tuning.py does: a forked worker can deadlock in an OpenMP runtime the parent started
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+            futures = {pool.submit(_fit_fold, features.path, folds_path, resolved[name], fold, n_threads): (name, fold)
+                       for name, fold in tasks}
+            results = ((futures[future], future.result()) for future in as_completed(futures))
+        try:
+            for done, ((name, fold), pred) in enumerate(results, start=1):
+                predictions[folds == fold, names.index(name)] = pred
+                if verbose:
+                    print(f"  {done}/{len(tasks)} fits ({time.perf_counter() - start:.0f}s)", end='\r')
+        finally:
+            if workers > 1:
+                pool.shutdown(cancel_futures=True)
+
+    target = np.asarray(features.target)
+    frames = []
+    for fold in fold_ids:
+        rows = folds == fold
+        metrics = regression_metrics(target[rows], predictions[rows], inclusive=inclusive)
+        metrics.insert(0, 'config', names)
+        metrics.insert(1, 'fold', fold)
+        frames.append(metrics)
+    fold_metrics = pd.concat(frames, ignore_index=True)
+    grouped = fold_metrics.groupby('config', sort=False)[METRIC_COLUMNS]
+    summary = grouped.mean().join(grouped.std().add_suffix('_std')).reset_index()
+    if verbose:
+        print(f"\n✅ {len(names)} configs x {len(fold_ids)} folds in {time.perf_counter() - start:.1f}s "
+              f"({workers} workers x {n_threads} threads)")
+    return summary, fold_metrics, pd.DataFrame(predictions, columns=names)
+
+
+# --- Data ---
+
+def load_features(path=DATA_PATH, store=None):
+    """model_v2.ipynb's feature table from the feature store, district kept as a categorical."""
+    table = model_features(read_dataset(path, nullable=False))
+    spec = {'columns': [col for col in table.columns if col != 'price'], 'categorical': [BLOCK_COLUMN],
+            'target': 'price'}
+    return (store or FeatureStore()).get(table, spec)
+
+
+def make_folds(features, scheme, n_splits=DEFAULT_FOLDS, seed=42):
+    if scheme == 'kfold':
+        return kfold_folds(features.n_rows, n_splits, seed)
+    if scheme == 'district':
+        return district_folds(features.codes(BLOCK_COLUMN), n_splits)
+    raise ValueError(f"Unknown CV scheme '{scheme}' (use one of {SCHEMES})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='K-fold and district-blocked CV of the AVM base models')
+    parser.add_argument('--families', nargs='+', default=['lgbm', 'xgb', 'catboost', 'rf'], choices=FAMILIES)
+    parser.add_argument('--schemes', nargs='+', default=SCHEMES, choices=SCHEMES)
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--tuned', action='store_true', help="use each family's best tuning.py parameters")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    features = load_features(args.data)
+    configs = {family: {'model': family, 'params': best_params(family, data_path=args.data) if args.tuned else None}
+               for family in args.families}
+    summaries, fold_tables = [], []
+    for scheme in args.schemes:
+        print(f"{scheme}: {args.folds} folds over {features.n_rows:,} rows")
+        summary, fold_metrics, _ = cross_validate(features, configs, make_folds(features, scheme, args.folds),
+                                                  args.workers)
+        summaries.append(summary.assign(scheme=scheme))
+        fold_tables.append(fold_metrics.assign(scheme=scheme))
+
+    summary = pd.concat(summaries, ignore_index=True)
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    summary.to_csv(args.output, index=False)
+    folds_output = f'{os.path.splitext(args.output)[0]}_folds.csv'
+    pd.concat(fold_tables, ignore_index=True).to_csv(folds_output, index=False)
+    print(summary[['scheme', 'config'] + METRIC_COLUMNS].to_string(index=False, float_format='{:.4f}'.format))
+    print(f"💾 '{args.output}', per-fold metrics in '{folds_output}'")
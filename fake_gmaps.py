@@ -0,0 +1,79 @@
+import hashlib
+import math
+import threading
+
+"""
+Fake Google Maps Client
+
+A deterministic, offline stand-in for googlemaps.Client that returns responses
+shaped like the real geocode / directions / places_nearby payloads. Used to
+exercise the cache and enrichment pipeline without network access or quota.
+"""
+
+# Rough bounding box of the Hong Kong urban area
+HK_LAT_RANGE = (22.20, 22.50)
+HK_LNG_RANGE = (113.95, 114.30)
+CENTRAL = (22.2819, 114.1582)
+
+
+def _unit_hash(*parts):
+    """Maps arbitrary values to a stable float in [0, 1)."""
+    digest = hashlib.sha256('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return int(digest[:12], 16) / float(16 ** 12)
+
+
+def _haversine_km(a, b):
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(h))
+
+
+class FakeMapsClient:
+    """Same method names and response shapes as googlemaps.Client, no network."""
+
+    def __init__(self):
+        self.calls = {'geocode': 0, 'directions': 0, 'places_nearby': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, method):
+        with self._lock:
+            self.calls[method] += 1
+
+    def _point(self, value):
+        """Resolves a free-text place or (lat, lng) pair to coordinates."""
+        if isinstance(value, (tuple, list)):
+            return float(value[0]), float(value[1])
+        if isinstance(value, dict):
+            return float(value['lat']), float(value['lng'])
+        if 'central' in str(value).lower():
+            return CENTRAL
+        query = ' '.join(str(value).lower().split())
+        lat = HK_LAT_RANGE[0] + _unit_hash(query, 'lat') * (HK_LAT_RANGE[1] - HK_LAT_RANGE[0])
+        lng = HK_LNG_RANGE[0] + _unit_hash(query, 'lng') * (HK_LNG_RANGE[1] - HK_LNG_RANGE[0])
+        return lat, lng
+
+    def geocode(self, address, **kwargs):
+        self._count('geocode')
+        lat, lng = self._point(address)
+        return [{'formatted_address': str(address), 'geometry': {'location': {'lat': lat, 'lng': lng}}}]
+
+    def directions(self, origin, destination, mode='driving', **kwargs):
+        self._count('directions')
+        km = _haversine_km(self._point(origin), self._point(destination))
+        # Walking ~5 km/h, transit ~20 km/h plus a 10 minute wait/transfer overhead
+        seconds = km / 5.0 * 3600 if mode == 'walking' else km / 20.0 * 3600 + 600
+        return [{'legs': [{'duration': {'value': int(round(seconds))},
+                           'distance': {'value': int(round(km * 1000))}}]}]
+
+    def places_nearby(self, location=None, radius=None, type=None, rank_by=None, **kwargs):
+        self._count('places_nearby')
+        lat, lng = self._point(location)
+        n = 1 + int(_unit_hash(round(lat, 4), round(lng, 4), type, radius) * 20)
+        results = []
+        for i in range(n):
+            # Deterministic offsets within ~1 km, sorted nearest first like rank_by='distance'
+            d = (i + 1) / n * 0.009
+            angle = _unit_hash(lat, lng, type, i) * 2 * math.pi
+            results.append({'name': f'{type} {i}', 'geometry': {'location': {
+                'lat': lat + d * math.sin(angle), 'lng': lng + d * math.cos(angle)}}})
+        return {'results': results, 'status': 'OK'}
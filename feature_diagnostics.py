@@ -0,0 +1,203 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+"""
+Feature Diagnostics (VIF and Correlation)
+
+Replaces the per-feature statsmodels loop in multicollinearity_VIF.ipynb:
+
+    [variance_inflation_factor(X.values, i) for i in range(X.shape[1])]
+
+refits one OLS per feature. All VIFs come out of one matrix inverse instead:
+with G the Gram matrix of the predictors scaled to unit diagonal,
+VIF_i = [G^-1]_ii. Each row chunk only adds its count, mean and centred
+scatter matrix to a StreamingCovariance (one BLAS product per chunk, merged
+with Chan's pairwise update), so a table that does not fit in memory is
+diagnosed in one pass, and chunks can be accumulated on several threads and
+merged.
+
+centered=False reproduces variance_inflation_factor on a matrix without a
+constant column, which is what the notebook passes it (R^2 of each feature
+regressed on the others through the origin). centered=True is the textbook
+VIF of a model with an intercept, the diagonal of the inverse correlation
+matrix.
+
+Only rows with every column present are used, where pandas' corr() drops
+missing values pair by pair.
+
+    stats = accumulate(chunks)                       # or StreamingCovariance(columns).update(df)
+    vif = variance_inflation_factors(stats, exclude=['price'])
+    pairs = high_correlation_pairs(stats.correlation(), threshold=0.8)
+    python feature_diagnostics.py centanet_cleaned_proximity_final.csv --exclude price --threshold 0.8
+"""
+
+DEFAULT_CHUNKSIZE = 200_000
+HIGH_CORRELATION_THRESHOLD = 0.8
+# Columns the notebook drops before the diagnostics
+ID_COLS = ['property_name', 'district']
+
+
+class StreamingCovariance:
+    """Count, mean and centred scatter matrix of a set of columns, accumulated chunk by chunk."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(p)
+        self.scatter = np.zeros((p, p))
+
+    def update(self, chunk):
+        """Adds a DataFrame (or n x p array in column order) of rows; rows with a missing value are skipped."""
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = np.asarray(chunk, dtype=np.float64)
+        values = values[np.isfinite(values).all(axis=1)]
+        if not len(values):
+            return self
+        other = StreamingCovariance(self.columns)
+        other.n = len(values)
+        other.mean = values.mean(axis=0)
+        centred = values - other.mean
+        other.scatter = centred.T @ centred
+        return self.merge(other)
+
+    def merge(self, other):
+        """Folds another accumulator over the same columns into this one (Chan et al.)."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.scatter = other.n, other.mean.copy(), other.scatter.copy()
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.scatter = self.scatter + other.scatter + np.outer(delta, delta) * (self.n * other.n / n)
+        self.mean = self.mean + delta * (other.n / n)
+        self.n = n
+        return self
+
+    def covariance(self, ddof=1):
+        return pd.DataFrame(self.scatter / (self.n - ddof), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        """Pearson correlation matrix; constant columns get NaN, as in pandas."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scale = 1.0 / np.sqrt(np.diag(self.scatter))
+            corr = self.scatter * scale[:, None] * scale[None, :]
+        np.fill_diagonal(corr, np.where(np.isfinite(scale), 1.0, np.nan))
+        return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=self.columns, columns=self.columns)
+
+    def gram(self):
+        """Uncentred X'X, recovered from the centred scatter and the mean."""
+        return self.scatter + self.n * np.outer(self.mean, self.mean)
+
+
+def accumulate(chunks, columns=None, workers=1):
+    """
+    StreamingCovariance over an iterable of DataFrame chunks. columns defaults
+    to the first chunk's numeric columns. With workers > 1 the chunks' scatter
+    products (NumPy releases the GIL) run on a thread pool and are merged in order.
+    """
+    chunks = iter(chunks)
+    first = next(chunks)
+    columns = list(columns) if columns is not None else list(first.select_dtypes('number').columns)
+    total = StreamingCovariance(columns).update(first)
+    if workers <= 1:
+        for chunk in chunks:
+            total.update(chunk)
+        return total
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Bounded queue: at most 2 x workers chunks in memory at once
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(StreamingCovariance(columns).update, chunk))
+            if len(pending) >= 2 * workers:
+                total.merge(pending.pop(0).result())
+        for future in pending:
+            total.merge(future.result())
+    return total
+
+
+def variance_inflation_factors(stats, columns=None, exclude=(), centered=False):
+    """
+    VIF of every predictor (stats' columns, or `columns`, minus `exclude`), as a
+    DataFrame with feature and VIF columns in column order. Perfectly collinear
+    (or constant, for centered=True) predictors get inf.
+    """
+    columns = [col for col in (columns or stats.columns) if col not in set(exclude)]
+    positions = [stats.columns.index(col) for col in columns]
+    gram = (stats.scatter if centered else stats.gram())[np.ix_(positions, positions)]
+    diag = np.diag(gram)
+    usable = diag > 0
+    vif = np.full(len(columns), np.inf)
+    if usable.any():
+        # Unit diagonal first: same inverse up to scaling, much better conditioned
+        scale = 1.0 / np.sqrt(diag[usable])
+        scaled = gram[np.ix_(usable, usable)] * scale[:, None] * scale[None, :]
+        eigenvalues, eigenvectors = np.linalg.eigh(scaled)
+        if eigenvalues.min() > eigenvalues.max() * len(scaled) * np.finfo(np.float64).eps:
+            vif[usable] = np.diag(np.linalg.inv(scaled))
+        else:
+            # Singular: features in the null space are perfectly explained by the others
+            null = eigenvalues <= eigenvalues.max() * len(scaled) * np.finfo(np.float64).eps
+            in_null = (np.abs(eigenvectors[:, null]) > 1e-8).any(axis=1)
+            inverse = np.linalg.pinv(scaled, hermitian=True)
+            vif[usable] = np.where(in_null, np.inf, np.diag(inverse))
+    return pd.DataFrame({'feature': columns, 'VIF': vif})
+
+
+def high_correlation_pairs(corr, threshold=HIGH_CORRELATION_THRESHOLD):
+    """Upper-triangle pairs with |corr| >= threshold as var1, var2, corr, strongest first."""
+    values = corr.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    r = values[rows, cols]
+    keep = np.abs(r) >= threshold
+    rows, cols, r = rows[keep], cols[keep], r[keep]
+    order = np.argsort(-np.abs(r), kind='stable')
+    names = np.asarray(corr.columns, dtype=object)
+    return pd.DataFrame({'var1': names[rows[order]], 'var2': names[cols[order]], 'corr': r[order]})
+
+
+def read_chunks(path, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """DataFrame chunks of a CSV, or of a Parquet / Feather file or dataset directory (record batches)."""
+    if path.endswith('.csv'):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+        return
+    dataset = ds.dataset(path, format='feather' if path.endswith('.feather') else 'parquet')
+    for batch in dataset.to_batches(columns=columns, batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def prepare_numeric(chunk):
+    """The notebook's df_num: identifiers dropped, pet_policy as 0/1."""
+    chunk = chunk.drop(columns=[col for col in ID_COLS if col in chunk.columns])
+    if 'pet_policy' in chunk.columns:
+        chunk['pet_policy'] = chunk['pet_policy'].astype(float)
+    return chunk
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='VIF and high-correlation pairs in one streaming pass')
+    parser.add_argument('path', help='CSV, Parquet or Feather table')
+    parser.add_argument('--exclude', nargs='*', default=['price'], help='columns left out of the VIF (e.g. the target)')
+    parser.add_argument('--threshold', type=float, default=HIGH_CORRELATION_THRESHOLD)
+    parser.add_argument('--centered', action='store_true', help='VIF with an intercept (default: as statsmodels on X)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = accumulate((prepare_numeric(chunk) for chunk in read_chunks(args.path, chunksize=args.chunksize)),
+                       workers=args.workers)
+    vif = variance_inflation_factors(stats, exclude=args.exclude, centered=args.centered)
+    pairs = high_correlation_pairs(stats.correlation(), args.threshold)
+    print(f"✅ {stats.n:,} rows x {len(stats.columns)} columns in {time.perf_counter() - start:.2f}s")
+    print("\n=== VIF table (predictors only) ===")
+    print(vif.sort_values('VIF', ascending=False).to_string())
+    print(f"\n=== Highly correlated pairs (|corr| >= {args.threshold}) ===")
+    print(pairs.to_string())
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+"""
+Feature Store
+
+Builds each encoding of a modelling table once and keeps it on disk as plain
+.npy arrays that are opened memory-mapped:
+
+    numeric.npy          float64 (n x k) numeric features, NaN kept
+    codes_<col>.npy      int32 category codes per categorical column (-1 = missing)
+    onehot_*.npy         CSR one-hot of the high-cardinality columns (data/indices/indptr)
+    target.npy           float64 target
+    manifest.json        spec, column names, vocabularies
+
+An entry is keyed by the hash of the spec and of the data in the columns it
+uses, so a rerun (or another tuning worker, or a scoring job) on the same data
+opens the cached arrays instead of encoding again. Worker processes share one
+copy through the page cache.
+
+The one-hot block replaces get_dummies(['property_name', 'district']) from
+model_v2.ipynb: with thousands of buildings the dense dummies are n x
+thousands, while the CSR holds one entry per row and column.
+
+    store = FeatureStore()
+    features = store.get(df, {'columns': [...], 'categorical': ['district'],
+                              'onehot': ['property_name', 'district'], 'target': 'price'})
+    X_tree = features.frame()          # native categoricals (LGBM/XGB/CatBoost)
+    X_codes = features.frame('codes')  # integer codes (RF/SVR)
+    X_sparse = features.design_matrix()  # numeric + codes of non-one-hot categoricals + one-hot CSR
+"""
+
+STORE_DIR = 'feature_store'
+FORMAT_VERSION = 1
+
+
+def build_vocabulary(values):
+    """Sorted distinct non-missing values as strings (the order astype('category') uses)."""
+    return sorted(pd.unique(pd.Series(values, dtype=object).dropna().astype(str)))
+
+
+def encode_categorical(values, vocabulary):
+    """int32 codes into `vocabulary`; missing or unseen values become -1."""
+    codes = pd.Index(vocabulary).get_indexer(pd.Series(values, dtype=object).astype(str))
+    codes[pd.isna(pd.Series(values, dtype=object)).to_numpy()] = -1
+    return codes.astype(np.int32)
+
+
+def onehot_csr(codes_by_col, vocab_sizes):
+    """CSR one-hot of several code arrays side by side; rows with a missing code get no entry."""
+    n = len(next(iter(codes_by_col.values())))
+    rows, cols, offset = [], [], 0
+    for col, codes in codes_by_col.items():
+        present = codes >= 0
+        rows.append(np.flatnonzero(present))
+        cols.append(codes[present].astype(np.int64) + offset)
+        offset += vocab_sizes[col]
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    return sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n, offset))
+
+
+def data_fingerprint(df, columns):
+    """Hash of the values (and dtypes) of the given columns, order-sensitive."""
+    digest = hashlib.sha256()
+    for col in columns:
+        digest.update(col.encode())
+        digest.update(str(df[col].dtype).encode())
+        digest.update(pd.util.hash_pandas_object(df[col], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _normalize_spec(spec):
+    return {
+        'columns': list(spec['columns']),
+        'categorical': list(spec.get('categorical', [])),
+        'onehot': list(spec.get('onehot', [])),
+        'target': spec.get('target'),
+    }
+
+
+def entry_key(df, spec):
+    spec = _normalize_spec(spec)
+    used = list(dict.fromkeys(spec['columns'] + spec['onehot'] + ([spec['target']] if spec['target'] else [])))
+    config = json.dumps({'format': FORMAT_VERSION, **spec}, sort_keys=True)
+    return hashlib.sha256((config + data_fingerprint(df, used)).encode()).hexdigest()[:24]
+
+
+class FeatureSet:
+    """One cached entry, opened read-only and memory-mapped."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        self.key = os.path.basename(path)
+        self.columns = self.manifest['columns']
+        self.numeric_cols = self.manifest['numeric_cols']
+        self.vocabularies = self.manifest['vocabularies']
+        self.n_rows = self.manifest['n_rows']
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, name), mmap_mode='r')
+
+    @property
+    def numeric(self):
+        return self._load('numeric.npy')
+
+    def codes(self, col):
+        return self._load(f'codes_{col}.npy')
+
+    @property
+    def target(self):
+        return self._load('target.npy') if self.manifest['target'] else None
+
+    def frame(self, categorical='category', rows=None):
+        """
+        The feature columns as a DataFrame, in spec order. categorical='category'
+        gives pandas categoricals over the stored vocabulary (LGBM/XGB/CatBoost);
+        'codes' gives the integer codes (RF/SVR-style, -1 for missing).
+        """
+        rows = slice(None) if rows is None else rows
+        numeric = self.numeric[rows]
+        data = {}
+        for col in self.columns:
+            if col in self.vocabularies:
+                codes = np.asarray(self.codes(col)[rows])
+                data[col] = codes if categorical == 'codes' else pd.Categorical.from_codes(
+                    codes, categories=self.vocabularies[col])
+            else:
+                data[col] = numeric[:, self.numeric_cols.index(col)]
+        return pd.DataFrame(data)
+
+    def onehot(self):
+        """The one-hot block as a CSR matrix over the memory-mapped arrays (no copy); n x 0 without one."""
+        shape = tuple(self.manifest['onehot_shape'])
+        if shape[1] == 0:
+            return sp.csr_matrix(shape, dtype=np.float32)
+        return sp.csr_matrix((self._load('onehot_data.npy'), self._load('onehot_indices.npy'),
+                              self._load('onehot_indptr.npy')), shape=shape)
+
+    @property
+    def onehot_names(self):
+        """get_dummies-style names: '<col>_<value>'."""
+        return [f'{col}_{value}' for col in self.manifest['onehot'] for value in self.vocabularies[col]]
+
+    @property
+    def code_cols(self):
+        """Categorical feature columns without a one-hot block; the design matrix carries their codes."""
+        return [col for col in self.columns if col in self.vocabularies and col not in self.manifest['onehot']]
+
+    def design_matrix(self, rows=None):
+        """
+        Numeric features (missing as 0), then the integer codes of code_cols
+        (-1 for missing), then the one-hot block, as one CSR matrix.
+        """
+        dense = np.column_stack([np.nan_to_num(np.asarray(self.numeric))] +
+                                [np.asarray(self.codes(col), dtype=np.float64) for col in self.code_cols])
+        X = sp.hstack([sp.csr_matrix(dense), self.onehot()], format='csr')
+        return X if rows is None else X[rows]
+
+    @property
+    def design_names(self):
+        return self.numeric_cols + self.code_cols + self.onehot_names
+
+
+class FeatureStore:
+    """Directory of FeatureSets keyed by data + spec hash."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def get(self, df, spec):
+        """Opens the cached encoding of df under spec, building it first on a miss."""
+        key = entry_key(df, spec)
+        path = os.path.join(self.root, key)
+        if not os.path.exists(os.path.join(path, 'manifest.json')):
+            self._build(df, _normalize_spec(spec), path)
+        return FeatureSet(path)
+
+    def _build(self, df, spec, path):
+        # Written to a scratch directory and renamed, so concurrent builders and
+        # crashes never expose a partial entry
+        tmp = f'{path}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        categorical = set(spec['categorical']) | set(spec['onehot'])
+        vocabularies, codes = {}, {}
+        for col in dict.fromkeys(spec['categorical'] + spec['onehot']):
+            vocabularies[col] = build_vocabulary(df[col])
+            codes[col] = encode_categorical(df[col], vocabularies[col])
+            np.save(os.path.join(tmp, f'codes_{col}.npy'), codes[col])
+
+        numeric_cols = [col for col in spec['columns'] if col not in categorical]
+        numeric = df[numeric_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        np.save(os.path.join(tmp, 'numeric.npy'), np.ascontiguousarray(numeric))
+
+        onehot_shape = [len(df), 0]
+        if spec['onehot']:
+            matrix = onehot_csr({col: codes[col] for col in spec['onehot']},
+                                {col: len(vocabularies[col]) for col in spec['onehot']})
+            np.save(os.path.join(tmp, 'onehot_data.npy'), matrix.data)
+            np.save(os.path.join(tmp, 'onehot_indices.npy'), matrix.indices)
+            np.save(os.path.join(tmp, 'onehot_indptr.npy'), matrix.indptr)
+            onehot_shape = list(matrix.shape)
+
+        if spec['target']:
+            np.save(os.path.join(tmp, 'target.npy'), pd.to_numeric(df[spec['target']]).to_numpy(dtype=np.float64))
+
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump({**spec, 'n_rows': len(df), 'numeric_cols': numeric_cols,
+                       'vocabularies': vocabularies, 'onehot_shape': onehot_shape}, f)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Another process finished the same entry first; theirs is identical
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+"""
+Persistent Google Maps Response Cache
+
+Wraps a googlemaps.Client (or the FakeMapsClient in fake_gmaps.py) so that
+geocode, directions and places_nearby responses are stored in a local SQLite
+file keyed by the normalized request. Reruns of the enrichment scripts then
+only hit the network for requests that have never been seen (or have expired).
+"""
+
+DEFAULT_CACHE_PATH = 'cache/gmaps_cache.sqlite'
+DEFAULT_TTL_DAYS = 90
+COMMUTE_HOUR = 8
+
+
+class CacheMissError(KeyError):
+    """Raised in offline replay mode when a request is not in the cache."""
+
+
+def normalize_query(text):
+    """Lower-cases a free-text query and collapses whitespace/comma spacing."""
+    text = ' '.join(str(text).lower().split())
+    return ', '.join(part.strip() for part in text.split(',') if part.strip())
+
+
+def commute_departure(now=None, hour=COMMUTE_HOUR):
+    """The next weekday at `hour`:00 (today if that is still ahead), for transit directions."""
+    now = now or datetime.now()
+    departure = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    while departure <= now or departure.weekday() >= 5:
+        departure += timedelta(days=1)
+    return departure
+
+
+def _normalize_value(value):
+    """Turns request parameters into a stable, JSON-serialisable form."""
+    if isinstance(value, str):
+        return normalize_query(value)
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (tuple, list)):
+        return [_normalize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize_value(v) for k, v in sorted(value.items())}
+    if isinstance(value, datetime):
+        # Departure times only matter as "a weekday (or weekend) commute at this
+        # clock time", so the date is dropped and reruns on any day hit the cache.
+        return ('weekend' if value.weekday() >= 5 else 'weekday') + value.strftime('-%H:%M')
+    return value
+
+
+def request_key(method, *args, **kwargs):
+    """Content address of a request: sha256 of the method and normalized params."""
+    payload = {
+        'method': method,
+        'args': _normalize_value(list(args)),
+        'kwargs': _normalize_value({k: v for k, v in kwargs.items() if v is not None}),
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest(), encoded
+
+
+class ResponseCache:
+    """SQLite-backed key/value store of API responses with TTL-based eviction."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS):
+        self.path = path
+        self.ttl_seconds = None if ttl_days is None else ttl_days * 86400
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY, method TEXT, request TEXT, response TEXT, created_at REAL)'
+        )
+        self._conn.commit()
+
+    def _expired(self, created_at):
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key):
+        """Returns (found, response). Expired entries count as not found."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT response, created_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None or self._expired(row[1]):
+            return False, None
+        return True, json.loads(row[0])
+
+    def put(self, key, method, request, response):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, method, request, response, created_at) VALUES (?, ?, ?, ?, ?)',
+                (key, method, request, json.dumps(response, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def evict_expired(self):
+        """Deletes entries older than the TTL and returns how many were removed."""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM responses WHERE created_at < ?', (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedMapsClient:
+    """
+    Drop-in replacement for the parts of googlemaps.Client the scripts use.
+
+    With offline=True no request ever reaches the wrapped client: cache misses
+    raise CacheMissError, which lets a previous run be replayed exactly.
+    """
+
+    def __init__(self, client, cache=None, offline=False):
+        self.client = client
+        self.cache = cache if cache is not None else ResponseCache()
+        self.offline = offline
+        self.stats = {'hits': 0, 'misses': 0, 'network_calls': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _call(self, method, *args, **kwargs):
+        key, request = request_key(method, *args, **kwargs)
+        found, response = self.cache.get(key)
+        if found:
+            self._count('hits')
+            return response
+        self._count('misses')
+        if self.offline:
+            raise CacheMissError(f"{method} not cached (offline replay): {request}")
+        self._count('network_calls')
+        response = getattr(self.client, method)(*args, **kwargs)
+        self.cache.put(key, method, request, response)
+        return response
+
+    def geocode(self, address, **kwargs):
+        return self._call('geocode', address, **kwargs)
+
+    def directions(self, origin, destination, **kwargs):
+        return self._call('directions', origin, destination, **kwargs)
+
+    def places_nearby(self, **kwargs):
+        return self._call('places_nearby', **kwargs)
+
+    def summary(self):
+        """One-line hit/miss report for the end of a run."""
+        total = self.stats['hits'] + self.stats['misses']
+        hit_rate = self.stats['hits'] / total * 100 if total else 0.0
+        return (f"Cache hits: {self.stats['hits']}, misses: {self.stats['misses']} "
+                f"({hit_rate:.1f}% hit rate), network calls: {self.stats['network_calls']}")
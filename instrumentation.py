@@ -0,0 +1,428 @@
+import atexit
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+"""
+Stage Instrumentation
+
+Structured spans for the pipeline scripts. A span wraps one stage and records
+its duration, rows in/out, peak RSS and external (API) calls:
+
+    from instrumentation import configure, span
+
+    configure('clean_centanet')                       # once, in the script's main
+    with span('clean_frame', rows_in=len(df)) as s:   # anywhere, nestable
+        df = ...
+        s.rows_out = len(df)
+    with span('enrich', track={'gmaps': gmaps.stats}):  # call counters diffed over the span
+        ...
+
+Until configure() is called, span() is a no-op, so library functions can be
+instrumented without cost for callers that do not trace. Every finished span
+is appended to traces/<pipeline>.spans.jsonl. At exit, per-stage totals are
+written to traces/<pipeline>.prom in the Prometheus text format, ready for the
+node_exporter textfile collector.
+
+Peak RSS is the process high-water mark (VmHWM) reset at the start of every
+span on Linux, so a span's peak covers only its own lifetime. Memory is
+process-wide: spans running at the same time in different threads see each
+other's allocations. Elsewhere the value falls back to ru_maxrss.
+
+Hot-spot profiling is opt-in, via configure(profile=...) or AVM_PROFILE:
+    cprofile   deterministic cProfile of the main thread -> <pipeline>.<run>.prof (+ top functions printed)
+    sample     py-spy-style wall-clock sampler of every thread -> <pipeline>.<run>.folded
+               (collapsed stacks for flamegraph.pl / speedscope), prefixed with the active span
+"""
+
+TRACE_DIR = 'traces'
+METRIC_PREFIX = 'avm_stage'
+SAMPLE_INTERVAL_S = 0.005
+PROFILE_MODES = ['cprofile', 'sample']
+# Environment overrides, so production runs can be profiled without code changes
+ENV_TRACE_DIR = 'AVM_TRACE_DIR'
+ENV_PROFILE = 'AVM_PROFILE'
+
+
+# --- Memory ---
+
+def _status_kb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_bytes():
+    """High-water mark of the resident set since the last reset (or process start)."""
+    kb = _status_kb('VmHWM:')
+    if kb is not None:
+        return kb * 1024
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def reset_peak_rss():
+    """Resets VmHWM to the current RSS (Linux). Returns False where unsupported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+# --- Spans ---
+
+class Span:
+    """One timed stage. rows_in / rows_out and attributes may be set while it runs."""
+
+    def __init__(self, name, parent=None, rows_in=None, attributes=None, track=None):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.path = f'{parent.path}/{name}' if parent else name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.attributes = dict(attributes or {})
+        self.external_calls = Counter()
+        self.status = 'ok'
+        self.error = None
+        self.peak_rss = None
+        self._track = track or {}
+        self._track_start = {name: dict(counters) for name, counters in self._track.items()}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_s = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def count_call(self, name, n=1):
+        """Counts an external call made inside the span (safe from worker threads)."""
+        with self._lock:
+            self.external_calls[name] += n
+
+    def _observe_peak(self, value):
+        if value is not None:
+            self.peak_rss = value if self.peak_rss is None else max(self.peak_rss, value)
+
+    def _finish(self):
+        self.duration_s = time.perf_counter() - self._start
+        for name, counters in self._track.items():
+            for key, value in dict(counters).items():
+                delta = value - self._track_start[name].get(key, 0)
+                if delta:
+                    self.external_calls[f'{name}_{key}'] += delta
+
+    def to_record(self, pipeline, run_id):
+        return {
+            'pipeline': pipeline,
+            'run_id': run_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'path': self.path,
+            'start': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(timespec='milliseconds'),
+            'duration_s': round(self.duration_s, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'peak_rss_mb': None if self.peak_rss is None else round(self.peak_rss / 1024 ** 2, 1),
+            'external_calls': dict(self.external_calls),
+            'attributes': self.attributes,
+            'status': self.status,
+            'error': self.error,
+        }
+
+
+class _NullSpan:
+    """What span() yields when tracing is off; accepts and ignores everything."""
+
+    def set(self, **attributes):
+        pass
+
+    def count_call(self, name, n=1):
+        pass
+
+
+# --- Profilers ---
+
+class StackSampler:
+    """
+    Wall-clock sampling profiler: every `interval` seconds it records the
+    Python stack of each thread (sys._current_frames), like py-spy does from
+    outside the process. Overhead scales with the interval, not with the code
+    being profiled.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL_S, label_fn=None):
+        self.interval = interval
+        self.label_fn = label_fn
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                label = self.label_fn(thread_id) if self.label_fn else None
+                if label:
+                    stack.append(f'[{label}]')
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_folded(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+    def top_functions(self, n=15):
+        """(function, share of samples with it on top of the stack) for the hottest leaves."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(name, count / total) for name, count in leaves.most_common(n)]
+
+
+# --- Tracer ---
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Tracer:
+    def __init__(self, pipeline, trace_dir=TRACE_DIR, profile=None, sample_interval=SAMPLE_INTERVAL_S):
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"profile must be one of {PROFILE_MODES}, got {profile!r}")
+        self.pipeline = pipeline
+        self.run_id = datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        self.trace_dir = trace_dir
+        os.makedirs(trace_dir, exist_ok=True)
+        self.jsonl_path = os.path.join(trace_dir, f'{pipeline}.spans.jsonl')
+        self.prom_path = os.path.join(trace_dir, f'{pipeline}.prom')
+        self._jsonl = open(self.jsonl_path, 'a', buffering=1, encoding='utf-8')
+        self._lock = threading.Lock()
+        self._stacks = defaultdict(list)  # thread id -> open spans, innermost last
+        self._totals = {}
+        self._closed = False
+
+        self.profile = profile
+        self._profiler = None
+        if profile == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif profile == 'sample':
+            self._profiler = StackSampler(sample_interval, label_fn=self._active_path).start()
+
+    def _active_path(self, thread_id):
+        stack = self._stacks.get(thread_id)
+        return stack[-1].path if stack else None
+
+    def _open_spans(self):
+        with self._lock:
+            return [s for stack in self._stacks.values() for s in stack]
+
+    @contextmanager
+    def span(self, name, rows_in=None, track=None, **attributes):
+        thread_id = threading.get_ident()
+        # Other threads iterate _stacks under the lock, so it is only read or resized under it
+        with self._lock:
+            stack = self._stacks.get(thread_id)
+            parent = stack[-1] if stack else None
+        s = Span(name, parent, rows_in, attributes, track)
+        # Credit the high-water mark so far to the enclosing spans before resetting it
+        peak = peak_rss_bytes()
+        for open_span in self._open_spans():
+            open_span._observe_peak(peak)
+        reset_peak_rss()
+        with self._lock:
+            self._stacks[thread_id].append(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.status = 'error'
+            s.error = f'{type(e).__name__}: {e}'[:500]
+            raise
+        finally:
+            s._finish()
+            s._observe_peak(peak_rss_bytes())
+            with self._lock:
+                stack = self._stacks[thread_id]
+                stack.remove(s)
+                # Drop finished threads' stacks so a long-running server does not accumulate them
+                if not stack:
+                    del self._stacks[thread_id]
+            if s.parent is not None:
+                s.parent._observe_peak(s.peak_rss)
+            self._record(s)
+
+    def stage(self, name=None):
+        """Decorator form of span(): rows_in/rows_out from len() of the first argument and the result."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                rows_in = len(args[0]) if args and hasattr(args[0], '__len__') else None
+                with self.span(name or fn.__name__, rows_in=rows_in) as s:
+                    result = fn(*args, **kwargs)
+                    if hasattr(result, '__len__'):
+                        s.rows_out = len(result)
+                    return result
+            return wrapper
+        return decorate
+
+    def _record(self, s):
+        record = s.to_record(self.pipeline, self.run_id)
+        with self._lock:
+            self._jsonl.write(json.dumps(record, default=str) + '\n')
+            totals = self._totals.setdefault(s.path, {
+                'spans': 0, 'errors': 0, 'duration_s': 0.0, 'rows_in': 0, 'rows_out': 0,
+                'peak_rss': 0, 'external_calls': Counter(),
+            })
+            totals['spans'] += 1
+            totals['errors'] += s.status != 'ok'
+            totals['duration_s'] += s.duration_s
+            totals['rows_in'] += s.rows_in or 0
+            totals['rows_out'] += s.rows_out or 0
+            totals['peak_rss'] = max(totals['peak_rss'], s.peak_rss or 0)
+            totals['external_calls'].update(s.external_calls)
+
+    def prometheus_text(self):
+        """Per-stage totals of this run in the Prometheus text exposition format."""
+        metrics = [
+            ('spans', 'Number of times the stage ran'),
+            ('errors', 'Number of stage runs that raised'),
+            ('duration_seconds', 'Total wall time spent in the stage'),
+            ('rows_in', 'Total rows entering the stage'),
+            ('rows_out', 'Total rows leaving the stage'),
+            ('peak_rss_bytes', 'Largest resident-set high-water mark seen while the stage ran'),
+        ]
+        keys = {'duration_seconds': 'duration_s', 'peak_rss_bytes': 'peak_rss'}
+        lines = []
+        with self._lock:
+            totals = {path: dict(t, external_calls=Counter(t['external_calls'])) for path, t in self._totals.items()}
+        for metric, help_text in metrics:
+            name = f'{METRIC_PREFIX}_{metric}'
+            lines += [f'# HELP {name} {help_text} (last run).', f'# TYPE {name} gauge']
+            for path, t in totals.items():
+                labels = f'pipeline="{_escape_label(self.pipeline)}",stage="{_escape_label(path)}"'
+                lines.append(f'{name}{{{labels}}} {t[keys.get(metric, metric)]}')
+        name = f'{METRIC_PREFIX}_external_calls'
+        lines += [f'# HELP {name} External calls made inside the stage, by kind (last run).', f'# TYPE {name} gauge']
+        for path, t in totals.items():
+            for call, count in sorted(t['external_calls'].items()):
+                lines.append(f'{name}{{pipeline="{_escape_label(self.pipeline)}",stage="{_escape_label(path)}",'
+                             f'call="{_escape_label(call)}"}} {count}')
+        name = f'{METRIC_PREFIX}s_last_run_timestamp_seconds'
+        lines += [f'# HELP {name} When the pipeline run finished.', f'# TYPE {name} gauge',
+                  f'{name}{{pipeline="{_escape_label(self.pipeline)}"}} {time.time():.3f}']
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        """Stops the profiler, writes the Prometheus file and profile outputs. Idempotent."""
+        if self._closed:
+            return
+        self._closed = True
+        # Written next to the target and renamed, so a scraper never reads half a file
+        tmp = f'{self.prom_path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, self.prom_path)
+        self._jsonl.close()
+
+        prefix = os.path.join(self.trace_dir, f'{self.pipeline}.{self.run_id}')
+        if self.profile == 'cprofile':
+            self._profiler.disable()
+            self._profiler.dump_stats(f'{prefix}.prof')
+            report = io.StringIO()
+            pstats.Stats(self._profiler, stream=report).sort_stats('cumulative').print_stats(15)
+            print(report.getvalue())
+            print(f"📈 cProfile stats: {prefix}.prof (snakeviz / pstats)")
+        elif self.profile == 'sample':
+            self._profiler.stop()
+            self._profiler.write_folded(f'{prefix}.folded')
+            print(f"\n📈 {self._profiler.samples} samples; hottest functions:")
+            for function, share in self._profiler.top_functions():
+                print(f"  {share * 100:5.1f}%  {function}")
+            print(f"Collapsed stacks: {prefix}.folded (flamegraph.pl / speedscope)")
+        print(f"📊 Spans: {self.jsonl_path}  Metrics: {self.prom_path}")
+
+
+# --- Process-wide tracer ---
+
+_tracer = None
+
+
+def configure(pipeline, trace_dir=None, profile=None, sample_interval=SAMPLE_INTERVAL_S):
+    """
+    Starts tracing for this process (closing any previous tracer). trace_dir and
+    profile default to $AVM_TRACE_DIR / $AVM_PROFILE. The tracer is closed at exit.
+    """
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(pipeline,
+                     trace_dir or os.environ.get(ENV_TRACE_DIR, TRACE_DIR),
+                     profile or os.environ.get(ENV_PROFILE) or None,
+                     sample_interval)
+    atexit.register(_tracer.close)
+    return _tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(name, rows_in=None, track=None, **attributes):
+    """A span on the configured tracer, or a no-op when tracing is not configured."""
+    if _tracer is None:
+        return nullcontext(_NullSpan())
+    return _tracer.span(name, rows_in=rows_in, track=track, **attributes)
+
+
+def stage(name=None):
+    """Decorator: traces each call of the function as a span (no-op until configure())."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            return _tracer.stage(name or fn.__name__)(fn)(*args, **kwargs)
+        return wrapper
+    return decorate
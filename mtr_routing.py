@@ -0,0 +1,181 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+"""
+Offline MTR Routing
+
+Estimates walking_time_to_mtr and travel_time_to_cbd without the Directions
+API. A station graph is built from two local files:
+
+    stations file: station, latitude, longitude  (or easting, northing in HK1980 metres)
+    links file:    from_station, to_station, minutes  (in-vehicle time between adjacent stations)
+
+Dijkstra runs once from Central over the whole network, so every station
+knows its ride time to the CBD. Each property then looks up its nearest
+stations with a KDTree and adds a walking-speed model for the access leg.
+"""
+
+CBD_STATION = 'Central'
+
+# Walking model: straight-line distance times a street-network detour factor
+WALKING_SPEED_M_PER_MIN = 80.0  # ~4.8 km/h
+DETOUR_FACTOR = 1.3
+
+# Platform wait plus an allowance for each change of line
+WAIT_MINUTES = 3.0
+INTERCHANGE_MINUTES = 3.0
+
+# Access stations considered per property when routing to the CBD
+CANDIDATE_STATIONS = 3
+
+# Equirectangular projection about Hong Kong; error is well under 1% at this scale
+_ORIGIN_LAT, _ORIGIN_LNG = 22.3, 114.17
+_M_PER_DEG_LAT = 110_574.0
+_M_PER_DEG_LNG = 111_320.0 * np.cos(np.radians(_ORIGIN_LAT))
+
+
+def project_latlng(latitude, longitude):
+    """Projects WGS84 lat/lng arrays to local planar metres."""
+    x = (np.asarray(longitude, dtype=np.float64) - _ORIGIN_LNG) * _M_PER_DEG_LNG
+    y = (np.asarray(latitude, dtype=np.float64) - _ORIGIN_LAT) * _M_PER_DEG_LAT
+    return np.column_stack([x, y])
+
+
+def _coordinate_system(df):
+    return 'easting_northing' if {'easting', 'northing'}.issubset(df.columns) else 'latlng'
+
+
+def _coords(df, system=None):
+    """
+    Planar coordinates from easting/northing if present, else from lat/lng.
+    HK1980 and the local projection are different grids, so properties must
+    use the system the stations were loaded with.
+    """
+    system = system or _coordinate_system(df)
+    columns = ['easting', 'northing'] if system == 'easting_northing' else ['latitude', 'longitude']
+    if not set(columns).issubset(df.columns):
+        raise ValueError(f"The stations use {'/'.join(columns)}; the properties need those columns too")
+    if system == 'easting_northing':
+        return df[columns].to_numpy(dtype=np.float64)
+    return project_latlng(df['latitude'], df['longitude'])
+
+
+def walking_minutes(distance_m):
+    return distance_m * DETOUR_FACTOR / WALKING_SPEED_M_PER_MIN
+
+
+class MTRNetwork:
+    """Station graph with precomputed ride times to the CBD station."""
+
+    def __init__(self, stations_df, links_df, cbd_station=CBD_STATION):
+        stations_df = stations_df.drop_duplicates('station').reset_index(drop=True)
+        self.stations = stations_df['station'].to_numpy()
+        self.coordinate_system = _coordinate_system(stations_df)
+        self.station_coords = _coords(stations_df)
+        position = {name: i for i, name in enumerate(self.stations)}
+
+        unknown = (set(links_df['from_station']) | set(links_df['to_station'])) - set(position)
+        if unknown:
+            raise ValueError(f"Links reference stations missing from the stations file: {sorted(unknown)}")
+        if cbd_station not in position:
+            raise ValueError(f"CBD station '{cbd_station}' is not in the stations file")
+
+        src = links_df['from_station'].map(position).to_numpy()
+        dst = links_df['to_station'].map(position).to_numpy()
+        minutes = links_df['minutes'].to_numpy(dtype=np.float64)
+        if 'interchange' in links_df.columns:
+            minutes = minutes + links_df['interchange'].fillna(False).astype(bool).to_numpy() * INTERCHANGE_MINUTES
+        # A segment listed under several lines is one edge at its fastest time
+        # (csr_matrix would add parallel entries together); links are two-way,
+        # so (a, b) and (b, a) are the same edge
+        edges = pd.DataFrame({'a': np.minimum(src, dst), 'b': np.maximum(src, dst), 'minutes': minutes})
+        edges = edges.groupby(['a', 'b'], as_index=False)['minutes'].min()
+        graph = csr_matrix((edges['minutes'], (edges['a'], edges['b'])),
+                           shape=(len(self.stations), len(self.stations)))
+
+        # Links are two-way; one Dijkstra from Central gives every station's ride time
+        self.minutes_to_cbd = dijkstra(graph, directed=False, indices=position[cbd_station])
+        self.tree = cKDTree(self.station_coords)
+
+    @classmethod
+    def from_files(cls, stations_path, links_path, cbd_station=CBD_STATION):
+        return cls(pd.read_csv(stations_path), pd.read_csv(links_path), cbd_station)
+
+    def estimate(self, coords, k=CANDIDATE_STATIONS):
+        """
+        Returns a DataFrame with nearest_mtr_station, walking_time_to_mtr and
+        travel_time_to_cbd (minutes) for an (n x 2) array of planar coordinates.
+        Rows without finite coordinates, and travel times to stations cut off
+        from the CBD, come back missing.
+        """
+        coords = np.asarray(coords, dtype=np.float64)
+        located = np.isfinite(coords).all(axis=1)
+        k = min(k, len(self.stations))
+        distances, idx = self.tree.query(coords[located], k=k, workers=-1)
+        if k == 1:
+            distances, idx = distances[:, None], idx[:, None]
+
+        walk = walking_minutes(distances)
+        ride = self.minutes_to_cbd[idx]
+        # A property next to Central walks straight there; elsewhere wait and ride
+        total = walk + np.where(ride > 0, WAIT_MINUTES + ride, 0.0)
+        best = np.argmin(total, axis=1)
+        fastest = total[np.arange(len(total)), best]
+
+        nearest = np.full(len(coords), None, dtype=object)
+        walking = np.full(len(coords), np.nan)
+        travel = np.full(len(coords), np.nan)
+        nearest[located] = self.stations[idx[:, 0]]
+        walking[located] = np.round(walk[:, 0])
+        travel[located] = np.where(np.isfinite(fastest), np.round(fastest), np.nan)
+        return pd.DataFrame({
+            'nearest_mtr_station': nearest,
+            'walking_time_to_mtr': walking,
+            'travel_time_to_cbd': travel,
+        })
+
+    def estimate_df(self, df, k=CANDIDATE_STATIONS):
+        """estimate() for a frame with easting/northing or latitude/longitude columns."""
+        result = self.estimate(_coords(df, self.coordinate_system), k=k)
+        result.index = df.index
+        return result
+
+
+def validation_report(estimated, reference, columns=('walking_time_to_mtr', 'travel_time_to_cbd')):
+    """Compares offline estimates to the Google-derived columns, one row per column."""
+    rows = []
+    for col in columns:
+        valid = estimated[col].notna() & reference[col].notna()
+        est = estimated.loc[valid, col].to_numpy(dtype=np.float64)
+        ref = reference.loc[valid, col].to_numpy(dtype=np.float64)
+        err = est - ref
+        rows.append({
+            'column': col,
+            'rows': int(valid.sum()),
+            'mae_minutes': np.mean(np.abs(err)) if len(err) else np.nan,
+            'bias_minutes': np.mean(err) if len(err) else np.nan,
+            'p90_abs_error': np.percentile(np.abs(err), 90) if len(err) else np.nan,
+            'within_5_minutes_pct': np.mean(np.abs(err) <= 5) * 100 if len(err) else np.nan,
+            'correlation': np.corrcoef(est, ref)[0, 1] if len(err) > 1 else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        print("Usage: python mtr_routing.py <stations.csv> <links.csv> <centanet_cleaned_proximity_final.csv>")
+        sys.exit(1)
+
+    network = MTRNetwork.from_files(sys.argv[1], sys.argv[2])
+    properties = pd.read_csv(sys.argv[3])
+    properties = properties.dropna(subset=['latitude', 'longitude'])
+    print(f"Routing {len(properties)} properties over {len(network.stations)} stations...")
+
+    estimates = network.estimate_df(properties)
+    print("\nValidation against Google-derived columns:")
+    print(validation_report(estimates, properties).to_string(index=False))
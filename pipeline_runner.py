@@ -0,0 +1,276 @@
+import argparse
+import glob
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from streaming_cleaner import DEFAULT_CHUNKSIZE
+
+"""
+Incremental Pipeline Runner
+
+Every raw listing is fingerprinted (a 64-bit hash of the whole raw row). A
+manifest records the fingerprints already processed, so a nightly run only
+pushes new or changed listings through the stages (clean -> enrich -> poi ->
+districts -> score) and appends them to the final dataset as one more Parquet
+part file.
+
+A changed listing hashes differently and is processed again. Its listing
+key (LISTING_KEY_COLS) decides which older rows it supersedes: read_final()
+keeps, for each key, every row of the latest run that wrote that key. Keys
+are not unique (one estate has many same-sized flats on a "High Floor"), so
+rows are only ever collapsed across runs, never within one. A listing whose
+new version is dropped by a stage (e.g. it now fails the cleaning filters)
+gets a tombstone, so its old version stops showing.
+--full-rebuild drops the manifest and final dataset and reprocesses
+everything.
+
+    python pipeline_runner.py                 # incremental run
+    python pipeline_runner.py --full-rebuild  # recompute from scratch
+    python pipeline_runner.py --stages clean enrich poi   # without district mapping and scoring
+"""
+
+RAW_PATH = 'raw_data/centanet_data_2.csv'
+STATE_DIR = 'pipeline_state'
+# Identifies "the same listing" across scrapes, so a changed row supersedes the old one. The scrape has
+# no listing id; price and area narrow the key, so a price change shows as a new listing.
+LISTING_KEY_COLS = ['property_name', 'district', 'floor', 'unit', 'saleable_area', 'price']
+STAGE_NAMES = ['clean', 'enrich', 'poi', 'districts', 'score']
+
+
+def fingerprint_rows(df, columns=None):
+    """64-bit content hash of each row (optionally of a subset of columns)."""
+    subset = df if columns is None else df[columns]
+    return pd.util.hash_pandas_object(subset.astype(str), index=False).to_numpy(dtype=np.uint64)
+
+
+def _stable_schema(df):
+    """
+    Casts columns so every run's part file has the same Parquet schema: numbers
+    become float64 (a run whose values happen to have no NaN would otherwise
+    write int64) and text becomes string.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col.startswith('_'):
+            continue
+        if pd.api.types.is_bool_dtype(df[col]) or pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype('float64')
+        else:
+            df[col] = df[col].astype('string')
+    return df
+
+
+class IncrementalPipeline:
+    """
+    Runs a list of (name, function) stages over only the unprocessed rows.
+
+    Each stage takes and returns a DataFrame. Stages must keep the '_fingerprint'
+    and '_listing_key' bookkeeping columns on the rows they return (row-wise
+    pandas operations do this automatically).
+    """
+
+    def __init__(self, stages, state_dir=STATE_DIR, listing_key_cols=LISTING_KEY_COLS):
+        self.stages = stages
+        self.state_dir = state_dir
+        self.listing_key_cols = listing_key_cols
+        self.manifest_dir = os.path.join(state_dir, 'manifest')
+        self.final_dir = os.path.join(state_dir, 'final.parquet')
+        # Listing keys whose latest version was dropped by a stage, with the run that dropped them
+        self.tombstone_dir = os.path.join(state_dir, 'tombstones')
+
+    # --- State ---
+
+    def processed_fingerprints(self):
+        """Fingerprints of every raw row any previous run has processed."""
+        parts = glob.glob(os.path.join(self.manifest_dir, '*.parquet'))
+        if not parts:
+            return np.array([], dtype=np.uint64)
+        return pd.read_parquet(self.manifest_dir, columns=['fingerprint'])['fingerprint'].to_numpy(dtype=np.uint64)
+
+    def watermark(self):
+        """Run id of the most recent completed run, or None."""
+        parts = sorted(glob.glob(os.path.join(self.manifest_dir, '*.parquet')))
+        return os.path.splitext(os.path.basename(parts[-1]))[0] if parts else None
+
+    def reset(self):
+        """Full-rebuild escape hatch: forget everything processed so far."""
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    # --- Running ---
+
+    def select_delta(self, raw_path, chunksize=DEFAULT_CHUNKSIZE, **read_kwargs):
+        """Reads the raw file in chunks and keeps only rows whose fingerprint is new."""
+        seen = self.processed_fingerprints()
+        delta, total = [], 0
+        for chunk in pd.read_csv(raw_path, dtype=str, chunksize=chunksize, **read_kwargs):
+            total += len(chunk)
+            fingerprints = fingerprint_rows(chunk)
+            new_rows = ~np.isin(fingerprints, seen)
+            # The same raw row may appear twice in one scrape; process it once
+            new_rows &= ~pd.Series(fingerprints).duplicated().to_numpy()
+            seen = np.concatenate([seen, fingerprints[new_rows]])
+            if new_rows.any():
+                rows = chunk[new_rows].copy()
+                rows['_fingerprint'] = fingerprints[new_rows]
+                rows['_listing_key'] = fingerprint_rows(rows, self.listing_key_cols)
+                delta.append(rows)
+        delta_df = pd.concat(delta, ignore_index=True) if delta else pd.DataFrame()
+        return delta_df, total
+
+    def run(self, raw_path=RAW_PATH, full_rebuild=False, **read_kwargs):
+        """Processes new/changed rows through every stage and appends them; returns the run summary."""
+        if full_rebuild:
+            print("♻️ Full rebuild requested: clearing manifest and final dataset.")
+            self.reset()
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        os.makedirs(self.final_dir, exist_ok=True)
+        os.makedirs(self.tombstone_dir, exist_ok=True)
+
+        run_id = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        print(f"Last completed run: {self.watermark() or 'none'}")
+        delta, total = self.select_delta(raw_path, **read_kwargs)
+        print(f"✅ {len(delta)} of {total} raw rows are new or changed.")
+        summary = {'run_id': run_id, 'raw_rows': total, 'delta_rows': len(delta), 'output_rows': 0,
+                   'dropped_listings': 0}
+        if delta.empty:
+            return summary
+
+        fingerprints = delta['_fingerprint'].to_numpy()
+        listing_keys = delta['_listing_key'].to_numpy()
+        df = delta
+        for name, stage in self.stages:
+            rows_in = len(df)
+            df = stage(df)
+            print(f"  - Stage '{name}': {rows_in} -> {len(df)} rows")
+
+        # Write the data before the manifest, so a crash between the two only
+        # causes the rows to be reprocessed, never lost
+        if not df.empty:
+            df = _stable_schema(df).assign(_run_id=run_id)
+            df.to_parquet(os.path.join(self.final_dir, f'part-{run_id}.parquet'), index=False)
+        # Keys with no row left after the stages: their previous versions are withdrawn
+        kept = df['_listing_key'].to_numpy(dtype=np.uint64) if not df.empty else np.array([], dtype=np.uint64)
+        dropped = np.setdiff1d(listing_keys, kept)
+        if len(dropped):
+            pd.DataFrame({'_listing_key': dropped, '_run_id': run_id}).to_parquet(
+                os.path.join(self.tombstone_dir, f'{run_id}.parquet'), index=False)
+        # Rows dropped by a stage (e.g. failing the cleaning filters) are still
+        # recorded, so they are not retried until the raw row changes
+        pd.DataFrame({'fingerprint': fingerprints, 'processed_at': run_id}).to_parquet(
+            os.path.join(self.manifest_dir, f'{run_id}.parquet'), index=False)
+        summary['output_rows'] = len(df)
+        summary['dropped_listings'] = len(dropped)
+        return summary
+
+    def read_final(self, columns=None):
+        """
+        The final dataset with only the latest version of each listing (every row
+        the latest run wrote under its key), minus tombstoned listings.
+        """
+        if not glob.glob(os.path.join(self.final_dir, '*.parquet')):
+            return pd.DataFrame(columns=columns)
+        read_columns = None if columns is None else list(dict.fromkeys(columns + ['_listing_key', '_run_id']))
+        df = pd.read_parquet(self.final_dir, columns=read_columns)
+        # Rows sharing a key within one run are distinct listings; keep them all
+        latest_run = df.groupby('_listing_key')['_run_id'].transform('max')
+        df = df[df['_run_id'] == latest_run]
+        if glob.glob(os.path.join(self.tombstone_dir, '*.parquet')):
+            tombstones = pd.read_parquet(self.tombstone_dir).groupby('_listing_key')['_run_id'].max()
+            # A tombstone only hides versions written before it; a later version revives the listing
+            dropped_at = df['_listing_key'].map(tombstones)
+            df = df[dropped_at.isna() | (df['_run_id'] > dropped_at)]
+        return df.reset_index(drop=True) if columns is None else df[columns].reset_index(drop=True)
+
+
+def default_stages(use_fake_client=False, names=STAGE_NAMES, poi_path='GeoCom.csv', dictionary_path=None,
+                   artifact_root=None):
+    """
+    The stages of the standalone scripts, in STAGE_NAMES order (restricted to `names`):
+
+        clean      clean_centanet_data.py filters and parsing
+        enrich     google_maps_feature_eng.py: geocode, travel / walking times, place counts
+        poi        poi_v2.py GeoCom counts and nearest-MTR distance (needs easting/northing,
+                   or latitude/longitude and pyproj)
+        districts  tidy_sale.py main_district mapping of the district column
+        score      scoring_service.py base-model, meta-classifier and ensemble prices
+    """
+    from clean_centanet_data import clean_centanet_frame
+    from enrichment_pipeline import (
+        POI_CONFIG, RateLimitedClient, dedupe_keys, fan_out, feature_columns, run_enrichment
+    )
+    from gmaps_cache import CachedMapsClient, ResponseCache, DEFAULT_CACHE_PATH, commute_departure
+    from poi_engine import POIIndex, compute_poi_features, load_poi_table, wgs84_to_hk1980
+    from scoring_service import ARTIFACT_ROOT, load_bundle
+    from tidy_sale import DICTIONARY_PATH, load_district_dictionary, match_districts
+
+    def clean(df):
+        return clean_centanet_frame(df, verbose=False)
+
+    def enrich(df):
+        if use_fake_client:
+            from fake_gmaps import FakeMapsClient
+            api_client = FakeMapsClient()
+        else:
+            import googlemaps
+            api_client = googlemaps.Client(key=os.environ['GOOGLE_MAPS_API_KEY'])
+        client = CachedMapsClient(RateLimitedClient(api_client), ResponseCache(DEFAULT_CACHE_PATH))
+        commute_time = commute_departure()
+
+        codes, buildings = dedupe_keys(df, ['property_name', 'district'])
+        queries = [f"{name}, {district}, Hong Kong"
+                   for name, district in zip(buildings['property_name'], buildings['district'])]
+        results = run_enrichment({query: query for query in queries}, client, commute_time,
+                                 progress_every=0)
+        features = fan_out(pd.DataFrame([results.get(q, {}) for q in queries],
+                                        columns=feature_columns(POI_CONFIG)), codes)
+        print(f"    {client.summary()}")
+        return pd.concat([df.reset_index(drop=True), features], axis=1)
+
+    def poi(df):
+        df = df.reset_index(drop=True)
+        if {'easting', 'northing'}.issubset(df.columns):
+            coords = df[['easting', 'northing']].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            coords = wgs84_to_hk1980(df['latitude'], df['longitude'])
+        located = np.isfinite(coords).all(axis=1)
+        features = compute_poi_features(POIIndex(load_poi_table(poi_path)), coords[located])
+        features.index = df.index[located]
+        # Listings that couldn't be geocoded keep NaN features rather than being dropped
+        return pd.concat([df, features.reindex(df.index)], axis=1)
+
+    def districts(df):
+        matches = match_districts(df['district'], load_district_dictionary(dictionary_path or DICTIONARY_PATH))
+        return df.assign(main_district=matches['main_district'].to_numpy(),
+                         main_district_confidence=matches['confidence'].to_numpy())
+
+    def score(df):
+        bundle = load_bundle(artifact_root or ARTIFACT_ROOT)
+        df = df.reset_index(drop=True)
+        return pd.concat([df, bundle.predict_frame(df)], axis=1).assign(model_version=bundle.version)
+
+    stages = {'clean': clean, 'enrich': enrich, 'poi': poi, 'districts': districts, 'score': score}
+    return [(name, stages[name]) for name in STAGE_NAMES if name in names]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Incremental AVM data pipeline')
+    parser.add_argument('--raw', default=RAW_PATH, help='raw scrape CSV')
+    parser.add_argument('--full-rebuild', action='store_true', help='ignore the manifest and reprocess everything')
+    parser.add_argument('--fake-client', action='store_true', help='use the offline fake Google Maps client')
+    parser.add_argument('--stages', nargs='+', default=STAGE_NAMES, choices=STAGE_NAMES,
+                        help='stages to run (always in pipeline order)')
+    parser.add_argument('--poi', default='GeoCom.csv', help='GeoCom POI table for the poi stage')
+    parser.add_argument('--dictionary', default=None, help='district dictionary for the districts stage')
+    parser.add_argument('--artifacts', default=None, help='artifact root for the score stage')
+    args = parser.parse_args()
+
+    pipeline = IncrementalPipeline(default_stages(args.fake_client, args.stages, args.poi, args.dictionary,
+                                                  args.artifacts))
+    summary = pipeline.run(args.raw, full_rebuild=args.full_rebuild, encoding='utf-8')
+    print(f"\n✨ Run {summary['run_id']} complete: {summary['delta_rows']} new/changed rows, "
+          f"{summary['output_rows']} appended to '{pipeline.final_dir}', "
+          f"{summary['dropped_listings']} listings withdrawn.")
@@ -0,0 +1,193 @@
+import pandas as pd
+import numpy as np
+from scipy.spatial import cKDTree
+
+"""
+POI Counting Engine
+
+Tags the GeoCom POI table with its categories once and answers "how many POIs
+of each category lie within r metres" for every property with vectorized
+tree queries (one per category and radius, no Python loop over properties).
+"""
+
+# --- Configuration Section ---
+
+# Define specific CLASS and TYPE combinations for each category
+# 'types': None means all types within that class are included
+CATEGORY_CONFIG = {
+    'Community_Facilities': {
+        'filters': [
+            {'class': 'COM', 'types': ['CMC']}
+        ],
+        'radius': 1000
+    },
+    'Education': {
+        'filters': [
+            {'class': 'SCH', 'types': None} # All types
+        ],
+        'radius': 2000
+    },
+    'Recreation': {
+        'filters': [
+            {'class': 'RSF', 'types': ['PAR', 'PLG', 'TCT', 'BAS', 'ICR', 'IGH', 'SGD', 'STD', 'GCO', 'RGD', 'SPL', 'BWG', 'SCO']}
+        ],
+        'radius': 1000
+    },
+    'Medical': {
+        'filters': [
+            {'class': 'HNC', 'types': ['HOS', 'CLI']}
+        ],
+        'radius': 2000
+    },
+    'Public_Market': {
+        'filters': [
+            {'class': 'MUF', 'types': ['CFS', 'MKT']}
+        ],
+        'radius': 1000
+    },
+    'Religion': {
+        'filters': [
+            {'class': 'REM', 'types': ['CHU', 'TMP', 'MON']}
+        ],
+        'radius': 2000
+    },
+    'Transportation': {
+        'filters': [
+            {'class': 'BUS', 'types': None}, # All BUS types
+            {'class': 'TRS', 'types': ['MTA', 'LRA']}
+        ],
+        'radius': 1000
+    },
+    'Tourism': {
+        'filters': [
+            {'class': 'TRH', 'types': ['SIG']}
+        ],
+        'radius': 2000
+    }
+}
+
+TOTAL_POI_RADIUS = 1000
+
+# MTR stations are GeoCom TRS/MTA points
+MTR_FILTERS = [{'class': 'TRS', 'types': ['MTA']}]
+
+
+def wgs84_to_hk1980(latitude, longitude):
+    """(n x 2) HK1980 Grid easting/northing for WGS84 latitude/longitude (needs pyproj)."""
+    from pyproj import Transformer
+    transformer = Transformer.from_crs('EPSG:4326', 'EPSG:2326', always_xy=True)
+    easting, northing = transformer.transform(np.asarray(longitude, dtype=np.float64),
+                                              np.asarray(latitude, dtype=np.float64))
+    return np.column_stack([easting, northing])
+
+
+def load_poi_table(path='GeoCom.csv'):
+    """Loads the GeoCom table and keeps only rows with usable coordinates and codes."""
+    df_poi = pd.read_csv(path, usecols=['EASTING', 'NORTHING', 'CLASS', 'TYPE'])
+    df_poi.dropna(subset=['EASTING', 'NORTHING', 'CLASS', 'TYPE'], inplace=True)
+    for col in ['EASTING', 'NORTHING']:
+        df_poi[col] = pd.to_numeric(df_poi[col], errors='coerce')
+    df_poi.dropna(subset=['EASTING', 'NORTHING'], inplace=True)
+    return df_poi.reset_index(drop=True)
+
+
+def filter_mask(poi_df, filters):
+    """Boolean mask of the POIs matching any of the class/type rules."""
+    mask = np.zeros(len(poi_df), dtype=bool)
+    poi_class = poi_df['CLASS'].to_numpy()
+    poi_type = poi_df['TYPE'].to_numpy()
+    for f in filters:
+        rule = poi_class == f['class']
+        if f['types'] is not None:
+            rule &= np.isin(poi_type, f['types'])
+        mask |= rule
+    return mask
+
+
+class POIIndex:
+    """
+    Spatial index over the whole POI table.
+
+    Every POI is tagged once with the categories it belongs to (a boolean
+    membership matrix). Counting uses one cKDTree per category, built the
+    first time the category is queried and reused for every radius:
+    cKDTree.query_ball_point(..., return_length=True) returns the counts
+    directly and runs across all cores, so no neighbour index lists are built.
+
+    A single tree over the whole table can only count per category by
+    materialising (property, POI) pairs and bincounting their tags, which
+    measured 1.8x slower on a GeoCom-sized table (see benchmarks/suite.py
+    poi_counts), so each category keeps its own tree.
+    """
+
+    def __init__(self, poi_df, category_config=CATEGORY_CONFIG, workers=-1):
+        self.coords = poi_df[['EASTING', 'NORTHING']].to_numpy(dtype=np.float64)
+        self.categories = list(category_config.keys())
+        self.workers = workers
+        self.membership = np.column_stack(
+            [filter_mask(poi_df, category_config[name]['filters']) for name in self.categories]
+        ) if self.categories else np.zeros((len(poi_df), 0), dtype=bool)
+        self.mtr_mask = filter_mask(poi_df, MTR_FILTERS)
+        self._trees = {}
+
+    def _tree(self, key):
+        """Returns (and caches) the cKDTree for a category name, 'total' or 'mtr'."""
+        if key not in self._trees:
+            if key == 'total':
+                points = self.coords
+            elif key == 'mtr':
+                points = self.coords[self.mtr_mask]
+            else:
+                points = self.coords[self.membership[:, self.categories.index(key)]]
+            self._trees[key] = cKDTree(points) if len(points) else None
+        return self._trees[key]
+
+    def count_within(self, key, housing_coords, radius):
+        """Number of POIs of one category (or 'total') within radius of each coordinate."""
+        tree = self._tree(key)
+        if tree is None:
+            return np.zeros(len(housing_coords), dtype=np.int32)
+        counts = tree.query_ball_point(housing_coords, r=radius, return_length=True, workers=self.workers)
+        return np.asarray(counts, dtype=np.int32)
+
+    def count_matrix(self, housing_coords, radii, categories=None):
+        """Dense (properties x categories x radii) count array."""
+        categories = self.categories if categories is None else list(categories)
+        housing_coords = np.asarray(housing_coords, dtype=np.float64)
+        counts = np.zeros((len(housing_coords), len(categories), len(radii)), dtype=np.int32)
+        for c, name in enumerate(categories):
+            for r, radius in enumerate(radii):
+                counts[:, c, r] = self.count_within(name, housing_coords, radius)
+        return counts
+
+    def nearest_mtr_km(self, housing_coords):
+        """Distance from each coordinate to the nearest MTR station, in kilometres."""
+        tree = self._tree('mtr')
+        if tree is None:
+            return np.full(len(housing_coords), np.inf)
+        distances, _ = tree.query(housing_coords, k=1, workers=self.workers)
+        return distances / 1000
+
+
+def feature_column_names(category_config=CATEGORY_CONFIG, total_radius=TOTAL_POI_RADIUS):
+    """Column names produced by compute_poi_features, in output order."""
+    return (
+        [f'total_poi_within_{total_radius}m'] +
+        [f'category_{name}_within_{details["radius"]}m' for name, details in category_config.items()] +
+        ['distance_to_nearest_mtr_km']
+    )
+
+
+def compute_poi_features(index, housing_coords, category_config=CATEGORY_CONFIG, total_radius=TOTAL_POI_RADIUS):
+    """
+    Computes the poi_v2 feature block (total count, per-category count at the
+    configured radius and nearest-MTR distance) as a DataFrame.
+    """
+    housing_coords = np.asarray(housing_coords, dtype=np.float64)
+    features = {f'total_poi_within_{total_radius}m': index.count_within('total', housing_coords, total_radius)}
+
+    for name, details in category_config.items():
+        features[f'category_{name}_within_{details["radius"]}m'] = index.count_within(name, housing_coords, details['radius'])
+
+    features['distance_to_nearest_mtr_km'] = index.nearest_mtr_km(housing_coords)
+    return pd.DataFrame(features)
@@ -0,0 +1,161 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+"""
+Typed Schema for the Enriched Property Dataset
+
+One definition of the column types of centanet_cleaned_proximity_final.csv /
+property_transaction_final.csv, shared by the notebooks, tuning.py and the
+scoring service instead of pandas' default inference (object strings, int64
+for every count, float64 everywhere else):
+
+    property_name, district     categorical (dictionary-encoded on disk)
+    pet_policy                  nullable boolean
+    prices, areas, counts       the smallest nullable integer that holds them
+    latitude, longitude         float64 (float32 would cost ~1 m at Hong Kong's longitude)
+
+The enriched table is written once to a compact binary file and read back
+memory-mapped:
+
+    .feather    Arrow IPC, uncompressed, so numeric columns are mapped straight from the page cache
+    .parquet    zstd-compressed, smaller on disk, decoded on read
+
+    df = read_dataset('centanet_cleaned_proximity_final.feather')                 # nullable dtypes
+    df = read_dataset('centanet_cleaned_proximity_final.csv', nullable=False)     # plain NumPy dtypes
+    python property_schema.py convert centanet_cleaned_proximity_final.csv centanet_cleaned_proximity_final.feather
+"""
+
+CATEGORICAL_COLS = ['property_name', 'district']
+POI_COUNT_COLS = [
+    'total_poi_within_1000m',
+    'category_Community_Facilities_within_1000m',
+    'category_Education_within_2000m',
+    'category_Recreation_within_1000m',
+    'category_Medical_within_2000m',
+    'category_Public_Market_within_1000m',
+    'category_Religion_within_2000m',
+    'category_Transportation_within_1000m',
+    'category_Tourism_within_2000m',
+]
+PROPERTY_SCHEMA = {
+    'property_name': 'category',
+    'district': 'category',
+    'bedroom_count': 'Int8',
+    # 64-bit: price feeds products and sums in the notebooks, which would overflow Int32
+    'price': 'Int64',
+    'property_age': 'Int16',
+    'saleable_area': 'Int32',
+    'pet_policy': 'boolean',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'travel_time_to_cbd': 'Int16',
+    'walking_time_to_mtr': 'Int16',
+    **dict.fromkeys(POI_COUNT_COLS, 'UInt16'),
+}
+# read_csv parses the numeric columns straight into their final types
+CSV_DTYPES = {col: dtype for col, dtype in PROPERTY_SCHEMA.items() if dtype not in ('category', 'boolean')}
+FEATHER_COMPRESSION = 'uncompressed'
+PARQUET_COMPRESSION = 'zstd'
+
+
+def _to_numpy(series):
+    """NumPy column for a nullable one: same width if nothing is missing, else float with NaN."""
+    dtype = series.dtype
+    if not isinstance(dtype, pd.api.extensions.ExtensionDtype) or isinstance(dtype, pd.CategoricalDtype):
+        return series
+    if not (pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype)):
+        return series
+    if not series.isna().any():
+        return pd.Series(series.to_numpy(dtype=dtype.numpy_dtype), index=series.index, name=series.name)
+    float_dtype = np.float32 if dtype.numpy_dtype.itemsize <= 2 else np.float64
+    return pd.Series(series.to_numpy(dtype=float_dtype, na_value=np.nan), index=series.index, name=series.name)
+
+
+def apply_schema(df, schema=PROPERTY_SCHEMA, nullable=True):
+    """
+    Casts the schema columns present in df (others are left as they are).
+
+    Raises TypeError if a value does not fit its column's type, e.g. a
+    fractional bedroom count or a POI count above 65535, rather than
+    silently wrapping. nullable=False returns NumPy dtypes instead of pandas'
+    nullable ones (integers without missing values keep their width, others
+    become float), for code that hands the frame straight to scikit-learn.
+    """
+    df = df.copy()
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype == 'category':
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+        elif dtype == 'boolean' and not pd.api.types.is_bool_dtype(df[col].dtype):
+            text = df[col].astype('string').str.strip().str.lower()
+            df[col] = text.map({'true': True, 'false': False, '1': True, '0': False}).astype('boolean')
+        else:
+            df[col] = df[col].astype(dtype)
+        if not nullable:
+            df[col] = _to_numpy(df[col])
+    return df
+
+
+def write_dataset(df, path, schema=PROPERTY_SCHEMA):
+    """Writes df with the schema applied, as Feather or Parquet by the file extension."""
+    table = pa.Table.from_pandas(apply_schema(df, schema), preserve_index=False)
+    tmp = f'{path}.tmp'
+    if path.endswith('.feather'):
+        feather.write_feather(table, tmp, compression=FEATHER_COMPRESSION)
+    elif path.endswith('.parquet'):
+        pq.write_table(table, tmp, compression=PARQUET_COMPRESSION)
+    else:
+        raise ValueError(f"Unsupported dataset format for '{path}' (use .feather or .parquet)")
+    os.replace(tmp, path)
+    return path
+
+
+def read_dataset(path, columns=None, nullable=True, schema=PROPERTY_SCHEMA):
+    """
+    Loads the enriched dataset with the schema's dtypes.
+
+    .feather and .parquet files are memory-mapped and only `columns` are
+    read; a .csv is parsed straight into the schema types, so the notebooks
+    get the same dtypes before and after conversion.
+    """
+    if path.endswith('.feather'):
+        df = feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    elif path.endswith('.parquet'):
+        df = pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    else:
+        df = pd.read_csv(path, usecols=columns, dtype=CSV_DTYPES)
+    return apply_schema(df, schema, nullable)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Typed schema and binary storage for the enriched property dataset')
+    sub = parser.add_subparsers(dest='command', required=True)
+    convert_parser = sub.add_parser('convert', help='write a CSV (or other dataset file) as .feather / .parquet')
+    convert_parser.add_argument('input')
+    convert_parser.add_argument('output')
+    info_parser = sub.add_parser('info', help='dtypes, memory and load time of a dataset file')
+    info_parser.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        df = read_dataset(args.input)
+        write_dataset(df, args.output)
+        size_in, size_out = os.path.getsize(args.input), os.path.getsize(args.output)
+        print(f"✅ Wrote {len(df):,} rows to '{args.output}' ({size_out / 1e6:.2f} MB on disk, "
+              f"{size_in / 1e6:.2f} MB before)")
+    else:
+        start = time.perf_counter()
+        df = read_dataset(args.path)
+        seconds = time.perf_counter() - start
+        print(df.dtypes.to_string())
+        print(f"\n{len(df):,} rows loaded in {seconds * 1000:.1f} ms, "
+              f"{df.memory_usage(deep=True).sum() / 1e6:.2f} MB in memory")
@@ -0,0 +1,586 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from accessibility_grid import AccessibilityGrid
+from ensemble import MODEL_TO_PRED, VOTE_COLS, majority_weighted_ensemble
+from feature_store import build_vocabulary, encode_categorical
+from instrumentation import configure, span
+
+"""
+Batch-Scoring Inference Service
+
+Exports the tuned base models from model_v2.ipynb (LGBM/XGB/CatBoost/RF), the
+four meta-classifiers that vote for a base model per listing and their label
+encoder into a versioned artifact directory:
+
+    artifacts/<version>/manifest.json       feature lists, district vocabulary, file hashes
+    artifacts/<version>/base/*.pkl          price regressors
+    artifacts/<version>/meta/*.pkl          best-model selectors + label_encoder.pkl
+    artifacts/LATEST                        name of the newest version
+
+A server loads one version once and scores listings through a micro-batcher:
+concurrent requests are pooled for at most a few milliseconds and scored as
+one DataFrame, so the preprocessing and every model's predict() run once per
+batch instead of once per listing. The ensemble price is the majority-weighted
+combination from ensemble.py.
+
+With --grid, listings that arrive with HK1980 easting/northing but without POI
+counts or walking_time_to_mtr get them from the precomputed accessibility grid
+(accessibility_grid.py), a constant-time lookup per listing.
+
+    python scoring_service.py serve --port 8000
+    python scoring_service.py score listings.csv scored.csv
+    curl -X POST localhost:8000/score -d '{"district": "Quarry Bay", "bedroom_count": 2, ...}'
+    curl localhost:8000/metrics
+"""
+
+ARTIFACT_ROOT = 'artifacts'
+
+# Columns the base regressors were trained on (X_train.columns after the cleanup in model_v2.ipynb)
+BASE_FEATURE_COLS = ['district', 'bedroom_count', 'property_age', 'saleable_area', 'travel_time_to_cbd',
+                     'total_poi_within_1000m', 'category_Education_within_2000m',
+                     'category_Medical_within_2000m', 'category_Public_Market_within_1000m',
+                     'pet_policy_binary']
+# Columns the meta-classifiers were trained on (FEATURE_COLS in model_v2.ipynb)
+META_FEATURE_COLS = ['district', 'bedroom_count', 'property_age', 'saleable_area',
+                     'travel_time_to_cbd', 'walking_time_to_mtr', 'total_poi_within_1000m',
+                     'category_Education_within_2000m', 'category_Medical_within_2000m',
+                     'category_Public_Market_within_1000m', 'pet_policy_binary']
+
+# How each model expects 'district':
+#   category   - pandas categorical with the training vocabulary
+#   codes      - integer code into the (sorted) vocabulary, -1 when unseen
+#   rf_encoded - dropped and re-appended as 'district_encoded' codes (base RF)
+BASE_MODEL_SPECS = {
+    'LGBM': {'file': 'lgbm_model.pkl', 'district': 'category'},
+    'XGB': {'file': 'xgb_model.pkl', 'district': 'category'},
+    'CatBoost': {'file': 'catboost_model.pkl', 'district': 'category'},
+    'RF': {'file': 'rf_model.pkl', 'district': 'rf_encoded'},
+}
+META_MODEL_SPECS = {
+    'LGBM_predict': {'file': 'lgbm_meta_model.pkl', 'district': 'category'},
+    'XGB_predict': {'file': 'xgb_meta_model.pkl', 'district': 'codes'},
+    'CB_predict': {'file': 'catboost_meta_model.pkl', 'district': 'category'},
+    'RF_predict': {'file': 'rf_meta_model.pkl', 'district': 'codes'},
+}
+LABEL_ENCODER_FILE = 'label_encoder.pkl'
+
+
+# --- Artifacts ---
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _dump(obj, path):
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f)
+
+
+def export_artifacts(base_models, meta_models, label_encoder, districts, root=ARTIFACT_ROOT, version=None,
+                     base_feature_cols=BASE_FEATURE_COLS, meta_feature_cols=META_FEATURE_COLS, metadata=None):
+    """
+    Writes a new artifact version and points LATEST at it; returns its directory.
+
+    base_models: {'LGBM': best_lgb_model, 'XGB': ..., 'CatBoost': ..., 'RF': ...}
+    meta_models: {'LGBM_predict': best_lgbm_meta, 'XGB_predict': ..., 'CB_predict': ..., 'RF_predict': ...}
+    districts: every district seen in training (the category vocabulary).
+    """
+    version = version or datetime.now().strftime('%Y%m%dT%H%M%S')
+    final_dir = os.path.join(root, version)
+    if os.path.exists(final_dir):
+        raise FileExistsError(f"Artifact version '{version}' already exists in {root}")
+
+    # Build the version in a scratch directory and rename it, so a crashed
+    # export never leaves a half-written version behind
+    tmp_dir = final_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_dir, 'base'))
+    os.makedirs(os.path.join(tmp_dir, 'meta'))
+
+    files = {}
+    for name, spec in BASE_MODEL_SPECS.items():
+        rel = os.path.join('base', spec['file'])
+        _dump(base_models[name], os.path.join(tmp_dir, rel))
+        files[rel] = _sha256(os.path.join(tmp_dir, rel))
+    for name, spec in META_MODEL_SPECS.items():
+        rel = os.path.join('meta', spec['file'])
+        _dump(meta_models[name], os.path.join(tmp_dir, rel))
+        files[rel] = _sha256(os.path.join(tmp_dir, rel))
+    rel = os.path.join('meta', LABEL_ENCODER_FILE)
+    _dump(label_encoder, os.path.join(tmp_dir, rel))
+    files[rel] = _sha256(os.path.join(tmp_dir, rel))
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'base_feature_cols': list(base_feature_cols),
+        'meta_feature_cols': list(meta_feature_cols),
+        'districts': build_vocabulary(districts),
+        'base_models': BASE_MODEL_SPECS,
+        'meta_models': META_MODEL_SPECS,
+        'files': files,
+        'metadata': metadata or {},
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(tmp_dir, final_dir)
+    with open(os.path.join(root, 'LATEST'), 'w') as f:
+        f.write(version)
+    return final_dir
+
+
+def resolve_version(root=ARTIFACT_ROOT, version=None):
+    """Directory of the requested (or newest) artifact version."""
+    if version is None:
+        with open(os.path.join(root, 'LATEST')) as f:
+            version = f.read().strip()
+    return os.path.join(root, version)
+
+
+def load_bundle(root=ARTIFACT_ROOT, version=None, verify=True, grid=None):
+    """Loads one artifact version into a ScoringBundle, checking file hashes first."""
+    path = resolve_version(root, version)
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if verify:
+        for rel, digest in manifest['files'].items():
+            if _sha256(os.path.join(path, rel)) != digest:
+                raise ValueError(f"Artifact file '{rel}' does not match its manifest hash")
+
+    def load(rel):
+        with open(os.path.join(path, rel), 'rb') as f:
+            return pickle.load(f)
+
+    base_models = {name: load(os.path.join('base', spec['file'])) for name, spec in manifest['base_models'].items()}
+    meta_models = {name: load(os.path.join('meta', spec['file'])) for name, spec in manifest['meta_models'].items()}
+    label_encoder = load(os.path.join('meta', LABEL_ENCODER_FILE))
+    return ScoringBundle(manifest, base_models, meta_models, label_encoder, grid)
+
+
+# --- Scoring ---
+
+def prepare_listings(df, districts):
+    """
+    Applies the model_v2.ipynb preprocessing to raw listings: pet_policy_binary
+    from pet_policy (1 when a policy is listed), numeric features as floats and
+    district as a categorical over the training vocabulary.
+    """
+    df = df.copy()
+    # Row by row, so a listing that sends pet_policy_binary doesn't change one batched with it that doesn't
+    pet_policy = df['pet_policy'] if 'pet_policy' in df.columns else pd.Series(np.nan, index=df.index)
+    derived = pet_policy.notna().astype(int)
+    if 'pet_policy_binary' in df.columns:
+        df['pet_policy_binary'] = pd.to_numeric(df['pet_policy_binary'], errors='coerce').fillna(derived)
+    else:
+        df['pet_policy_binary'] = derived
+    # Same encoder the feature store trains with; unseen districts become missing
+    df['district'] = pd.Categorical.from_codes(encode_categorical(df['district'], districts), categories=districts)
+    for col in df.columns:
+        if col not in ('district', 'property_name', 'pet_policy') and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def model_inputs(prepared, columns):
+    """Every district encoding of one feature matrix, built once per batch."""
+    X = prepared[columns]
+    codes = X['district'].cat.codes.astype(np.int64)
+    rf_encoded = X.drop(columns='district').assign(district_encoded=codes)
+    return {'category': X, 'codes': X.assign(district=codes), 'rf_encoded': rf_encoded}
+
+
+class ScoringBundle:
+    """A loaded artifact version: base regressors, meta-classifiers and the ensemble."""
+
+    def __init__(self, manifest, base_models, meta_models, label_encoder, grid=None):
+        self.manifest = manifest
+        self.version = manifest['version']
+        self.districts = manifest['districts']
+        self.base_models = base_models
+        self.meta_models = meta_models
+        self.label_encoder = label_encoder
+        # Optional AccessibilityGrid filling missing POI / MTR features from easting/northing
+        self.grid = grid
+        # pet_policy_binary is derived from pet_policy when a listing doesn't send it
+        self.required_cols = [col for col in dict.fromkeys(manifest['base_feature_cols'] +
+                                                           manifest['meta_feature_cols'])
+                              if col != 'pet_policy_binary']
+        self.grid_cols = set(grid.layers) | {'walking_time_to_mtr'} if grid is not None else set()
+
+    def validate_records(self, records):
+        """
+        Raises ValueError for the first listing that could not be scored on its
+        own: not an object, a required feature key missing, district not a
+        string or a numeric feature not a number. null is accepted (scored as
+        missing). With a grid, listings that send easting/northing may leave
+        out the features the grid fills.
+        """
+        for i, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise ValueError(f'listing {i} is not a JSON object')
+            required = self.required_cols
+            if self.grid_cols and record.get('easting') is not None and record.get('northing') is not None:
+                required = [col for col in required if col not in self.grid_cols]
+            missing = [col for col in required if col not in record]
+            if missing:
+                raise ValueError(f'listing {i} is missing {missing}')
+            for col in required:
+                value = record[col]
+                if value is None:
+                    continue
+                if col == 'district':
+                    if not isinstance(value, str):
+                        raise ValueError(f'listing {i}: district must be a string, got {value!r}')
+                elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f'listing {i}: {col} must be a number, got {value!r}')
+
+    def predict_frame(self, df):
+        """
+        Scores a DataFrame of listings. Returns one row per listing with each base
+        model's price, each meta-classifier's vote and the ensemble price.
+        """
+        with span('predict_frame', rows_in=len(df), version=self.version) as frame_span:
+            with span('prepare', rows_in=len(df)):
+                if self.grid is not None:
+                    df = self.grid.fill_features(df)
+                prepared = prepare_listings(df, self.districts)
+                base_inputs = model_inputs(prepared, self.manifest['base_feature_cols'])
+                meta_inputs = model_inputs(prepared, self.manifest['meta_feature_cols'])
+
+            out = pd.DataFrame(index=df.index)
+            for name, spec in self.manifest['base_models'].items():
+                with span(f'base.{name}', rows_in=len(df)):
+                    out[MODEL_TO_PRED[name]] = np.ravel(self.base_models[name].predict(base_inputs[spec['district']]))
+            for name, spec in self.manifest['meta_models'].items():
+                with span(f'meta.{name}', rows_in=len(df)):
+                    encoded = np.ravel(self.meta_models[name].predict(meta_inputs[spec['district']])).astype(np.int64)
+                    out[name] = self.label_encoder.inverse_transform(encoded)
+
+            with span('ensemble', rows_in=len(df)):
+                models = list(MODEL_TO_PRED)
+                out['ensemble_predicted'] = majority_weighted_ensemble(
+                    out[VOTE_COLS].to_numpy(dtype=object),
+                    out[[MODEL_TO_PRED[model] for model in models]].to_numpy(dtype=np.float64),
+                    models,
+                )
+            frame_span.rows_out = len(out)
+        return out
+
+
+# --- Micro-batching and metrics ---
+
+class ServiceStats:
+    """Rolling request latencies, batch sizes and throughput for /metrics."""
+
+    def __init__(self, window=20_000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._finished_at = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self.started = time.time()
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+
+    def record_request(self, latency_s, n_rows):
+        with self._lock:
+            self._latencies.append(latency_s)
+            self._finished_at.append(time.time())
+            self.requests += 1
+            self.rows += n_rows
+
+    def record_batch(self, n_rows):
+        with self._lock:
+            self._batch_sizes.append(n_rows)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self, throughput_window_s=10.0):
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64) * 1000
+            finished = np.array(self._finished_at, dtype=np.float64)
+            batch_sizes = np.array(self._batch_sizes, dtype=np.float64)
+            requests, rows, errors = self.requests, self.rows, self.errors
+        now = time.time()
+        window = min(throughput_window_s, now - self.started) or 1.0
+        p50, p99 = np.percentile(latencies, [50, 99]) if latencies.size else (np.nan, np.nan)
+        return {
+            'uptime_s': round(now - self.started, 1),
+            'requests': requests,
+            'rows': rows,
+            'errors': errors,
+            'latency_p50_ms': round(float(p50), 3),
+            'latency_p99_ms': round(float(p99), 3),
+            'throughput_rps': round(float((finished >= now - window).sum() / window), 1),
+            'mean_batch_rows': round(float(batch_sizes.mean()), 1) if batch_sizes.size else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Pools concurrent scoring requests and runs them through score_fn together.
+
+    A batch closes when it holds max_batch_rows listings or max_wait_ms after its
+    first request arrived, whichever comes first; a single worker thread scores
+    it, so the models are never called concurrently.
+
+    validate_fn runs on each request in submit(), before it can join a batch;
+    its ValueError goes straight back to that caller. If a batch still fails,
+    its requests are rescored one by one so the error stays with its own request.
+    """
+
+    def __init__(self, score_fn, max_batch_rows=512, max_wait_ms=5.0, stats=None, validate_fn=None):
+        self.score_fn = score_fn
+        self.validate_fn = validate_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_s = max_wait_ms / 1000
+        self.stats = stats or ServiceStats()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, records):
+        """
+        Queues a list of listing dicts; the Future resolves to one score dict per
+        listing. Raises ValueError right away if validate_fn rejects the listings.
+        """
+        if self.validate_fn is not None:
+            self.validate_fn(records)
+        future = Future()
+        self._queue.put((records, future, time.perf_counter()))
+        return future
+
+    def score(self, records, timeout=None):
+        return self.submit(records).result(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch, n_rows = [first], len(first[0])
+        deadline = time.perf_counter() + self.max_wait_s
+        while n_rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Finish this batch, then stop
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            records = [record for item in batch for record in item[0]]
+            try:
+                scored = self.score_fn(pd.DataFrame.from_records(records))
+            except Exception as e:
+                if len(batch) == 1:
+                    self.stats.record_error()
+                    batch[0][1].set_exception(e)
+                else:
+                    # Isolate the failure: every request gets the result it would have had alone
+                    for item in batch:
+                        self._finish_alone(item)
+                continue
+            self.stats.record_batch(len(records))
+            # One conversion per batch; per-request DataFrame slicing costs more than the models
+            scored = scored.to_dict(orient='records')
+            start = 0
+            for item_records, future, submitted in batch:
+                end = start + len(item_records)
+                future.set_result(scored[start:end])
+                self.stats.record_request(time.perf_counter() - submitted, len(item_records))
+                start = end
+
+    def _finish_alone(self, item):
+        item_records, future, submitted = item
+        try:
+            scored = self.score_fn(pd.DataFrame.from_records(item_records))
+        except Exception as e:
+            self.stats.record_error()
+            future.set_exception(e)
+            return
+        self.stats.record_batch(len(item_records))
+        future.set_result(scored.to_dict(orient='records'))
+        self.stats.record_request(time.perf_counter() - submitted, len(item_records))
+
+
+# --- HTTP server ---
+
+def _json_safe(value):
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def scores_to_json(scored):
+    """Response body rows (from scored record dicts): the ensemble price plus the per-model detail."""
+    rows = []
+    for record in scored:
+        rows.append({
+            'ensemble_price': _json_safe(record['ensemble_predicted']),
+            'model_prices': {model: _json_safe(record[col]) for model, col in MODEL_TO_PRED.items()},
+            'votes': {col: record[col] for col in VOTE_COLS},
+        })
+    return rows
+
+
+def make_handler(batcher, bundle):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, so load generators can reuse connections
+        # Headers and body go out in separate writes; with Nagle on, the client's
+        # delayed ACK adds ~40 ms to every keep-alive response
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send(200, {'version': bundle.version, **batcher.stats.snapshot()})
+            elif self.path == '/health':
+                self._send(200, {'status': 'ok', 'version': bundle.version})
+            else:
+                self._send(404, {'error': f'unknown path {self.path}'})
+
+        def do_POST(self):
+            if self.path != '/score':
+                self._send(404, {'error': f'unknown path {self.path}'})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except (ValueError, json.JSONDecodeError):
+                self._send(400, {'error': 'body must be JSON'})
+                return
+            # Accept one listing, a list of listings or {"listings": [...]}
+            records = payload.get('listings', payload) if isinstance(payload, dict) else payload
+            records = [records] if isinstance(records, dict) else records
+            if not records:
+                self._send(400, {'error': 'no listings given'})
+                return
+            if not isinstance(records, list):
+                self._send(400, {'error': 'body must be a listing, a list of listings or {"listings": [...]}'})
+                return
+            try:
+                future = batcher.submit(records)
+            except ValueError as e:
+                self._send(400, {'error': str(e)})
+                return
+            try:
+                scored = future.result(timeout=30)
+            except Exception as e:
+                self._send(500, {'error': str(e)})
+                return
+            self._send(200, {'version': bundle.version, 'predictions': scores_to_json(scored)})
+
+    return ScoringHandler
+
+
+def serve(bundle, host='127.0.0.1', port=8000, max_batch_rows=512, max_wait_ms=5.0):
+    """Starts the scoring server (returns it running in a background thread) and its batcher."""
+    batcher = MicroBatcher(bundle.predict_frame, max_batch_rows, max_wait_ms, validate_fn=bundle.validate_records)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher, bundle))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, batcher
+
+
+def score_csv(bundle, input_csv, output_csv, chunksize=50_000):
+    """Offline batch scoring: appends the model outputs to every row of a listings CSV."""
+    written = 0
+    with span('score_csv', source=input_csv, output=output_csv) as s:
+        for i, chunk in enumerate(pd.read_csv(input_csv, chunksize=chunksize)):
+            scored = pd.concat([chunk, bundle.predict_frame(chunk)], axis=1)
+            with span('write', rows_in=len(scored)):
+                scored.to_csv(output_csv, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            written += len(scored)
+        s.rows_in = s.rows_out = written
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='AVM ensemble scoring service')
+    parser.add_argument('--artifacts', default=ARTIFACT_ROOT, help='artifact root directory')
+    parser.add_argument('--version', default=None, help='artifact version (default: LATEST)')
+    parser.add_argument('--grid', default=None,
+                        help='accessibility grid directory used to fill missing POI / MTR features')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = sub.add_parser('serve', help='run the HTTP scoring server')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--max-batch-rows', type=int, default=512)
+    serve_parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    serve_parser.add_argument('--trace', action='store_true',
+                              help='record a span per scored batch to traces/ (off by default: one JSON line per batch)')
+
+    score_parser = sub.add_parser('score', help='score a listings CSV')
+    score_parser.add_argument('input_csv')
+    score_parser.add_argument('output_csv')
+    args = parser.parse_args()
+
+    if args.command == 'score' or args.trace:
+        configure(f'scoring_{args.command}')
+    bundle = load_bundle(args.artifacts, args.version, grid=AccessibilityGrid(args.grid) if args.grid else None)
+    print(f"Loaded artifact version {bundle.version}")
+
+    if args.command == 'score':
+        start = time.perf_counter()
+        n = score_csv(bundle, args.input_csv, args.output_csv)
+        seconds = time.perf_counter() - start
+        print(f"✅ Scored {n} listings in {seconds:.2f}s ({n / seconds:,.0f} rows/s) -> '{args.output_csv}'")
+    else:
+        server, batcher = serve(bundle, args.host, args.port, args.max_batch_rows, args.max_wait_ms)
+        print(f"Serving on http://{args.host}:{args.port} (POST /score, GET /metrics, GET /health)")
+        try:
+            while True:
+                time.sleep(30)
+                print(json.dumps(batcher.stats.snapshot()))
+        except KeyboardInterrupt:
+            server.shutdown()
+            batcher.close()
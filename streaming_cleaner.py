@@ -0,0 +1,80 @@
+import glob
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+
+"""
+Streaming CSV-to-Parquet Cleaner
+
+Shared by clean_centanet_data.py and clean_730_dataset.py. A raw scrape is
+read in fixed-size chunks with explicit dtypes, each chunk is run through the
+script's cleaning function and written as one part file of a Parquet dataset
+directory. Only one chunk is ever in memory, so peak memory does not grow with
+the scrape.
+
+Downstream scripts read the dataset back with read_table(), passing the
+columns they need so nothing else is parsed.
+"""
+
+DEFAULT_CHUNKSIZE = 200_000
+CATEGORICAL_COLS = ['district', 'property_name']
+
+
+def _clear_parts(out_dir):
+    """Removes part files from a previous run so stale chunks are not read back."""
+    os.makedirs(out_dir, exist_ok=True)
+    for part in glob.glob(os.path.join(out_dir, 'part-*.parquet')):
+        os.remove(part)
+
+
+def stream_clean(raw_path, out_dir, transform, read_dtypes=None, output_dtypes=None,
+                 categorical_cols=CATEGORICAL_COLS, chunksize=DEFAULT_CHUNKSIZE, **read_kwargs):
+    """
+    Cleans raw_path chunk by chunk into a Parquet dataset directory.
+
+    transform: function taking a raw chunk DataFrame and returning the cleaned chunk.
+    read_dtypes: explicit dtypes for read_csv, so every chunk is parsed the same way.
+    output_dtypes: dtypes applied to each cleaned chunk, so all part files share
+        one schema regardless of which values a chunk happened to contain.
+    categorical_cols: stored as dictionary-encoded (categorical) columns; other
+        text columns are stored as strings.
+
+    Returns (rows_in, rows_out).
+    """
+    _clear_parts(out_dir)
+    rows_in = rows_out = 0
+    reader = pd.read_csv(raw_path, dtype=read_dtypes, chunksize=chunksize, **read_kwargs)
+    for i, chunk in enumerate(reader):
+        rows_in += len(chunk)
+        cleaned = transform(chunk)
+        if output_dtypes:
+            cleaned = cleaned.astype({col: dtype for col, dtype in output_dtypes.items() if col in cleaned.columns})
+        for col in cleaned.columns:
+            is_text = cleaned[col].dtype == object or pd.api.types.is_string_dtype(cleaned[col].dtype)
+            if col in categorical_cols:
+                cleaned[col] = cleaned[col].astype('string').astype('category')
+            elif is_text:
+                # A chunk where a text column is entirely blank would otherwise
+                # be written with a null type and clash with the other parts
+                cleaned[col] = cleaned[col].astype('string')
+        cleaned.to_parquet(os.path.join(out_dir, f'part-{i:05d}.parquet'), index=False)
+        rows_out += len(cleaned)
+    return rows_in, rows_out
+
+
+def read_table(path, columns=None, filters=None):
+    """
+    Reads a cleaned table with column projection.
+
+    Accepts a Parquet dataset directory or file (only `columns` are decoded and
+    `filters` are pushed down to the row groups), a Feather file written by
+    property_schema.write_dataset (memory-mapped) or, for older outputs, a CSV
+    (only `columns` are parsed).
+    """
+    if path.endswith('.feather'):
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    if path.endswith('.csv'):
+        df = pd.read_csv(path, usecols=columns)
+        return df if columns is None else df[columns]
+    return pd.read_parquet(path, columns=columns, filters=filters)
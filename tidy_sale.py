@@ -1,43 +1,65 @@
 import pandas as pd
 import json
+from district_index import MIN_CONFIDENCE, DistrictIndex
+from streaming_cleaner import read_table
 
-# Replace 'your_file.csv' with the path to your CSV file
-sale_df = pd.read_csv('map/merged_housing_data.csv')
-print(sale_df.head())
+SALE_PATH = 'map/merged_housing_data.csv'
+DICTIONARY_PATH = 'dictionary.txt'
+OUTPUT_PATH = 'txn_df.csv'
+REVIEW_PATH = 'txn_df_district_review.csv'
+# Fuzzy candidates only go to the review file unless this is set (see district_index.py)
+ACCEPT_FUZZY = False
 
 
-# Load the dictionary from the text file
-with open('dictionary.txt', 'r', encoding='utf-8') as file:
-    hong_kong_districts = json.load(file)['districts']  # Access the 'districts' key
+def load_district_dictionary(path=DICTIONARY_PATH):
+    # Load the dictionary from the text file
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)['districts']  # Access the 'districts' key
 
-#add a new column 
-district_mapping = {area: district for district, areas in hong_kong_districts.items() for area in areas}
-district_keys = set(hong_kong_districts.keys())
 
-def clean_district_name(d):
-    if isinstance(d, str):
-        d_clean = d.split('/')[0].strip() if '/' in d else d.strip()
-        if d_clean in district_keys:
-            return d_clean
-        return district_mapping.get(d_clean, None)
-    return None
+def match_districts(districts, hong_kong_districts, min_confidence=MIN_CONFIDENCE, accept_fuzzy=ACCEPT_FUZZY):
+    """main_district, matched alias, confidence, match method and candidate district for every district value."""
+    return DistrictIndex(hong_kong_districts, min_confidence, accept_fuzzy).map_column(districts)
 
-sale_df['main_district'] = sale_df['district'].apply(clean_district_name)
 
-# Check and count unmatched districts
-unmatched_df = sale_df[sale_df['district'].isnull()]
-print('Number of unmatched rows:', len(unmatched_df))
-print('Distinct unmatched District values:')
-unmatched_districts = unmatched_df['district'].drop_duplicates()
-unmatched_districts = unmatched_districts[unmatched_districts.notnull()]
-print(unmatched_districts.to_list())
+def map_main_districts(districts, hong_kong_districts):
+    """main_district for every value of the district column."""
+    return match_districts(districts, hong_kong_districts)['main_district']
 
-sale_df['price_per_sqft'] = sale_df['price'] / sale_df['saleable_area']
 
-# #arrange order by district 
-sale_df['housing_market_area'] = sale_df['district']
-sale_df = sale_df[['main_district', 'housing_market_area', 'price', 'saleable_area', 'price_per_sqft', 'latitude', 'longitude', 'bedroom_count', 'property_age']]
+if __name__ == '__main__':
+    # Replace 'your_file.csv' with the path to your CSV file
+    # Only the columns this script uses are parsed
+    sale_df = read_table(SALE_PATH, columns=[
+        'district', 'price', 'saleable_area', 'latitude', 'longitude', 'bedroom_count', 'property_age'
+    ])
+    print(sale_df.head())
 
-print(sale_df.head())
-# district_demog_df2.sort_values(by='district')
-sale_df.to_csv('txn_df.csv', index=False)
\ No newline at end of file
+    #add a new column
+    matches = match_districts(sale_df['district'], load_district_dictionary())
+    sale_df['main_district'] = matches['main_district']
+    sale_df['main_district_confidence'] = matches['confidence']
+
+    # Report unmatched and fuzzy-matched districts (one row per distinct raw value) for review
+    review = pd.concat([sale_df['district'], matches], axis=1)
+    review = review[review['method'] != 'exact'].value_counts(
+        ['district', 'main_district', 'candidate_district', 'matched_alias', 'confidence', 'method'], dropna=False
+    ).rename('rows').reset_index()
+    unmatched = review[review['main_district'].isnull()]
+    print('Number of unmatched rows:', int(unmatched['rows'].sum()))
+    print('Distinct unmatched District values:')
+    print(unmatched['district'].dropna().to_list())
+    fuzzy = review['method'] == 'fuzzy'
+    print('Number of rows with a fuzzy candidate:', int(review.loc[fuzzy, 'rows'].sum()),
+          f"({int(review.loc[fuzzy & review['main_district'].notnull(), 'rows'].sum())} accepted)")
+    review.to_csv(REVIEW_PATH, index=False)
+
+    sale_df['price_per_sqft'] = sale_df['price'] / sale_df['saleable_area']
+
+    # #arrange order by district
+    sale_df['housing_market_area'] = sale_df['district']
+    sale_df = sale_df[['main_district', 'main_district_confidence', 'housing_market_area', 'price', 'saleable_area', 'price_per_sqft', 'latitude', 'longitude', 'bedroom_count', 'property_age']]
+
+    print(sale_df.head())
+    # district_demog_df2.sort_values(by='district')
+    sale_df.to_csv(OUTPUT_PATH, index=False)
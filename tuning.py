@@ -0,0 +1,457 @@
+import argparse
+import math
+import multiprocessing
+import os
+import time
+import warnings
+
+import numpy as np
+import optuna
+import pandas as pd
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+
+from feature_store import FeatureStore
+from property_schema import read_dataset
+
+"""
+Parallel, Pruned, Resumable Hyperparameter Tuning
+
+Shared replacement for lgb_objective / xgb_objective / catboost_objective /
+rf_objective / svr_objective in model_v2.ipynb. The search spaces and the
+train/validation/test split are the notebook's; what changes is how trials run:
+
+- Studies live in a local SQLite database, so an interrupted run resumes where
+  it stopped. Trials that were running when a worker died are retried
+  (heartbeat + retry callback), and --trials is a total across
+  every run, not per run.
+- Trials run in parallel worker processes. Cores are split between them: each
+  trial's booster gets cpu_count // workers threads.
+- Every family reports a validation curve and is pruned by a median or
+  successive-halving pruner: boosters per boosting round (with early
+  stopping on the same validation set), the random forest per block of trees
+  (warm start) and SVR per growing fraction of the training rows.
+- Each study is keyed on the feature store entry of the data it tunes on, so a
+  different --data file, or a refresh of the same one, starts a new study
+  instead of resuming (and serving best_params from) one tuned on other data.
+
+The objective is validation RMSE (minimized).
+
+    python tuning.py --families lgbm xgb catboost rf svr --trials 100 --workers 4
+    python tuning.py --summary
+"""
+
+DATA_PATH = 'centanet_cleaned_proximity_final.csv'
+STORAGE_PATH = 'tuning/optuna_studies.db'
+FAMILIES = ['lgbm', 'xgb', 'catboost', 'rf', 'svr']
+STUDY_PREFIX = 'avm'
+
+# Columns model_v2.ipynb drops before the three-way split
+COLUMNS_TO_DROP = [
+    'property_name', 'latitude', 'longitude', 'walking_time_to_mtr',
+    'category_Community_Facilities_within_1000m', 'distance_to_nearest_match_km',
+    'distance_to_nearest_mtr_km', 'category_Recreation_within_1000m', 'category_Religion_within_2000m',
+    'category_Tourism_within_2000m', 'category_Transportation_within_1000m'
+]
+EARLY_STOPPING_ROUNDS = 30
+REPORT_EVERY = 10  # boosting rounds between intermediate reports (each one is a database write)
+RF_TREE_BLOCK = 25  # trees added per random-forest pruning step
+SVR_RUNGS = [0.25, 0.5, 1.0]  # training-row fractions per SVR pruning step (reported as percent)
+
+# Heartbeats and trial retries are still flagged experimental
+warnings.filterwarnings('ignore', category=optuna.exceptions.ExperimentalWarning)
+
+
+# --- Data ---
+
+def model_features(data):
+    """model_v2.ipynb's feature table: COLUMNS_TO_DROP removed, pet_policy as pet_policy_binary, price kept."""
+    X = data.drop(columns=[col for col in COLUMNS_TO_DROP if col in data.columns])
+    if 'pet_policy' in X.columns:
+        X['pet_policy_binary'] = X['pet_policy'].notna().astype(int)
+        X = X.drop(columns='pet_policy')
+    return X
+
+
+def load_features(path=DATA_PATH, store=None):
+    """The model_v2.ipynb feature table of path as a FeatureSet (built once, then served from the store)."""
+    table = model_features(read_dataset(path, nullable=False))
+    spec = {'columns': [col for col in table.columns if col != 'price'], 'categorical': ['district'],
+            'target': 'price'}
+    return (store or FeatureStore()).get(table, spec)
+
+
+def load_splits(path=DATA_PATH, categorical='category', store=None):
+    """
+    The model_v2.ipynb features and its 60/20/20 train/validation/test split
+    (random_state=42), served from the feature store so repeated loads (every
+    worker, every run) reuse one cached encoding.
+
+    categorical='category' keeps district as a pandas categorical (boosters);
+    'codes' replaces it with 'district_encoded' integer codes appended last, as
+    the notebook's RF and SVR cells do.
+    """
+    features = load_features(path, store)
+
+    X = features.frame(categorical)
+    if categorical == 'codes':
+        X['district_encoded'] = X.pop('district')
+    y = pd.Series(features.target, name='price')
+
+    X_temp, X_test, y_temp, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_val, y_train, y_val = train_test_split(X_temp, y_temp, test_size=0.25, random_state=42)
+    return X_train, X_val, X_test, y_train, y_val, y_test
+
+
+def _rmse(y_true, y_pred):
+    return math.sqrt(mean_squared_error(y_true, y_pred))
+
+
+# --- Pruning helpers ---
+
+class _CurveReporter:
+    """Reports a validation-RMSE curve to the trial and remembers whether it asked to stop."""
+
+    def __init__(self, trial, every=REPORT_EVERY):
+        self.trial = trial
+        self.every = every
+        self.pruned = False
+
+    def report(self, step, rmse):
+        """Returns True when training should stop because the trial is pruned."""
+        if step % self.every:
+            return False
+        self.trial.report(rmse, step)
+        self.pruned = self.trial.should_prune()
+        return self.pruned
+
+    def raise_if_pruned(self):
+        if self.pruned:
+            raise optuna.TrialPruned()
+
+
+# --- Objectives (search spaces from model_v2.ipynb) ---
+
+def lgbm_objective(trial, data, n_threads):
+    import lightgbm as lgb
+
+    X_train, X_val, _, y_train, y_val, _ = data
+    params = {
+        'num_leaves': trial.suggest_int('num_leaves', 31, 150),
+        'min_data_in_leaf': trial.suggest_int('min_data_in_leaf', 15, 35),
+        'feature_fraction': trial.suggest_float('feature_fraction', 0.7, 1.0),
+        'n_estimators': trial.suggest_int('n_estimators', 100, 300),
+        'learning_rate': trial.suggest_float('learning_rate', 0.05, 0.2),
+        'max_depth': trial.suggest_int('max_depth', 5, 7),
+        'reg_alpha': trial.suggest_float('reg_alpha', 2.5, 5.0),
+        'reg_lambda': trial.suggest_float('reg_lambda', 2.5, 5.0),
+    }
+    reporter = _CurveReporter(trial)
+
+    def prune_callback(env):
+        mse = env.evaluation_result_list[0][2]
+        if reporter.report(env.iteration + 1, math.sqrt(mse)):
+            raise lgb.callback.EarlyStopException(env.iteration, env.evaluation_result_list)
+
+    model = lgb.LGBMRegressor(**params, objective='regression', random_state=42, verbosity=-1, n_jobs=n_threads)
+    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], eval_metric='l2',
+              callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False), prune_callback])
+    reporter.raise_if_pruned()
+    trial.set_user_attr('best_iteration', int(model.best_iteration_ or params['n_estimators']))
+    return _rmse(y_val, model.predict(X_val))
+
+
+def xgb_objective(trial, data, n_threads):
+    import xgboost as xgb
+
+    X_train, X_val, _, y_train, y_val, _ = data
+    params = {
+        'max_depth': trial.suggest_int('max_depth', 3, 8),
+        'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
+        'subsample': trial.suggest_float('subsample', 0.7, 1.0),
+        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.7, 0.85),
+        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
+        'n_estimators': trial.suggest_int('n_estimators', 100, 200),
+        'reg_alpha': trial.suggest_float('reg_alpha', 2.5, 5.0),
+        'reg_lambda': trial.suggest_float('reg_lambda', 2.5, 5.0),
+    }
+    reporter = _CurveReporter(trial)
+
+    class PruneCallback(xgb.callback.TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            return reporter.report(epoch + 1, evals_log['validation_0']['rmse'][-1])
+
+    model = xgb.XGBRegressor(**params, objective='reg:squarederror', random_state=42, verbosity=0,
+                             n_jobs=n_threads, enable_categorical=True, eval_metric='rmse',
+                             early_stopping_rounds=EARLY_STOPPING_ROUNDS, callbacks=[PruneCallback()])
+    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    reporter.raise_if_pruned()
+    trial.set_user_attr('best_iteration', int(model.best_iteration) + 1)
+    return _rmse(y_val, model.predict(X_val))
+
+
+def catboost_objective(trial, data, n_threads):
+    import catboost as cb
+
+    X_train, X_val, _, y_train, y_val, _ = data
+    params = {
+        'depth': trial.suggest_int('depth', 4, 8),
+        'learning_rate': trial.suggest_float('learning_rate', 0.03, 0.15),
+        'iterations': trial.suggest_int('iterations', 100, 300),
+        'l2_leaf_reg': trial.suggest_float('l2_leaf_reg', 1.0, 10.0),
+        'border_count': trial.suggest_int('border_count', 32, 128),
+        'bagging_temperature': trial.suggest_float('bagging_temperature', 0.0, 1.0),
+        'random_strength': trial.suggest_float('random_strength', 0.0, 2.0),
+        'min_data_in_leaf': trial.suggest_int('min_data_in_leaf', 20, 100),
+    }
+    reporter = _CurveReporter(trial)
+
+    class PruneCallback:
+        def after_iteration(self, info):
+            # Returning False stops training
+            return not reporter.report(info.iteration, info.metrics['validation']['RMSE'][-1])
+
+    model = cb.CatBoostRegressor(**params, objective='RMSE', random_state=42, verbose=False,
+                                 thread_count=n_threads, cat_features=['district'])
+    model.fit(X_train, y_train, eval_set=(X_val, y_val), early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+              callbacks=[PruneCallback()])
+    reporter.raise_if_pruned()
+    trial.set_user_attr('best_iteration', int(model.get_best_iteration()) + 1)
+    return _rmse(y_val, model.predict(X_val))
+
+
+def rf_objective(trial, data, n_threads):
+    from sklearn.ensemble import RandomForestRegressor
+
+    X_train, X_val, _, y_train, y_val, _ = data
+    max_depth = trial.suggest_int('max_depth', 3, 12) if trial.suggest_categorical(
+        'max_depth_type', ['int', 'none']) == 'int' else None
+    max_leaf_nodes = trial.suggest_int('max_leaf_nodes', 10, 100) if trial.suggest_categorical(
+        'max_leaf_nodes_type', ['int', 'none']) == 'int' else None
+    n_estimators = trial.suggest_int('n_estimators', 50, 200)
+    params = {
+        'max_features': trial.suggest_categorical('max_features', [0.3, 0.5, 0.7]),
+        'max_depth': max_depth,
+        'min_samples_split': trial.suggest_int('min_samples_split', 10, 50),
+        'min_samples_leaf': trial.suggest_int('min_samples_leaf', 5, 20),
+        'max_leaf_nodes': max_leaf_nodes,
+        'bootstrap': trial.suggest_categorical('bootstrap', [True, False]),
+    }
+
+    # Grow the forest a block of trees at a time so weak configurations are pruned early
+    model = RandomForestRegressor(**params, n_estimators=0, warm_start=True, random_state=42, n_jobs=n_threads)
+    reporter = _CurveReporter(trial, every=1)
+    for n_trees in range(RF_TREE_BLOCK, n_estimators + RF_TREE_BLOCK, RF_TREE_BLOCK):
+        model.set_params(n_estimators=min(n_trees, n_estimators))
+        model.fit(X_train, y_train)
+        rmse = _rmse(y_val, model.predict(X_val))
+        if model.n_estimators < n_estimators and reporter.report(model.n_estimators, rmse):
+            reporter.raise_if_pruned()
+    return rmse
+
+
+def svr_objective(trial, data, n_threads):
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.svm import SVR
+
+    X_train, X_val, _, y_train, y_val, _ = data
+    params = {
+        'C': trial.suggest_float('C', 0.1, 1000, log=True),
+        'epsilon': trial.suggest_float('epsilon', 0.01, 1.0),
+        'gamma': trial.suggest_categorical('gamma', ['scale', 'auto']),
+        'kernel': trial.suggest_categorical('kernel', ['rbf', 'poly', 'linear']),
+    }
+    if params['kernel'] == 'poly':
+        params['degree'] = trial.suggest_int('degree', 2, 5)
+
+    # SVR has no training curve; successive rungs fit on a growing share of the
+    # training rows (a fixed random order, so every trial sees the same subsets).
+    # Rungs are reported as percent of the rows, which puts them past the median
+    # pruner's warmup like the boosters' rounds and the forest's tree counts
+    order = np.random.default_rng(42).permutation(len(X_train))
+    reporter = _CurveReporter(trial, every=1)
+    for fraction in SVR_RUNGS:
+        rows = order[:max(1, int(len(order) * fraction))]
+        model = Pipeline([('scaler', StandardScaler()), ('svr', SVR(**params))])
+        model.fit(X_train.iloc[rows], y_train.iloc[rows])
+        rmse = _rmse(y_val, model.predict(X_val))
+        if fraction < 1.0 and reporter.report(int(fraction * 100), rmse):
+            reporter.raise_if_pruned()
+    return rmse
+
+
+# District encoding each family's data is loaded with (see load_splits)
+DISTRICT_ENCODING = {'rf': 'codes', 'svr': 'codes'}
+
+OBJECTIVES = {
+    'lgbm': lgbm_objective,
+    'xgb': xgb_objective,
+    'catboost': catboost_objective,
+    'rf': rf_objective,
+    'svr': svr_objective,
+}
+
+
+# --- Studies ---
+
+def storage_url(path=STORAGE_PATH):
+    return f'sqlite:///{path}'
+
+
+def make_storage(path=STORAGE_PATH):
+    """
+    SQLite storage shared by every worker. The heartbeat marks trials whose
+    worker died as failed, and RetryFailedTrialCallback re-enqueues them with
+    the same parameters when the study resumes.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if hasattr(optuna.storages, 'RetryHeartbeatStaleTrialCallback'):  # Optuna >= 4.9
+        retry = {'heartbeat_stale_trial_callback': optuna.storages.RetryHeartbeatStaleTrialCallback(max_retry=2)}
+    else:
+        retry = {'failed_trial_callback': optuna.storages.RetryFailedTrialCallback(max_retry=2)}
+    return optuna.storages.RDBStorage(
+        storage_url(path),
+        # Several processes write to one SQLite file; wait for locks instead of failing
+        engine_kwargs={'connect_args': {'timeout': 60}},
+        heartbeat_interval=30,
+        grace_period=120,
+        **retry,
+    )
+
+
+def make_pruner(name):
+    if name == 'median':
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=REPORT_EVERY)
+    if name == 'halving':
+        return optuna.pruners.SuccessiveHalvingPruner()
+    if name == 'none':
+        return optuna.pruners.NopPruner()
+    raise ValueError(f"Unknown pruner '{name}'")
+
+
+def data_key(data_path=DATA_PATH):
+    """Feature store entry key of the data: it changes with the file's contents and the feature spec."""
+    return load_features(data_path).key
+
+
+def study_name(family, key):
+    return f'{STUDY_PREFIX}-{family}-{key}'
+
+
+def finished_trials(study):
+    states = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+    return len(study.get_trials(deepcopy=False, states=states))
+
+
+def split_cores(n_workers, total_cores=None):
+    """Threads per trial so that n_workers concurrent trials fill (but don't oversubscribe) the machine."""
+    total_cores = total_cores or os.cpu_count() or 1
+    return max(1, total_cores // max(1, n_workers))
+
+
+def _worker(family, name, n_trials, storage_path, pruner, data_path, n_threads, seed):
+    """One worker process: loads the data once and runs trials until the study has n_trials."""
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    data = load_splits(data_path, DISTRICT_ENCODING.get(family, 'category'))
+    # Constant liar keeps parallel TPE workers from all proposing the same point
+    sampler = optuna.samplers.TPESampler(seed=seed, constant_liar=True)
+    study = optuna.load_study(study_name=name, storage=make_storage(storage_path),
+                              sampler=sampler, pruner=make_pruner(pruner))
+    objective = OBJECTIVES[family]
+    # The cap counts every worker's and every earlier run's trials, so resuming tops up to n_trials
+    stop_at_total = optuna.study.MaxTrialsCallback(
+        n_trials, states=(optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED))
+    study.optimize(lambda trial: objective(trial, data, n_threads), callbacks=[stop_at_total],
+                   catch=(ValueError, ArithmeticError))
+
+
+def tune(family, n_trials=100, n_workers=None, storage_path=STORAGE_PATH, pruner='median',
+         data_path=DATA_PATH, seed=42):
+    """
+    Runs (or resumes) the family's study on data_path until it has n_trials
+    finished trials; returns the study. Only a study on identical data resumes.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    n_threads = split_cores(n_workers)
+    name = study_name(family, data_key(data_path))
+    study = optuna.create_study(study_name=name, storage=make_storage(storage_path),
+                                direction='minimize', load_if_exists=True)
+    study.set_user_attr('data_path', data_path)
+    done = finished_trials(study)
+    if done >= n_trials:
+        print(f"{family}: {done} trials already finished, nothing to do.")
+        return study
+    print(f"{family}: {done} of {n_trials} trials done; running {n_workers} workers x {n_threads} threads.")
+
+    start = time.perf_counter()
+    if n_workers == 1:
+        _worker(family, name, n_trials, storage_path, pruner, data_path, n_threads, seed)
+    else:
+        # spawn: forked workers would inherit the parent's SQLite connection
+        ctx = multiprocessing.get_context('spawn')
+        workers = [ctx.Process(target=_worker,
+                               args=(family, name, n_trials, storage_path, pruner, data_path, n_threads,
+                                     seed + i))
+                   for i in range(n_workers)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+    study = optuna.load_study(study_name=name, storage=make_storage(storage_path))
+    print(f"{family}: {describe(study)} in {time.perf_counter() - start:.0f}s")
+    return study
+
+
+def describe(study):
+    states = pd.Series([t.state.name for t in study.get_trials(deepcopy=False)]).value_counts()
+    best = f"best val RMSE ${study.best_value:,.0f} (trial {study.best_trial.number})" \
+        if states.get('COMPLETE', 0) else 'no completed trial'
+    return f"{best}; " + ', '.join(f"{n} {state.lower()}" for state, n in states.items())
+
+
+def best_params(family, storage_path=STORAGE_PATH, data_path=DATA_PATH):
+    """
+    Best trial's parameters, from the study tuned on data_path, in the form the
+    final-model cells use: RF helper choices resolved, and boosters capped at
+    the early-stopped round count. Raises KeyError when that data has no study.
+    """
+    study = optuna.load_study(study_name=study_name(family, data_key(data_path)), storage=make_storage(storage_path))
+    params = dict(study.best_trial.params)
+    if family == 'rf':
+        if params.pop('max_depth_type') == 'none':
+            params['max_depth'] = None
+        if params.pop('max_leaf_nodes_type') == 'none':
+            params['max_leaf_nodes'] = None
+    best_iteration = study.best_trial.user_attrs.get('best_iteration')
+    if best_iteration:
+        params['iterations' if family == 'catboost' else 'n_estimators'] = best_iteration
+    return params
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parallel Optuna tuning for the AVM base models')
+    parser.add_argument('--families', nargs='+', default=FAMILIES, choices=FAMILIES)
+    parser.add_argument('--trials', type=int, default=100, help='total finished trials per study')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--pruner', default='median', choices=['median', 'halving', 'none'])
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--storage', default=STORAGE_PATH)
+    parser.add_argument('--summary', action='store_true', help='print the stored studies and exit')
+    args = parser.parse_args()
+
+    if args.summary:
+        key = data_key(args.data)
+        for family in args.families:
+            try:
+                study = optuna.load_study(study_name=study_name(family, key), storage=make_storage(args.storage))
+            except KeyError:
+                print(f"{family}: no study on {args.data} yet")
+                continue
+            print(f"{family}: {describe(study)}")
+            print(f"    {best_params(family, args.storage, args.data)}")
+    else:
+        for family in args.families:
+            tune(family, args.trials, args.workers, args.storage, args.pruner, args.data)
@@ -0,0 +1,344 @@
+import numpy as np
+import pandas as pd
+
+from feature_store import encode_categorical
+
+"""
+Age-Group Worthiness Scoring
+
+Columnar version of WorthinessScorer from model_v2.ipynb. The preference
+tables stay as the same dicts, but scoring turns them into arrays: districts
+become integer codes indexing a (groups x districts) table, walking minutes
+index a (groups x 20) table, bedroom counts index four bins. Every multiplier
+is computed for all listings and all age groups at once with NumPy
+broadcasting, giving (groups x listings) arrays.
+
+Results match the row-by-row notebook code, including its edge cases:
+- unknown districts score 0;
+- missing or >= 20 min walking time scores 0;
+- a missing area gets the 1.5 cap;
+- a missing multiplier scores 100;
+- rows without ensemble_predicted are skipped.
+
+    scorer = WorthinessScorer()
+    multipliers_df = calculate_all_multipliers(combined_df, scorer)
+    assessment_df = generate_age_assessment(combined_df, scorer)
+"""
+
+AGE_GROUPS = ['age_2', 'age_4']
+AGE_GROUP_LABELS = {'age_2': '25-44', 'age_4': '65+'}
+
+# Percentile -> multiplier thresholds (combined age groups, actual data)
+UNIFIED_THRESHOLDS = {
+    0: 0.8130,
+    10: 1.0756,
+    20: 1.1106,
+    30: 1.1306,
+    40: 1.1439,
+    50: 1.1595,
+    60: 1.1760,
+    70: 1.2033,
+    80: 1.2310,
+    90: 1.2648,
+    100: 1.3495
+}
+
+COMPONENTS = ['bedroom', 'area', 'poi', 'location', 'walking']
+# POI columns, their normalization caps and poi_scores keys
+POI_COLUMNS = [
+    ('category_Public_Market_within_1000m', 5, 'MUF'),
+    ('category_Education_within_2000m', 10, 'SCH'),
+    ('category_Medical_within_2000m', 5, 'HNC'),
+]
+BEDROOM_BINS = ['range_1_2', 'range_3', 'range_4', 'range_5_plus']
+MAX_WALKING_MINUTES = 20
+
+
+class WorthinessScorer:
+    def __init__(self):
+        """Initialize the worthiness scorer with updated preference weights and mappings"""
+
+        # District scores mapping (age_2 = "25-44", age_4 = "65+")
+        self.district_scores = {
+            'age_2': {  # 25-44
+                'Central and Western': 1.000,
+                'Wan Chai': 0.744,
+                'Islands': 0.621,
+                'Yau Tsim Mong': 0.602,
+                'Southern': 0.586,
+                'Eastern': 0.526,
+                'Sha Tin': 0.396,
+                'Kwun Tong': 0.394,
+                'Tuen Mun': 0.394,
+                'Tai Po': 0.386,
+                'North': 0.384,
+                'Yuen Long': 0.361,
+                'Kowloon City': 0.335,
+                'Kwai Tsing': 0.303,
+                'Tsuen Wan': 0.286,
+                'Sham Shui Po': 0.219,
+                'Sai Kung': 0.201,
+                'Wong Tai Sin': 0.000
+            },
+            'age_4': {  # 65+
+                'Central and Western': 0.000,
+                'Wan Chai': 0.256,
+                'Islands': 0.379,
+                'Yau Tsim Mong': 0.398,
+                'Southern': 0.414,
+                'Eastern': 0.474,
+                'Sha Tin': 0.604,
+                'Kwun Tong': 0.606,
+                'Tuen Mun': 0.606,
+                'Tai Po': 0.614,
+                'North': 0.616,
+                'Yuen Long': 0.639,
+                'Kowloon City': 0.665,
+                'Kwai Tsing': 0.697,
+                'Tsuen Wan': 0.714,
+                'Sham Shui Po': 0.781,
+                'Sai Kung': 0.799,
+                'Wong Tai Sin': 1.000
+            }
+        }
+
+        # Walking time to MTR scores
+        self.walking_time_scores = {
+            'age_2': {  # 25-44
+                0: 1.000, 1: 1.000, 2: 1.000, 3: 1.000, 4: 1.000, 5: 1.000,
+                6: 1.000, 7: 1.000, 8: 1.000, 9: 1.000, 10: 1.000, 11: 1.000,
+                12: 1.000, 13: 0.875, 14: 0.750, 15: 0.625, 16: 0.500,
+                17: 0.375, 18: 0.250, 19: 0.125
+            },
+            'age_4': {  # 65+
+                0: 0.800, 1: 0.800, 2: 0.800, 3: 0.800, 4: 0.800, 5: 0.800,
+                6: 0.800, 7: 0.800, 8: 0.800, 9: 0.800, 10: 0.800, 11: 0.800,
+                12: 0.800, 13: 0.675, 14: 0.550, 15: 0.425, 16: 0.300,
+                17: 0.175, 18: 0.050, 19: 0.000
+            }
+        }
+
+        # Bedroom count scores
+        self.bedroom_scores = {
+            'age_2': {  # 25-44
+                'range_1_2': 0.522041,
+                'range_3': 0.372007,
+                'range_4': 0.890750,
+                'range_5_plus': 0.771534
+            },
+            'age_4': {  # 65+
+                'range_1_2': 0.620547,
+                'range_3': 0.605019,
+                'range_4': 0.044497,
+                'range_5_plus': 0.266851
+            }
+        }
+
+        # POI scores (MUF=Public_Market, SCH=Education, HNC=Medical)
+        self.poi_scores = {
+            'age_2': {  # 25-44
+                'MUF': 0.029093,  # Municipal Facility (Public Market)
+                'SCH': 0.665867,  # Educational
+                'HNC': 1.000     # Health Care (Medical)
+            },
+            'age_4': {  # 65+
+                'MUF': 0.890925,  # Municipal Facility (Public Market)
+                'SCH': 0.300066,  # Educational
+                'HNC': 0.101520   # Health Care (Medical)
+            }
+        }
+
+        # Component weights for final multiplier
+        # worthiness_multiplier = 0.08×bedroom + 0.02×area + 0.25×poi + 0.5×location + 0.15×walking_to_mtr
+        self.component_weights = {
+            'bedroom': 0.08,
+            'area': 0.02,
+            'poi': 0.25,
+            'location': 0.50,
+            'walking_to_mtr': 0.15
+        }
+
+        # Area benchmarks (keeping from original)
+        self.benchmarks = {
+            'saleable_area': {
+                'median': 522.0,
+                'q1': 429.0,
+                'q3': 687.0,
+                'mean': 558.09
+            }
+        }
+
+    # --- Lookup tables ---
+
+    def tables(self, age_groups=AGE_GROUPS):
+        """The preference dicts as arrays with one row per age group."""
+        districts = list(self.district_scores[age_groups[0]])
+        # Trailing 0.0 column: code -1 (unknown district) indexes it
+        district = np.array([[self.district_scores[g].get(d, 0.0) for d in districts] + [0.0]
+                             for g in age_groups])
+        walking = np.array([[self.walking_time_scores[g].get(m, 0.0) for m in range(MAX_WALKING_MINUTES)] + [0.0]
+                            for g in age_groups])
+        bedroom = np.array([[self.bedroom_scores[g][b] for b in BEDROOM_BINS] for g in age_groups])
+        poi = np.array([[self.poi_scores[g][key] for _, _, key in POI_COLUMNS] for g in age_groups])
+        return {'districts': districts, 'district': district, 'walking': walking, 'bedroom': bedroom, 'poi': poi}
+
+    # --- Columnar scoring ---
+
+    def multipliers(self, df, age_groups=AGE_GROUPS):
+        """
+        Every component multiplier and the combined worthiness multiplier for
+        all rows of df, as {name: (len(age_groups) x len(df)) array}.
+        """
+        t = self.tables(age_groups)
+        n = len(df)
+
+        # Bedroom: <=2, 3, 4, else (5+ and missing) -> bin index, normalized by the group's mean score
+        bedrooms = pd.to_numeric(df['bedroom_count'], errors='coerce').to_numpy(dtype=np.float64)
+        bins = np.select([bedrooms <= 2, bedrooms == 3, bedrooms == 4], [0, 1, 2], default=3)
+        bedroom_avg = np.array([np.mean(list(self.bedroom_scores[g].values())) for g in age_groups])
+        bedroom = t['bedroom'][:, bins] / bedroom_avg[:, None]
+
+        # Area: same for every group; a missing area falls through min/max to the 1.5 cap
+        area_ratio = pd.to_numeric(df['saleable_area'], errors='coerce').to_numpy(dtype=np.float64) \
+            / self.benchmarks['saleable_area']['median']
+        area = 0.8 + (area_ratio * 0.4)
+        area = np.where(np.isnan(area), 1.5, np.clip(area, 0.5, 1.5))
+        area = np.broadcast_to(area, (len(age_groups), n))
+
+        # POI: counts capped at 5/10/5, weighted by the group's scores, scaled by its best score
+        poi_score = np.zeros((len(age_groups), n))
+        for j, (col, cap, _) in enumerate(POI_COLUMNS):
+            counts = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64) \
+                if col in df.columns else np.zeros(n)
+            poi_score = poi_score + t['poi'][:, j:j + 1] * np.minimum(counts / cap, 1.0)
+        max_poi = t['poi'].max(axis=1, keepdims=True)
+        normalized = np.divide(poi_score, max_poi, out=np.zeros_like(poi_score), where=max_poi > 0)
+        poi = 0.7 + (normalized * 0.6)
+
+        # Location: district code -> score (unknown districts hit the trailing 0.0)
+        codes = encode_categorical(df['district'], t['districts'])
+        location = 0.8 + (t['district'][:, codes] * 0.4)
+
+        # Walking: truncated minutes index the table; missing or >= 20 min hit the trailing 0.0
+        minutes = np.trunc(pd.to_numeric(df['walking_time_to_mtr'], errors='coerce').to_numpy(dtype=np.float64))
+        in_table = (minutes >= 0) & (minutes < MAX_WALKING_MINUTES)
+        walking_idx = np.where(in_table, np.nan_to_num(minutes), MAX_WALKING_MINUTES).astype(np.int64)
+        walking = 0.8 + (t['walking'][:, walking_idx] * 0.4)
+
+        w = self.component_weights
+        combined = (
+            w['bedroom'] * bedroom +
+            w['area'] * area +
+            w['poi'] * poi +
+            w['location'] * location +
+            w['walking_to_mtr'] * walking
+        )
+        return {'bedroom': bedroom, 'area': area, 'poi': poi, 'location': location,
+                'walking': walking, 'combined': combined}
+
+    def score_frame(self, df, age_groups=AGE_GROUPS):
+        """
+        Worthiness for every row with an ensemble price, all age groups at once.
+        Returns (scored_rows, per-group result arrays) where scored_rows are the
+        index labels of the rows that were scored.
+        """
+        if 'ensemble_predicted' not in df.columns:
+            raise ValueError("ensemble_predicted column missing or null")
+        valid = df['ensemble_predicted'].notna().to_numpy()
+        rows = df[valid]
+        m = self.multipliers(rows, age_groups)
+        base_price = rows['ensemble_predicted'].to_numpy(dtype=np.float64)
+        worthiness_price = base_price * m['combined']
+        results = {
+            **{f'{name}_multiplier': m[name] for name in COMPONENTS},
+            'worthiness_multiplier': m['combined'],
+            'worthiness_price': worthiness_price,
+            'price_difference_vs_base': worthiness_price - base_price,
+            'price_difference_vs_base_pct': ((worthiness_price / base_price) - 1) * 100,
+        }
+        return rows.index, results
+
+    def calculate_worthiness_score(self, row, age_group):
+        """Calculate worthiness score for a property (one row; kept for ad-hoc use)"""
+        if 'ensemble_predicted' not in row.index or pd.isna(row['ensemble_predicted']):
+            raise ValueError("ensemble_predicted column missing or null")
+        _, r = self.score_frame(row.to_frame().T, [age_group])
+        return {
+            'age_group': age_group,
+            'actual_price': row['actual_price'],
+            'base_price': row['ensemble_predicted'],
+            **{key: values[0, 0] for key, values in r.items()},
+        }
+
+
+# --- Frame-level helpers used by the age assessment ---
+
+def _better_for(price_2, price_4, ties='age_4'):
+    return np.where(price_2 > price_4, 'age_2', np.where(price_4 > price_2, 'age_4', ties))
+
+
+def calculate_all_multipliers(df, scorer):
+    """Multiplier table for every property (MultiplierAnalyzer.calculate_all_multipliers)."""
+    if 'actual_price' not in df.columns:
+        raise ValueError("actual_price column missing")
+    index, r = scorer.score_frame(df, AGE_GROUPS)
+    skipped = len(df) - len(index)
+    if skipped:
+        print(f"  ⚠️  Skipped {skipped} properties without ensemble_predicted")
+    price_2, price_4 = r['worthiness_price']
+    multipliers_df = pd.DataFrame({
+        'index': index,
+        'age_2_multiplier': r['worthiness_multiplier'][0],
+        'age_2_worthiness_price': price_2,
+        'age_2_premium_pct': r['price_difference_vs_base_pct'][0],
+        'age_4_multiplier': r['worthiness_multiplier'][1],
+        'age_4_worthiness_price': price_4,
+        'age_4_premium_pct': r['price_difference_vs_base_pct'][1],
+        'better_for': _better_for(price_2, price_4),
+        'worthiness_gap': np.abs(price_2 - price_4),
+    })
+    print(f"✅ Completed! Processed {len(multipliers_df)}/{len(df)} properties "
+          f"(success rate: {len(multipliers_df) / max(len(df), 1) * 100:.1f}%)")
+    return multipliers_df
+
+
+def multiplier_to_score(multiplier, thresholds=UNIFIED_THRESHOLDS):
+    """
+    Convert multipliers (scalar or array) to 1-100 scores by linear
+    interpolation between the percentile thresholds.
+    """
+    scalar = np.ndim(multiplier) == 0
+    m = np.atleast_1d(np.asarray(multiplier, dtype=np.float64))
+    points = np.array(sorted(thresholds), dtype=np.float64)
+    values = np.array([thresholds[p] for p in sorted(thresholds)], dtype=np.float64)
+
+    # Interval i with values[i] <= m < values[i + 1]
+    i = np.clip(np.searchsorted(values, m, side='right') - 1, 0, len(values) - 2)
+    lower_value, upper_value = values[i], values[i + 1]
+    ratio = (m - lower_value) / (upper_value - lower_value)
+    score = points[i] + ratio * (points[i + 1] - points[i])
+    scores = np.clip(np.round(score), 1, 100)
+
+    scores = np.where(m <= values[0], 1, scores)
+    # At or above the top threshold, and missing multipliers (no interval matches), score 100
+    scores = np.where((m >= values[-1]) | np.isnan(m), 100, scores).astype(np.int64)
+    return int(scores[0]) if scalar else scores
+
+
+def generate_age_assessment(combined_df, scorer, multipliers_df=None, thresholds=UNIFIED_THRESHOLDS):
+    """
+    Original columns plus price, score and multiplier per age group and the
+    better_for comparison, for every property that can be scored.
+    (multipliers_df is accepted for call compatibility; scores are recomputed.)
+    """
+    if 'actual_price' not in combined_df.columns:
+        raise ValueError("actual_price column missing")
+    index, r = scorer.score_frame(combined_df, AGE_GROUPS)
+    assessment_df = combined_df.loc[index].reset_index(drop=True)
+    for g, group in enumerate(AGE_GROUPS):
+        assessment_df[f'{group}_worthiness_price'] = r['worthiness_price'][g]
+        assessment_df[f'{group}_worthiness_score'] = multiplier_to_score(r['worthiness_multiplier'][g], thresholds)
+        assessment_df[f'{group}_worthiness_multiplier'] = r['worthiness_multiplier'][g]
+    assessment_df['better_for'] = _better_for(*r['worthiness_price'], ties='equal')
+    print(f"\n✅ Completed! Successfully processed {len(assessment_df)}/{len(combined_df)} properties")
+    return assessment_df